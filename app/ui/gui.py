@@ -13,19 +13,25 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QFrame,
 )
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, Signal
+import time
 import config
 # Import refactored panels
 from .device_panel import DevicePanel
 from .status_panel import StatusPanel
 from .macro_dialog import MacroDialog
+from .log_panel import LogPanel
 from core.workers.capstanDrive.message_creator_panel import MessageCreatorPanel
 
-# Import UDPClientThread for UDP networking
-from core.udp import UDPClientThread
+# Import the shared UDP transports for networking
+from core.transport import UDPTransport, channel_key
+from core.async_transport import AsyncUDPTransport
 
 # Import HealthMonitor for health checking
 from core.health_monitor import HealthMonitor
+from core.time_sync import ClockSync
+from core.dictionary_registry import DictionaryError, get_registry
+from core.wire_codec import WireCodecError
 
 
 
@@ -45,6 +51,9 @@ from PySide6.QtCore import Qt
 
 
 class MainWindow(QMainWindow):
+    # Registry reloads arrive on the watcher thread; queued onto the GUI thread
+    dictionary_reloaded = Signal(str, object, object)  # device_type, DeviceDictionary, DictionaryDiff
+
     # ...existing code...
     def __init__(self, servers_by_location, status_icons):
         super().__init__()
@@ -59,28 +68,32 @@ class MainWindow(QMainWindow):
             self.servers_by_location, self.status_icons
         )
 
-        # --- Load command dictionary and config ---
-        import importlib.util, os, json
+        # --- Command dictionary and config (shared, loaded once per process) ---
+        registry = get_registry()
         self._command_dict = None
-        self._command_config = None
-        command_dict_path = os.path.join(os.path.dirname(__file__), '../../../../shared_dictionaries/command_dictionaries/capstanDrive_commandDictionary.json')
+        self._command_config = registry.config('capstanDrive')
+        self._wire_codec = None
         try:
-            with open(command_dict_path, 'r') as f:
-                self._command_dict = json.load(f)
-        except Exception as e:
+            device_dictionary = registry.get('capstanDrive')
+            self._command_dict = device_dictionary.dictionary
+            # Binary frame layout, compiled once and offered to devices that opt in
+            if config.WIRE_BINARY_ENCODING_ENABLED:
+                try:
+                    self._wire_codec = device_dictionary.codec
+                except WireCodecError as e:
+                    print(f"Binary encoding disabled: {e}")
+        except DictionaryError as e:
             print(f"Error loading command dictionary: {e}")
-        config_path = os.path.join(os.path.dirname(__file__), '../../core/workers/capstanDrive/capstanDrive_config.py')
-        try:
-            spec = importlib.util.spec_from_file_location('capstanDrive_config', config_path)
-            config_mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(config_mod)
-            self._command_config = config_mod
-        except Exception as e:
-            print(f"Error loading config: {e}")
 
         # --- Message Creator Panel (modular) ---
         self.message_creator_panel = MessageCreatorPanel(self._command_dict, self._command_config)
 
+        # --- Dictionary hot reload: edits apply per command, no restart ---
+        if config.DICTIONARY_HOT_RELOAD_ENABLED:
+            self.dictionary_reloaded.connect(self._on_dictionary_reloaded)
+            registry.add_listener(self._on_registry_event)
+            registry.start_watching()
+
         # --- Status Panel (new) ---
         self.status_panel = StatusPanel()
         
@@ -103,16 +116,21 @@ class MainWindow(QMainWindow):
             self.manual_check_button.clicked.connect(self._on_manual_health_check)
             self.manual_check_button.setEnabled(False)  # Disabled until worker registered
             
-            # Setup hourly ZULU broadcast timer
+            # Setup hourly ZULU timer (with clock sync: only devices it is not syncing)
             self.zulu_broadcast_timer = QTimer(self)
             self.zulu_broadcast_timer.timeout.connect(self._on_hourly_zulu_broadcast)
             self.zulu_broadcast_timer.start(3600000)  # 1 hour = 3600000 ms
 
+        # --- Clock sync (offset/drift estimation for every registered device) ---
+        self.clock_sync = None
+        if config.CLOCK_SYNC_ENABLED:
+            self.clock_sync = ClockSync()
+            self.clock_sync_timer = QTimer(self)
+            self.clock_sync_timer.setSingleShot(True)
+            self.clock_sync_timer.timeout.connect(self._on_clock_sync_timer)
+
         # --- Log panel ---
-        self.log_panel = QTextEdit()
-        self.log_panel.setReadOnly(True)
-        self.log_panel.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        self.log_panel.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.log_panel = LogPanel(config.LOG_MAX_LINES)
 
         # --- Request box ---
         self.request_box = QTextEdit()
@@ -143,6 +161,7 @@ class MainWindow(QMainWindow):
         )
         self.abort_button.clicked.connect(self.on_abort_button_clicked)
         self._last_sent_message = None
+        self._last_sent_seq = None  # Sequence number of the last SEND on a sequenced device
 
         # --- Macro button ---
         self.macro_button = QPushButton("MACRO")
@@ -159,6 +178,18 @@ class MainWindow(QMainWindow):
                 if host and name:
                     self._ip_name_map[host] = name
 
+        # --- Shared UDP transport: one socket serving every device in servers.json ---
+        if config.UDP_TRANSPORT_BACKEND == 'asyncio':
+            self.udp_transport = AsyncUDPTransport()
+        else:
+            self.udp_transport = UDPTransport()
+        self.udp_transport.register_servers(self.servers_by_location)
+        self.udp_channel = None  # Channel of the currently selected device
+        self._current_clock_key = None  # "<location>/<name>" ClockSync key of the selected device
+        if self.clock_sync is not None:
+            for key, channel in self.udp_transport.channels_by_name.items():
+                self._register_clock_sync(key, channel)
+
         # --- Macro dialog (kept as a reference so replies can be forwarded) ---
         self._current_device_name = ""
         self.macro_dialog = None
@@ -267,6 +298,9 @@ class MainWindow(QMainWindow):
 
         # Optionally, connect message preview to log panel or other UI as needed
         
+        self.udp_transport.transport_message.connect(self.log_message)
+        self.udp_transport.start()
+
         # Log health monitor initialization status (after log_panel is created)
         if config.HEALTH_CHECK_ENABLED and self.health_monitor:
             self.log_message("[HealthMonitor] Health monitoring system initialized")
@@ -278,7 +312,7 @@ class MainWindow(QMainWindow):
         msg = self.message_creator_panel.assembled_output.text()
         if msg and '□' not in msg:
             self._last_sent_message = msg
-            self.send_udp_message(msg)
+            self._last_sent_seq = self.send_udp_message(msg)
             self.request_box.setText(f"Sent: {msg}")
             self.reply_box.clear()
             self._abort_pending = True
@@ -291,20 +325,47 @@ class MainWindow(QMainWindow):
     def log_message(self, msg):
         """Append message to log panel and auto-scroll to bottom."""
         self.log_panel.append(msg)
-        self.log_panel.ensureCursorVisible()
+    
+    def log_messages(self, msgs):
+        """Append a batch of messages to the log panel with a single scroll."""
+        self.log_panel.append_lines(msgs)
     
     def log_reply(self, msg):
         """Append only actual UDP received messages to reply box, with IP→name translation."""
-        if msg.startswith("Received from"):
-            self.reply_box.append(self._translate_received_message(msg))
-            self.reply_box.ensureCursorVisible()
-            # Reply arrived — cancel pending abort
+        self.log_replies([msg])
+    
+    def log_replies(self, msgs):
+        """Append the UDP replies in a batch to the reply box, with IP→name translation."""
+        replies = [msg for msg in msgs if msg.startswith("Received from")]
+        if not replies:
+            return
+        self.reply_box.append("\n".join(self._translate_received_message(msg) for msg in replies))
+        self.reply_box.ensureCursorVisible()
+        # Sequenced devices resolve the exact request in _on_reply_received instead
+        if self.udp_channel is not None and self.udp_channel.sequenced:
+            return
+        # Reply arrived — cancel pending abort
+        self._abort_pending = False
+        self._abort_enable_timer.stop()
+        self.abort_button.setEnabled(False)
+        # Forward to macro dialog if it is open and awaiting a step reply
+        if self.macro_dialog is not None and self.macro_dialog.isVisible():
+            for msg in replies:
+                self.macro_dialog.receive_reply(msg)
+
+    def _on_reply_received(self, seq, payload, rtt_ms):
+        """A tagged reply resolved request `seq` — cancel the abort only if it answers the last send."""
+        if seq == self._last_sent_seq:
+            self._last_sent_seq = None
             self._abort_pending = False
             self._abort_enable_timer.stop()
             self.abort_button.setEnabled(False)
-            # Forward to macro dialog if it is open and awaiting a step reply
-            if self.macro_dialog is not None and self.macro_dialog.isVisible():
-                self.macro_dialog.receive_reply(msg)
+        if self.macro_dialog is not None and self.macro_dialog.isVisible():
+            self.macro_dialog.receive_reply(payload, seq)
+
+    def _on_request_timed_out(self, seq, message):
+        """No tagged reply arrived for request `seq` within UDP_REQUEST_TIMEOUT_S."""
+        self.log_message(f"[TIMEOUT] No reply to #{seq}: {message}")
 
     def clear_reply_box(self):
         """Clear the reply box when user changes any input."""
@@ -369,14 +430,13 @@ class MainWindow(QMainWindow):
     # Param fields now handled by MessageCreatorPanel
 
     def send_udp_message(self, msg):
-        # Send via UDP thread if available
-        if hasattr(self, "udp_thread") and self.udp_thread is not None:
-            self.udp_thread.send_message(msg)
+        """Send via the selected device channel; return the request's sequence number (or None)."""
+        if self.udp_channel is not None:
+            seq = self.udp_channel.send_message(msg)
             self.log_panel.append(f"[UI] Sent: {msg}")
-            self.log_panel.ensureCursorVisible()
-        else:
-            self.log_panel.append("[UI] No UDP connection to send message.")
-            self.log_panel.ensureCursorVisible()
+            return seq
+        self.log_panel.append("[UI] No UDP connection to send message.")
+        return None
 
         # ...existing code...
 
@@ -390,22 +450,28 @@ class MainWindow(QMainWindow):
         self.log_panel.append(
             f"[UI] Selected server: {server.get('name', 'Unnamed')} ({server.get('host', '')}:{server.get('port', '')})"
         )
-        self.log_panel.ensureCursorVisible()
         # --- UDP Networking Integration ---
-        if hasattr(self, "udp_thread") and self.udp_thread is not None:
-            self.udp_thread.stop()
-            self.udp_thread = None
+        self._detach_udp_channel()
         host = server.get("host") or server.get("ip")
         port = server.get("port")
         server_name = server.get('name', 'Unnamed')
         if host and port:
             self._current_device_name = server_name
             self.log_panel.append(f"Connecting to {host}:{port}...")
-            self.log_panel.ensureCursorVisible()
-            self.udp_thread = UDPClientThread(host, port, server_name)
-            self.udp_thread.message_received.connect(self.log_message)
-            self.udp_thread.message_received.connect(self.log_reply)
-            self.udp_thread.start()
+            # Per-name channel: devices sharing host:port each get their own PONGs and replies
+            location = self.device_panel.location_selector.currentText()
+            self.udp_channel = self.udp_transport.register_device(
+                server_name, host, port, server.get("sequence_numbers", False), location)
+            self.udp_channel.messages_received.connect(self.log_messages)
+            self.udp_channel.messages_received.connect(self.log_replies)
+            self.udp_channel.reply_received.connect(self._on_reply_received)
+            self.udp_channel.request_timed_out.connect(self._on_request_timed_out)
+            self.udp_channel.displayed = True
+            if self._wire_codec is not None and server.get("binary_encoding", False):
+                self.udp_channel.negotiate_encoding(self._wire_codec)
+            self._current_clock_key = channel_key(server_name, location)
+            if self.clock_sync is not None and self._current_clock_key not in self.clock_sync.channels:
+                self._register_clock_sync(self._current_clock_key, self.udp_channel)
             # Update message creator for this server
             self.message_creator_panel.set_server(server)
             
@@ -417,12 +483,12 @@ class MainWindow(QMainWindow):
                 # Register worker with health monitor
                 self.health_monitor.register_worker(
                     server_name,
-                    self.udp_thread,
+                    self.udp_channel,
                     requested_metrics
                 )
                 
                 # Start health monitoring only if not already running
-                if not self.health_monitor.timer.isActive():
+                if not self.health_monitor.running:
                     self.health_monitor.start()
                 
                 # Enable manual check button
@@ -430,15 +496,13 @@ class MainWindow(QMainWindow):
                     self.manual_check_button.setEnabled(True)
                 
                 self.log_panel.append(f"[HealthMonitor] Registered worker: {server_name}")
-                self.log_panel.ensureCursorVisible()
         else:
             self.log_panel.append("No host/port info for selected server.")
-            self.log_panel.ensureCursorVisible()   
 
     def handle_device_deselected(self):
         # Unregister from health monitor first
-        if config.HEALTH_CHECK_ENABLED and self.health_monitor and hasattr(self, "udp_thread"):
-            if self.udp_thread is not None:
+        if config.HEALTH_CHECK_ENABLED and self.health_monitor:
+            if self.udp_channel is not None:
                 # Get the server name from the last selected device
                 # (We need to track this or unregister all)
                 self.health_monitor.unregister_all_workers()
@@ -450,12 +514,69 @@ class MainWindow(QMainWindow):
                     self.manual_check_button.setEnabled(False)
         
         self._current_device_name = ""
-        # Stop UDP thread if nothing selected
-        if hasattr(self, "udp_thread") and self.udp_thread is not None:
-            self.udp_thread.stop()
-            self.udp_thread = None
+        # Stop showing traffic if nothing selected (the shared socket stays open)
+        self._detach_udp_channel()
         # Clear message creator fields
         self.message_creator_panel.clear_fields()
+
+    def _detach_udp_channel(self):
+        """Disconnect the log slots from the previously selected device channel."""
+        if self.udp_channel is None:
+            return
+        self.udp_channel.displayed = False
+        self._current_clock_key = None
+        try:
+            self.udp_channel.messages_received.disconnect(self.log_messages)
+            self.udp_channel.messages_received.disconnect(self.log_replies)
+            self.udp_channel.reply_received.disconnect(self._on_reply_received)
+            self.udp_channel.request_timed_out.disconnect(self._on_request_timed_out)
+        except (RuntimeError, TypeError):
+            pass
+        self.udp_channel = None
+
+    def _on_registry_event(self, event, *args):
+        # Watcher thread: only hand over to the GUI thread here
+        if event == 'dictionary_reloaded':
+            self.dictionary_reloaded.emit(*args)
+
+    def _on_dictionary_reloaded(self, device_type, entry, diff):
+        """Apply a hot-reloaded command dictionary to the menu and the wire codec."""
+        if device_type != 'capstanDrive':
+            return
+        self._command_dict = entry.dictionary
+        self.message_creator_panel.apply_dictionary_diff(entry.dictionary, diff)
+        self.log_panel.append(
+            f"[DICTIONARY] Reloaded {device_type}: {len(diff.added)} added, "
+            f"{len(diff.removed)} removed, {len(diff.changed)} changed"
+        )
+        if not config.WIRE_BINARY_ENCODING_ENABLED:
+            return
+        try:
+            codec = entry.codec
+        except WireCodecError as e:
+            self.log_panel.append(f"[DICTIONARY] Binary encoding disabled: {e}")
+            codec = None
+        if codec is self._wire_codec:
+            return
+        self._wire_codec = codec
+        # Frame layouts changed: re-offer (or drop) binary on the device using the old ones
+        if self.udp_channel is not None and self.udp_channel.codec is not None:
+            if codec is not None:
+                self.udp_channel.negotiate_encoding(codec)
+            else:
+                self.udp_channel.codec = None
+                self.udp_channel.binary = False
+
+    def closeEvent(self, event):
+        """Stop health monitoring and the shared UDP transport when the window closes."""
+        if config.DICTIONARY_HOT_RELOAD_ENABLED:
+            registry = get_registry()
+            registry.remove_listener(self._on_registry_event)
+            registry.stop_watching()
+        if self.health_monitor is not None:
+            self.health_monitor.shutdown()
+        self.udp_transport.stop()
+        super().closeEvent(event)
         
     # --- Status Panel Helper Methods ---
     def update_status_table(self, data_dict):
@@ -647,10 +768,36 @@ class MainWindow(QMainWindow):
             self.health_monitor.trigger_manual_check()
             self.log_message("[HealthMonitor] Manual health check triggered")
     
+    def _register_clock_sync(self, key, channel):
+        """Keep one device's clock synced whether or not it is selected."""
+        # Stamp and filter replies in the receive thread; corrections go out from there too.
+        # Replies are filed under the location-qualified key (names repeat across locations).
+        channel.time_sync_received.connect(
+            lambda _name, t1, t2, t3, t4, key=key: self.clock_sync.handle_reply(key, t1, t2, t3, t4),
+            Qt.DirectConnection)
+        self.clock_sync.register(key, channel)
+        self._on_clock_sync_timer()
+
+    def _on_clock_sync_timer(self):
+        """Send due clock sync exchanges and re-arm for the next one."""
+        deadline = self.clock_sync.run_due()
+        if deadline is not None:
+            self.clock_sync_timer.start(max(0, int((deadline - time.monotonic()) * 1000)))
+
     def _on_hourly_zulu_broadcast(self):
-        """Send ZULU time sync broadcast every hour."""
-        self.log_message("[ZULU] Hourly broadcast - syncing all devices")
-        self.send_zulu_sync(broadcast=True)
+        """Send ZULU time sync every hour: broadcast, or only to devices ClockSync is not syncing."""
+        if self.clock_sync is None:
+            self.log_message("[ZULU] Hourly broadcast - syncing all devices")
+            self.send_zulu_sync(broadcast=True)
+            return
+        unsynced = self.clock_sync.unsynced()
+        if not unsynced:
+            return
+        self.log_message(f"[ZULU] Hourly sync - {len(unsynced)} device(s) without clock sync")
+        for key, channel in unsynced.items():
+            channel.send_zulu_sync(broadcast=False)
+            self.clock_sync.clock_stepped(key)
+        self._on_clock_sync_timer()
     
     def send_zulu_sync(self, server_name=None, broadcast=False):
         """Send ZULU time synchronization to device(s).
@@ -673,3 +820,12 @@ class MainWindow(QMainWindow):
             worker = self.health_monitor.workers.get(server_name)
             if worker and hasattr(worker, 'send_zulu_sync'):
                 worker.send_zulu_sync(broadcast=False)
+        else:
+            return
+        if self.clock_sync is not None:
+            # ZULU stepped the device clock: the estimator's samples no longer describe it
+            if broadcast:
+                self.clock_sync.clock_stepped()
+            elif server_name == self._current_device_name and self._current_clock_key:
+                self.clock_sync.clock_stepped(self._current_clock_key)
+            self._on_clock_sync_timer()
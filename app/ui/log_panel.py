@@ -0,0 +1,115 @@
+"""LogPanel — bounded, virtualized log view for the bottom Logging frame.
+
+Lines are stored in a fixed-capacity ring (LogModel) sized by
+config.LOG_MAX_LINES; once full, every append evicts the oldest lines, so
+memory and append cost stay flat over a multi-day session.  The view is a
+QListView in uniform-item-size mode, which only lays out and paints the
+rows that are actually visible.
+
+Multi-line messages are split into one row per line so every row has the
+same height.
+"""
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PySide6.QtGui import QKeySequence
+from PySide6.QtWidgets import QAbstractItemView, QApplication, QListView
+
+import config
+
+
+class LogModel(QAbstractListModel):
+    """Fixed-capacity ring of log lines exposed as a flat list model."""
+
+    def __init__(self, max_lines, parent=None):
+        super().__init__(parent)
+        self.max_lines = max(1, int(max_lines))
+        self._ring = [None] * self.max_lines
+        self._start = 0   # Ring index of the oldest line (row 0)
+        self._count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        if row >= self._count:
+            return None
+        return self._ring[(self._start + row) % self.max_lines]
+
+    def line(self, row):
+        """Return the text of a row (0 = oldest)."""
+        return self._ring[(self._start + row) % self.max_lines]
+
+    def append_lines(self, lines):
+        """Append lines, evicting the oldest rows once the ring is full."""
+        if not lines:
+            return
+        if len(lines) > self.max_lines:
+            lines = lines[-self.max_lines:]
+
+        overflow = self._count + len(lines) - self.max_lines
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for i in range(overflow):
+                self._ring[(self._start + i) % self.max_lines] = None
+            self._start = (self._start + overflow) % self.max_lines
+            self._count -= overflow
+            self.endRemoveRows()
+
+        first = self._count
+        self.beginInsertRows(QModelIndex(), first, first + len(lines) - 1)
+        for line in lines:
+            self._ring[(self._start + self._count) % self.max_lines] = line
+            self._count += 1
+        self.endInsertRows()
+
+    def clear(self):
+        """Remove every line."""
+        self.beginResetModel()
+        self._ring = [None] * self.max_lines
+        self._start = 0
+        self._count = 0
+        self.endResetModel()
+
+
+class LogPanel(QListView):
+    """Read-only log view that follows new lines while scrolled to the bottom."""
+
+    def __init__(self, max_lines=None, parent=None):
+        super().__init__(parent)
+        self.log_model = LogModel(max_lines or config.LOG_MAX_LINES, self)
+        self.setModel(self.log_model)
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+
+    def append(self, msg):
+        """Append one message (same call shape as QTextEdit.append)."""
+        self.append_lines([msg])
+
+    def append_lines(self, msgs):
+        """Append a batch of messages and keep the view pinned to the newest line."""
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        lines = []
+        for msg in msgs:
+            lines.extend(str(msg).splitlines() or [""])
+        self.log_model.append_lines(lines)
+        if at_bottom:
+            self.scrollToBottom()
+
+    def clear(self):
+        """Remove every line from the log."""
+        self.log_model.clear()
+
+    def keyPressEvent(self, event):
+        # Copy selected rows as plain text, like the QTextEdit this replaces
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QApplication.clipboard().setText("\n".join(self.log_model.line(row) for row in rows))
+            return
+        super().keyPressEvent(event)
@@ -81,7 +81,8 @@ class MacroDialog(QDialog):
         Args:
             get_current_message: Callable → str.  Returns the message currently
                 assembled in the main window's Message Creator.
-            send_fn:             Callable(str).  Sends a UDP command string.
+            send_fn:             Callable(str) → int | None.  Sends a UDP command
+                                 string and returns its sequence number, if any.
             device_name:         Name of the currently selected device (e.g.
                                  "capstanDrive").  Used to tag and filter macros.
             parent:              Parent QWidget (the main window).
@@ -95,6 +96,7 @@ class MacroDialog(QDialog):
         self._step_index = 0
         self._step_lines = []
         self._awaiting_reply = False   # normal command sent, waiting for UDP reply
+        self._awaiting_seq = None      # sequence number of that command (sequenced devices)
         self._awaiting_enter = False   # on 'enter' step, waiting for user click
         self._wait_remaining = 0       # seconds left in a 'wait,n' step
 
@@ -460,7 +462,7 @@ class MacroDialog(QDialog):
 
         else:
             # Normal command — send and wait for UDP reply (auto-advances)
-            self.send_fn(cmd)
+            self._awaiting_seq = self.send_fn(cmd)
             self._awaiting_reply = True
             self.step_btn.setEnabled(False)
             self.step_btn.setText("▶  Step Send")
@@ -491,19 +493,23 @@ class MacroDialog(QDialog):
     # Called by MainWindow when a UDP reply arrives
     # ------------------------------------------------------------------
 
-    def receive_reply(self, raw_msg):
+    def receive_reply(self, raw_msg, seq=None):
         """Forward a UDP reply into the step reply box and advance the step.
 
-        Called by MainWindow.log_reply() when the dialog is open and in
-        step-run mode (_awaiting_reply == True).
+        Called by MainWindow.log_replies() when the dialog is open and in
+        step-run mode (_awaiting_reply == True), or by
+        MainWindow._on_reply_received() for sequenced devices.
 
         Args:
-            raw_msg: The raw message string from UDPClientThread.message_received.
-                     Could be "Received from ('ip', port): payload" or already
-                     translated to "From name: payload".
+            raw_msg: The raw reply string.  Could be "Received from ('ip', port): payload",
+                     already translated to "From name: payload", or a bare payload.
+            seq:     Sequence number the reply answers (sequenced devices only).
+                     Replies to any other request are ignored.
         """
         if not self._awaiting_reply:
             return
+        if self._awaiting_seq is not None and seq != self._awaiting_seq:
+            return
 
         self._reply_timeout_timer.stop()  # real reply arrived — cancel the timeout
         # Strip the "Received from …" wrapper if still present
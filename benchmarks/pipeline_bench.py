@@ -0,0 +1,103 @@
+"""
+Command throughput benchmark: stop-and-wait vs CommandPipeline windows.
+
+Runs a loopback echo device that answers "@<seq>:" tagged commands after a
+fixed one-way delay, then times how long each window size takes to complete
+the same number of commands through the shared UDPTransport.
+
+A window of 1 is stop-and-wait (one command per round trip); larger windows
+should approach window x that rate until the device or transport saturates.
+
+Usage:
+    python benchmarks/pipeline_bench.py [--commands 200] [--latency-ms 20] [--windows 1,4,8,16]
+"""
+
+import argparse
+import heapq
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from core.pipeline import CommandPipeline
+from core.transport import UDPTransport
+
+
+class DelayedEchoDevice(threading.Thread):
+    """Echo every datagram back to its sender after `delay` seconds."""
+
+    def __init__(self, delay):
+        super().__init__(daemon=True)
+        self.delay = delay
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.001)
+        self.address = self.sock.getsockname()
+
+    def run(self):
+        due = []  # heap of (send_at, counter, data, addr)
+        counter = 0
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(4096)
+                heapq.heappush(due, (time.monotonic() + self.delay, counter, data, addr))
+                counter += 1
+            except socket.timeout:
+                pass
+            except OSError:
+                return
+            now = time.monotonic()
+            while due and due[0][0] <= now:
+                _, _, data, addr = heapq.heappop(due)
+                self.sock.sendto(data, addr)
+
+
+def run_window(channel, window, commands):
+    pipeline = CommandPipeline(channel, window=window, timeout=5.0, retries=0)
+    loop = QEventLoop()
+    pipeline.drained.connect(loop.quit)
+    QTimer.singleShot(60000, loop.quit)
+    start = time.perf_counter()
+    futures = [pipeline.submit(f"ECHO:{i}") for i in range(commands)]
+    loop.exec()
+    elapsed = time.perf_counter() - start
+    pipeline.close()
+    done = sum(1 for f in futures if f.done() and not f.cancelled() and f.exception() is None)
+    return done, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CommandPipeline window sizes')
+    parser.add_argument('--commands', type=int, default=200, help='Commands per window size (default: 200)')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Device reply delay in ms (default: 20)')
+    parser.add_argument('--windows', default='1,4,8,16', help='Comma-separated window sizes (default: 1,4,8,16)')
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    device = DelayedEchoDevice(args.latency_ms / 1000.0)
+    device.start()
+
+    transport = UDPTransport(bind_host="127.0.0.1")
+    channel = transport.register_device("bench", *device.address, sequenced=True)
+    transport.start()
+
+    print(f"commands={args.commands} latency={args.latency_ms:.1f}ms")
+    baseline = None
+    for window in (int(w) for w in args.windows.split(',')):
+        done, elapsed = run_window(channel, window, args.commands)
+        rate = done / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        print(f"window={window:<4} {done:>6} ok  {elapsed * 1000:>9.1f} ms  {rate:>9,.0f} cmd/s  {rate / baseline:>5.2f}x")
+
+    transport.stop()
+    device.sock.close()
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
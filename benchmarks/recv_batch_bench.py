@@ -0,0 +1,105 @@
+"""
+Receive-path benchmark: legacy recvfrom() loop vs BatchReceiver.
+
+Fills a loopback socket with a burst of datagrams, then times how fast each
+receive path drains it. Only the drain is timed, so the numbers reflect
+per-datagram receive cost rather than the sender.
+
+Paths compared:
+- legacy:   recvfrom(4096) + decode() per datagram (UDPClientThread.run)
+- fallback: BatchReceiver plain recvfrom() loop (no recvmmsg), decode on demand
+- recvmmsg: BatchReceiver Linux fast path, decode on demand
+
+Usage:
+    python benchmarks/recv_batch_bench.py [--burst 2000] [--rounds 50] [--size 64]
+"""
+
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.batch_recv import BatchReceiver
+
+
+def make_pair():
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024 * 1024)
+    rx.bind(("127.0.0.1", 0))
+    rx.setblocking(False)
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    return rx, tx
+
+
+def fill(tx, addr, burst, payload):
+    for _ in range(burst):
+        tx.sendto(payload, addr)
+
+
+def drain_legacy(rx):
+    count = 0
+    while True:
+        try:
+            data, addr = rx.recvfrom(4096)
+        except BlockingIOError:
+            return count
+        data.decode()
+        count += 1
+
+
+def drain_batch(receiver):
+    count = 0
+    while True:
+        n = receiver.recv_batch()
+        if n == 0:
+            return count
+        count += n
+
+
+def run(name, drain, rx, tx, args, payload):
+    addr = rx.getsockname()
+    total = 0
+    elapsed = 0.0
+    for _ in range(args.rounds):
+        fill(tx, addr, args.burst, payload)
+        start = time.perf_counter()
+        total += drain()
+        elapsed += time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0.0
+    print(f"{name:<10} {total:>9} datagrams  {elapsed * 1000:>9.1f} ms  {rate:>12,.0f} dgram/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark UDP receive paths')
+    parser.add_argument('--burst', type=int, default=2000, help='Datagrams queued per round (default: 2000)')
+    parser.add_argument('--rounds', type=int, default=50, help='Number of fill/drain rounds (default: 50)')
+    parser.add_argument('--size', type=int, default=64, help='Payload size in bytes (default: 64)')
+    parser.add_argument('--batch', type=int, default=64, help='BatchReceiver batch size (default: 64)')
+    args = parser.parse_args()
+
+    payload = b'GET_STATUS,' + b'x' * max(0, args.size - 11)
+    rx, tx = make_pair()
+
+    print(f"burst={args.burst} rounds={args.rounds} size={len(payload)}B batch={args.batch}")
+    legacy = run('legacy', lambda: drain_legacy(rx), rx, tx, args, payload)
+
+    fallback = BatchReceiver(rx, args.batch, 4096, use_recvmmsg=False)
+    run('fallback', lambda: drain_batch(fallback), rx, tx, args, payload)
+
+    fast = BatchReceiver(rx, args.batch, 4096)
+    if fast.fast_path:
+        rate = run('recvmmsg', lambda: drain_batch(fast), rx, tx, args, payload)
+        print(f"recvmmsg speedup over legacy: {rate / legacy:.2f}x")
+    else:
+        print("recvmmsg   unavailable on this platform (fallback only)")
+
+    rx.close()
+    tx.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Command validation benchmark: per-call dictionary interpretation vs CommandSchema.
+
+Validates the same stream of capstanDrive commands two ways:
+- interpreted: walks the dictionary entry on every call the way
+  CapstanDriveWorker.extract_params used to - splitting condition strings,
+  rebuilding BOOLEAN_CONFIG string lists and scanning enum option lists
+  (with its condition and enum-option checks corrected so both paths
+  accept the same commands)
+- compiled:    CommandSchema.parse() (core/command_schema.py), built once;
+               each command's validate() is generated straight-line code
+
+Both paths must produce identical parameters before anything is timed.
+
+Usage:
+    python benchmarks/schema_bench.py [--commands 20000] [--rounds 5]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.command_schema import CommandSchema
+
+DEVICE_DIR = os.path.join(os.path.dirname(__file__), '..', 'core', 'workers', 'capstanDrive')
+
+STREAM = [
+    "LED,1,blink,3,0.5",
+    "LED,2,on_off,on",
+    "LED,3,flash,20,50",
+    "HPL,1,on_off,off",
+    "STEPPER,1,vpid,100,1.5,0.2,0.01,10,0.001",
+    "STEPPER,2,pulse,nH,0.1,0.1,5,time,2,50",
+    "ENCODER,1,position,-300",
+    "GET_LED,2",
+    "GET_STEPPER,3",
+    "CLR_WARN,1,42",
+    "GET_ERROR_LOG,2,10",
+    "GET_STATUS",
+]
+
+
+def load_device():
+    with open(os.path.join(DEVICE_DIR, 'capstanDrive_commandDictionary.json'), 'r') as f:
+        commands = json.load(f)["commands"]
+    spec = importlib.util.spec_from_file_location('capstanDrive_config',
+                                                  os.path.join(DEVICE_DIR, 'capstanDrive_config.py'))
+    config_mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config_mod)
+    return commands, config_mod
+
+
+def interpret(csv_command, commands, config_mod):
+    """Parse one command by walking its dictionary entry (the pre-compiled approach)."""
+    parts = [p.strip() for p in csv_command.split(",") if p.strip()]
+    cmd = parts[0]
+    if cmd not in commands:
+        return cmd, {"error": f"Unknown command: {cmd}"}
+    param_list = parts[1:]
+    params = {}
+    for pdef in commands[cmd].get("parameters", []):
+        conds = pdef.get("condition") or []
+        if conds:
+            matched = False
+            for cond in conds:
+                key, op, val = cond.split()
+                if op == "==" and params.get(key) == val:
+                    matched = True
+            if not matched:
+                continue
+        idx = pdef.get("param_number", 1) - 1
+        if idx >= len(param_list) or pdef["name"] in params:
+            continue
+        raw_val = param_list[idx]
+        if pdef["type"] == "integer":
+            val = int(raw_val)
+        elif pdef["type"] == "float":
+            val = float(raw_val)
+        elif pdef["type"] == "boolean":
+            bool_config = config_mod.BOOLEAN_CONFIG
+            true_strings = [s.lower() for s in bool_config.get('true_strings', ['true', '1'])]
+            false_strings = [s.lower() for s in bool_config.get('false_strings', ['false', '0'])]
+            if raw_val.lower() in true_strings:
+                val = True
+            elif raw_val.lower() in false_strings:
+                val = False
+            else:
+                return cmd, {"error": f"Invalid boolean value: {raw_val}"}
+        elif pdef["type"] == "enum":
+            options = [o["value"] for o in pdef.get("options", [])]
+            if raw_val in options:
+                val = raw_val
+            elif pdef.get("param_number") == 1 and raw_val.isdigit() and 1 <= int(raw_val) <= len(options):
+                val = options[int(raw_val) - 1]
+            else:
+                return cmd, {"error": f"Invalid enum value: {raw_val}"}
+        else:
+            val = raw_val
+        if "range" in pdef and pdef["type"] in ("integer", "float"):
+            r = pdef["range"]
+            if "min" in r and val < r["min"]:
+                return cmd, {"error": f"Value {val} below min {r['min']}"}
+            if "max" in r and val > r["max"]:
+                return cmd, {"error": f"Value {val} above max {r['max']}"}
+        params[pdef["name"]] = val
+    return cmd, params
+
+
+def best_of(rounds, fn):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark command validation paths')
+    parser.add_argument('--commands', type=int, default=20000, help='Commands validated per round (default: 20000)')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds per path; the best is reported (default: 5)')
+    args = parser.parse_args()
+
+    commands, config_mod = load_device()
+    start = time.perf_counter()
+    schema = CommandSchema(commands, config_mod.BOOLEAN_CONFIG)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    for message in STREAM:
+        expected = interpret(message, commands, config_mod)
+        actual = schema.parse(message)
+        if expected != actual:
+            raise SystemExit(f"Mismatch for {message}: {expected} != {actual}")
+
+    stream = (STREAM * (args.commands // len(STREAM) + 1))[:args.commands]
+
+    def run_interpreted():
+        for message in stream:
+            interpret(message, commands, config_mod)
+
+    def run_compiled():
+        parse = schema.parse
+        for message in stream:
+            parse(message)
+
+    print(f"commands={args.commands} rounds={args.rounds} compile={compile_ms:.2f}ms ({len(schema)} commands)")
+    baseline = None
+    for name, fn in (("interpreted", run_interpreted), ("compiled", run_compiled)):
+        elapsed = best_of(args.rounds, fn)
+        rate = args.commands / elapsed
+        baseline = baseline or rate
+        print(f"{name:<12} {elapsed * 1000:>9.1f} ms  {rate:>11,.0f} cmd/s  {rate / baseline:>5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
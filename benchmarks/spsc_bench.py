@@ -0,0 +1,154 @@
+"""
+Datagram hand-off benchmark: queue.Queue vs collections.deque vs SPSCChannel.
+
+Moves (payload, rx_ns) tuples from a producer to a consumer, the way the
+transport receive thread hands datagrams to a device worker:
+- queue.Queue:  put() / get() + get_nowait() drain (a lock and a condition
+                variable per message)
+- deque:        append() / popleft() (no wakeup of its own; the consumer polls)
+- spsc:         SPSCChannel.push() / pop_batch() (core/spsc_channel.py)
+
+Two measurements:
+- same thread:  push N, then pop everything in batches; pure per-message cost
+- two threads:  a producer thread and a consumer thread running together;
+                end-to-end messages per second
+
+Usage:
+    python benchmarks/spsc_bench.py [--messages 200000] [--batch 64] [--rounds 3]
+"""
+
+import argparse
+import collections
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.spsc_channel import SPSCChannel
+
+
+class QueueAdapter:
+    def __init__(self):
+        self.q = queue.Queue()
+
+    def push(self, item):
+        self.q.put(item)
+        return True
+
+    def pop_batch(self, max_items):
+        q = self.q
+        batch = []
+        try:
+            while len(batch) < max_items:
+                batch.append(q.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def wait_batch(self, max_items):
+        batch = [self.q.get()]  # Blocks on the condition variable
+        return batch + self.pop_batch(max_items - 1)
+
+
+class DequeAdapter:
+    def __init__(self):
+        self.d = collections.deque()
+
+    def push(self, item):
+        self.d.append(item)
+        return True
+
+    def pop_batch(self, max_items):
+        d = self.d
+        batch = []
+        try:
+            while len(batch) < max_items:
+                batch.append(d.popleft())
+        except IndexError:
+            pass
+        return batch
+
+
+class SPSCAdapter:
+    def __init__(self, capacity):
+        self.ring = SPSCChannel(capacity)
+        self.push = self.ring.push
+        self.pop_batch = self.ring.pop_batch
+
+
+def make(name, capacity):
+    if name == 'queue.Queue':
+        return QueueAdapter()
+    if name == 'deque':
+        return DequeAdapter()
+    return SPSCAdapter(capacity)
+
+
+def same_thread(channel, messages, batch):
+    item = (b'GET_LED,1,on', 0)
+    push = channel.push
+    pop_batch = channel.pop_batch
+    start = time.perf_counter()
+    for _ in range(messages):
+        push(item)
+    received = 0
+    while received < messages:
+        received += len(pop_batch(batch))
+    return time.perf_counter() - start
+
+
+def two_threads(channel, messages, batch):
+    item = (b'GET_LED,1,on', 0)
+
+    def produce():
+        push = channel.push
+        sent = 0
+        while sent < messages:
+            if push(item):
+                sent += 1
+            else:
+                time.sleep(0)  # Ring full: let the consumer run
+
+    producer = threading.Thread(target=produce)
+    received = 0
+    start = time.perf_counter()
+    producer.start()
+    wait_batch = getattr(channel, 'wait_batch', None)
+    pop_batch = channel.pop_batch
+    while received < messages:
+        got = wait_batch(batch) if wait_batch else pop_batch(batch)
+        if got:
+            received += len(got)
+        else:
+            time.sleep(0)  # Nothing yet: yield to the producer
+    elapsed = time.perf_counter() - start
+    producer.join()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark receive-thread to worker hand-off')
+    parser.add_argument('--messages', type=int, default=200000, help='Messages per run (default: 200000)')
+    parser.add_argument('--batch', type=int, default=64, help='Consumer batch size (default: 64)')
+    parser.add_argument('--rounds', type=int, default=3, help='Runs per case; the best is reported (default: 3)')
+    args = parser.parse_args()
+
+    print(f"messages={args.messages} batch={args.batch} rounds={args.rounds}")
+    for label, run in (("same thread", same_thread), ("two threads", two_threads)):
+        print(label)
+        baseline = None
+        for name in ('queue.Queue', 'deque', 'spsc'):
+            # Same-thread runs hold every message at once; threaded runs use the default ring
+            capacity = args.messages if run is same_thread else None
+            elapsed = min(run(make(name, capacity), args.messages, args.batch) for _ in range(args.rounds))
+            rate = args.messages / elapsed
+            baseline = baseline or rate
+            print(f"  {name:<12} {elapsed * 1e9 / args.messages:>7.0f} ns/msg  {rate:>12,.0f} msg/s  "
+                  f"{rate / baseline:>5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
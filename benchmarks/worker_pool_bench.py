@@ -0,0 +1,121 @@
+"""
+Device worker runtime benchmark: thread-per-device vs WorkerPool.
+
+Runs the same number of device workers two ways:
+- threads: one threading.Thread per device blocking on
+  queue.Queue.get(timeout=0.2), as CapstanDriveWorker used to
+- pool:    WorkerTasks on a WorkerPool (core/worker_pool.py), woken only
+  when their Mailbox receives a message
+
+For each it reports the CPU time burned while every device is idle, and
+the wall time to deliver a burst of messages spread over all devices.
+
+Usage:
+    python benchmarks/worker_pool_bench.py [--devices 200] [--messages 100000] [--idle 2.0]
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.worker_pool import Mailbox, WorkerPool
+
+
+class Counter:
+    """Counts handled messages and signals when the expected total arrives."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.count = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def handle(self, message):
+        with self.lock:
+            self.count += 1
+            if self.count == self.expected:
+                self.done.set()
+
+
+class ThreadWorkers:
+    """The previous runtime: a polling thread per device."""
+
+    def __init__(self, devices, handler):
+        self.mailboxes = [queue.Queue() for _ in range(devices)]
+        self.running = threading.Event()
+        self.running.set()
+        self.threads = [threading.Thread(target=self._run, args=(mailbox, handler), daemon=True)
+                        for mailbox in self.mailboxes]
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self, mailbox, handler):
+        while self.running.is_set():
+            try:
+                handler(mailbox.get(timeout=0.2))
+            except queue.Empty:
+                continue
+
+    def stop(self):
+        self.running.clear()
+        for thread in self.threads:
+            thread.join()
+
+
+class PoolWorkers:
+    """WorkerTasks multiplexed on a WorkerPool."""
+
+    def __init__(self, devices, handler, threads):
+        self.pool = WorkerPool(threads=threads)
+        self.mailboxes = [Mailbox() for _ in range(devices)]
+        self.tasks = [self.pool.spawn(mailbox, handler) for mailbox in self.mailboxes]
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.pool.shutdown()
+
+
+def measure(name, make_workers, devices, messages, idle):
+    counter = Counter(messages)
+    workers = make_workers(counter.handle)
+    time.sleep(0.3)  # Let every thread reach its idle wait
+
+    cpu_start = time.process_time()
+    time.sleep(idle)
+    idle_cpu_ms = (time.process_time() - cpu_start) * 1000
+
+    start = time.perf_counter()
+    mailboxes = workers.mailboxes
+    for i in range(messages):
+        mailboxes[i % devices].put(i)
+    if not counter.done.wait(60):
+        raise SystemExit(f"{name}: only {counter.count}/{messages} messages handled")
+    elapsed = time.perf_counter() - start
+    workers.stop()
+    print(f"{name:<8} idle CPU {idle_cpu_ms:>7.1f} ms/{idle:.1f}s   burst {elapsed * 1000:>8.1f} ms  "
+          f"{messages / elapsed:>10,.0f} msg/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark device worker runtimes')
+    parser.add_argument('--devices', type=int, default=200, help='Device workers (default: 200)')
+    parser.add_argument('--messages', type=int, default=100000, help='Messages in the burst (default: 100000)')
+    parser.add_argument('--idle', type=float, default=2.0, help='Idle window in seconds (default: 2.0)')
+    parser.add_argument('--threads', type=int, default=4, help='Pool threads (default: 4)')
+    args = parser.parse_args()
+
+    print(f"devices={args.devices} messages={args.messages} pool threads={args.threads}")
+    measure("threads", lambda handler: ThreadWorkers(args.devices, handler),
+            args.devices, args.messages, args.idle)
+    measure("pool", lambda handler: PoolWorkers(args.devices, handler, args.threads),
+            args.devices, args.messages, args.idle)
+
+
+if __name__ == '__main__':
+    main()
@@ -28,6 +28,9 @@ SEND_BUTTON_WIDTH = 80
 SEND_BUTTON_HEIGHT = 40
 # Reply box height calculated dynamically: INTERACTIVE_FRAME_HEIGHT - REQUEST_BOX_HEIGHT - SEND_BUTTON_HEIGHT - margins
 
+# Log Panel Settings (Bottom Frame)
+LOG_MAX_LINES = 10000  # Oldest lines are evicted once the log holds this many
+
 # Spacing Settings
 VERTICAL_SPACING = 2  # Spacing between rows
 HORIZONTAL_SPACING = 4  # Spacing within rows
@@ -35,7 +38,78 @@ HORIZONTAL_SPACING = 4  # Spacing within rows
 # ============================================================================
 # APPLICATION VERSION
 # ============================================================================
-VERSION = "2.01"
+VERSION = "2.02"
+
+# ============================================================================
+# UDP NETWORKING
+# ============================================================================
+
+# Receive backend for the shared UDP transport (core/transport.py)
+# Options: 'selector' (blocking selector thread), 'asyncio' (DatagramProtocol event loop)
+UDP_TRANSPORT_BACKEND = 'selector'
+
+# Batched receive (selector backend): datagrams drained per syscall and slot size in bytes
+# Linux uses recvmmsg(); other platforms fall back to recvfrom_into() per slot
+UDP_RECV_BATCH_SIZE = 64
+UDP_RECV_BUFFER_SIZE = 4096
+UDP_RECV_SOCKET_BUFFER = 4 * 1024 * 1024  # Kernel receive buffer (SO_RCVBUF) for bursts
+
+# Kernel receive timestamps (SO_TIMESTAMPNS, Linux): PONG and reply RTTs are measured
+# from the moment the datagram reached the socket, not when Python got to it
+UDP_KERNEL_TIMESTAMPS = True
+
+# Received log lines are coalesced in the network thread and delivered to the GUI
+# as one batch per device every N milliseconds (one frame at 30-60 Hz)
+UDP_SIGNAL_BATCH_INTERVAL_MS = 30
+
+# Sequenced devices ("sequence_numbers": true in servers.json): seconds to wait for the
+# reply tagged with a request's sequence number before reporting it as timed out
+UDP_REQUEST_TIMEOUT_S = 2.0
+
+# Binary wire encoding (core/wire_codec.py): devices flagged "binary_encoding": true in
+# servers.json are offered compact frames compiled from the command dictionary (ENC:BIN1);
+# dictionary commands are sent as frames once the device accepts, everything else as text
+WIRE_BINARY_ENCODING_ENABLED = True
+
+# Command dictionary registry (core/dictionary_registry.py): <type>_commandDictionary.json
+# is searched for in these directories (relative to the project root), then in the
+# device's folder core/workers/<type>/. The parsed, validated form is cached on disk
+# keyed by file mtime and SHA-256, so unchanged dictionaries skip JSON parsing at startup.
+COMMAND_DICTIONARY_DIRS = ['../../shared_dictionaries/command_dictionaries']
+DICTIONARY_CACHE_ENABLED = True
+DICTIONARY_CACHE_DIR = 'data/dictionary_cache'
+
+# Hot reload: the GUI polls loaded dictionaries every DICTIONARY_RELOAD_POLL_S seconds
+# (one stat() each) and applies edits per command to the command menu and validators,
+# without a restart. A dictionary that fails to validate is ignored until it is fixed.
+DICTIONARY_HOT_RELOAD_ENABLED = True
+DICTIONARY_RELOAD_POLL_S = 1.0
+
+# Device worker pool (core/worker_pool.py): device workers are cooperative tasks on a
+# shared pool instead of one thread each. Pool threads sleep until a mailbox receives
+# a message; a task handles up to WORKER_POOL_BATCH messages before yielding its thread.
+WORKER_POOL_THREADS = 4  # 0 = one per CPU core
+WORKER_POOL_BATCH = 32
+
+# Device worker mailboxes (core/mailbox.py): strict-priority lanes, emergency first.
+# Each lane is bounded; "drop_oldest" discards the stalest message when full (a stuck
+# device keeps a bounded backlog), "block" makes put() wait for room. Commands listed
+# in MAILBOX_EMERGENCY_COMMANDS go to the emergency lane; GET_* to telemetry.
+MAILBOX_LANE_CAPACITY = {'emergency': 64, 'control': 256, 'telemetry': 1024, 'health': 64}
+MAILBOX_LANE_POLICY = {'emergency': 'block', 'control': 'block', 'telemetry': 'drop_oldest', 'health': 'drop_oldest'}
+MAILBOX_EMERGENCY_COMMANDS = ['ESTOP', 'STOP', 'ABORT', 'HALT']
+
+# Datagram hot path (core/spsc_channel.py): a device worker attached to a DeviceChannel
+# receives its raw datagrams through a lock-free single-producer/single-consumer ring of
+# this many slots (rounded up to a power of two); datagrams arriving while it is full are
+# dropped and counted rather than blocking the receive thread.
+SPSC_CHANNEL_CAPACITY = 4096
+
+# CommandPipeline (core/pipeline.py): commands kept in flight per sequenced device, and
+# the factor each retransmission's timeout grows by (TIMEOUT_SECONDS, x2, x4, ...).
+# Base timeout and retry count come from the device config (TIMEOUT_SECONDS, RETRY_COUNT).
+PIPELINE_WINDOW_SIZE = 8
+PIPELINE_BACKOFF_FACTOR = 2.0
 
 # ============================================================================
 # HEALTH MONITORING (FrameStatus) - v2.01
@@ -45,14 +119,35 @@ VERSION = "2.01"
 # Set to False during initial development/debugging
 HEALTH_CHECK_ENABLED = False  # Disabled
 
-# Target interval for complete round-robin cycle (seconds)
-# Each registered worker checked once per cycle
+# Base ping interval per device and reporting period for cycle/fleet summaries (seconds)
+# Without adaptive probing each registered worker is checked once per cycle
 HEALTH_CHECK_ROUND_ROBIN_INTERVAL = 10.0
 
+# Adaptive probing: each device's ping interval follows its health
+# HEALTHY with a clean window backs off by BACKOFF_FACTOR per check up to MAX;
+# WARNING, CRITICAL or any failure in the window is probed every MIN_INTERVAL;
+# FATAL and UNKNOWN devices use HEALTH_CHECK_ROUND_ROBIN_INTERVAL
+HEALTH_ADAPTIVE_INTERVAL_ENABLED = True
+HEALTH_ADAPTIVE_MIN_INTERVAL = 2.0      # Seconds between pings for suspicious devices
+HEALTH_ADAPTIVE_MAX_INTERVAL = 30.0     # Longest interval for a stable device
+HEALTH_ADAPTIVE_BACKOFF_FACTOR = 1.5
+
+# Passive liveness: skip a HEALTHY/WARNING device's scheduled ping when it has
+# answered a command (or sent any other traffic) within its probe interval
+HEALTH_PASSIVE_LIVENESS_ENABLED = True
+
+# Global budget for scheduled pings across the whole fleet (pings per second)
+# Pings beyond the budget are deferred; manual checks are not limited
+HEALTH_CHECK_MAX_PINGS_PER_SECOND = 20.0
+
 # Timeout waiting for PONG response from individual device (seconds)
 # No response within this time = failure
 HEALTH_CHECK_PONG_TIMEOUT = 1.0
 
+# Resolution of the timing wheel that expires PONG timeouts (milliseconds)
+# Timeouts round up to this; the driver wakes only at the earliest pending one
+HEALTH_CHECK_TIMEOUT_TICK_MS = 50
+
 # Sliding window configuration for failure tracking
 HEALTH_CHECK_WINDOW_SIZE = 10           # M: Total checks tracked in sliding window
 HEALTH_CHECK_FATAL_THRESHOLD = 3        # N: Failures out of M checks = FATAL
@@ -66,6 +161,33 @@ HEALTH_CHECK_SLOW_RESPONSE_MS = 1000    # Response time > 1000ms = "slow"
 HEALTH_CHECK_TRANSIT_WINDOW = 18        # 3 minutes at 10s cycle = 18 checks
 HEALTH_CHECK_TRANSIT_STDDEV_THRESHOLD = 2.0  # Warning if > 2 std deviations from mean
 
+# Fleet-wide vectorized evaluation (core/fleet_health.py, requires numpy)
+# Once per round-robin cycle every device is re-evaluated in one NumPy pass and
+# HealthMonitor emits fleet_health_updated with level counts and RTT percentiles
+HEALTH_FLEET_STORE_ENABLED = True
+HEALTH_FLEET_INITIAL_CAPACITY = 64      # Rows preallocated; doubles when exceeded
+
+# Persistent RTT history (core/rtt_history.py): one memory-mapped file per device
+# with raw samples plus 1-minute and 1-hour min/avg/max/p99 rollups
+HEALTH_HISTORY_ENABLED = True
+HEALTH_HISTORY_DIR = 'data/health_history'
+
+# Latency quantile sketch (core/latency_sketch.py): fixed-memory log buckets per
+# device, merged for the fleet; p50/p90/p99/p999 within this relative error
+LATENCY_SKETCH_RELATIVE_ACCURACY = 0.01  # 1% relative error
+LATENCY_SKETCH_MIN_MS = 0.01  # Samples below this land in the lowest bucket
+LATENCY_SKETCH_MAX_MS = 60000.0  # Samples above this land in the highest bucket
+
+# Clock sync (core/time_sync.py): NTP-style SYNC exchanges estimate each device's
+# clock offset and drift; a correction is sent only above the threshold.
+# Replaces the hourly one-way ZULU broadcast when enabled.
+CLOCK_SYNC_ENABLED = True
+CLOCK_SYNC_INTERVAL_S = 64.0            # Seconds between exchanges once estimated
+CLOCK_SYNC_BURST_INTERVAL_S = 2.0       # Seconds between exchanges until MIN_SAMPLES
+CLOCK_SYNC_FILTER_SIZE = 8              # Exchanges kept per device (min-delay filter)
+CLOCK_SYNC_MIN_SAMPLES = 4              # Exchanges needed before correcting
+CLOCK_SYNC_CORRECTION_THRESHOLD_MS = 2.0
+
 # Health check priority (lowest priority - never blocks normal operations)
 HEALTH_CHECK_PRIORITY = -1
 
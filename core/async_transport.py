@@ -0,0 +1,135 @@
+"""
+Asyncio UDP Transport v2.02
+
+Event-driven alternative to the selector loop in core/transport.py.
+
+Architecture:
+- AsyncUDPTransport: Same channel registry, routing and DeviceChannel
+  contract (messages_received / pong_received) as UDPTransport, but the
+  shared socket is served by loop.create_datagram_endpoint(). Datagrams are
+  delivered by the event loop the moment they arrive; nothing polls.
+- Runs its own event loop in the transport thread by default, or attaches
+  to an existing loop (for example a qasync QEventLoop driving the Qt GUI)
+  when one is passed in, in which case no extra thread is started.
+
+Select it with config.UDP_TRANSPORT_BACKEND = "asyncio".
+"""
+
+import asyncio
+import time
+from core.transport import UDPTransport
+
+
+class _TransportProtocol(asyncio.DatagramProtocol):
+    """Forwards datagrams from the event loop into the transport's routing index."""
+
+    def __init__(self, udp_transport):
+        self.udp_transport = udp_transport
+
+    def datagram_received(self, data, addr):
+        # No ancillary data here: stamp on delivery from the event loop
+        self.udp_transport.route_datagram(data, addr, time.monotonic_ns())
+
+    def error_received(self, exc):
+        # Windows reports ICMP port-unreachable from an earlier send here
+        if isinstance(exc, ConnectionResetError):
+            return
+        self.udp_transport.transport_message.emit(f"UDP Receive Error: {exc}")
+
+
+class AsyncUDPTransport(UDPTransport):
+    """
+    UDPTransport served by an asyncio DatagramProtocol.
+
+    Usage:
+        transport = AsyncUDPTransport()            # own event-loop thread
+        transport = AsyncUDPTransport(loop=qloop)  # share a qasync loop
+        channel = transport.register_device("capstanDrive", "192.168.1.157", 2222)
+        transport.start()
+    """
+
+    def __init__(self, bind_host="0.0.0.0", bind_port=0, loop=None, parent=None):
+        super().__init__(bind_host, bind_port, parent)
+        self._external_loop = loop
+        # Created up front so stop() can always reach the loop, even before run() starts
+        self.loop = loop or asyncio.new_event_loop()
+        self._endpoint = None
+        self._expiry_handle = None
+
+    def start(self):
+        """Open the datagram endpoint on the shared loop, or start the loop thread."""
+        if self._external_loop is None:
+            super().start()
+            return
+        self.running = True
+        asyncio.ensure_future(self._open_endpoint(), loop=self._external_loop)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._open_endpoint())
+            if self.running:
+                self.loop.run_forever()
+        except Exception as e:
+            self.transport_message.emit(f"UDP Error: {e}")
+        finally:
+            self.flush_lines()
+            self._close_endpoint()
+            # Let connection_lost callbacks run before closing the loop
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.close()
+
+    async def _open_endpoint(self):
+        loop = asyncio.get_running_loop()
+        self._endpoint, _ = await loop.create_datagram_endpoint(
+            lambda: _TransportProtocol(self), sock=self.sock
+        )
+        self.transport_message.emit(
+            f"[UDP] Listening for responses from {len(self.channels_by_name)} device(s) "
+            f"on local port {self.local_port} (asyncio)."
+        )
+
+    def _schedule_flush(self, deadline):
+        """Flush the coalesced log lines from the event loop once the batch interval elapses."""
+        self.loop.call_later(self.batch_interval, self.flush_lines)
+
+    def _deadline_added(self, deadline):
+        """Re-arm the request-expiry timer on the event loop (callable from any thread)."""
+        try:
+            self.loop.call_soon_threadsafe(self._arm_expiry)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    def _arm_expiry(self):
+        if self._expiry_handle is not None:
+            self._expiry_handle.cancel()
+            self._expiry_handle = None
+        deadline = self.inflight.next_deadline()
+        if deadline is not None:
+            delay = max(0.0, deadline - time.monotonic())
+            self._expiry_handle = self.loop.call_later(delay, self._on_expiry_timer)
+
+    def _on_expiry_timer(self):
+        self._expiry_handle = None
+        self.expire_requests()
+        self._arm_expiry()
+
+    def _close_endpoint(self):
+        if self._endpoint is not None:
+            self._endpoint.close()
+            self._endpoint = None
+
+    def stop(self):
+        """Stop the event loop (or detach from the shared one) and release the socket."""
+        self.running = False
+        if self._external_loop is not None:
+            self._close_endpoint()
+        elif not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+            except RuntimeError:
+                pass  # Loop already finished
+        self.wait()
+        self.sock.close()
+        self._wake_r.close()
+        self._wake_w.close()
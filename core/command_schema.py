@@ -0,0 +1,304 @@
+"""
+Command Schema v2.02
+
+Command dictionaries compiled once into validators for CSV command streams.
+
+Architecture:
+- ParamSpec: One dictionary parameter with everything resolved at compile
+  time into a single check(raw) function: the converter for its type, enum
+  options as a frozenset (plus the 1-based index form that parameter 1
+  enums use on the wire), BOOLEAN_CONFIG strings as frozensets, and the
+  range bounds (no range check at all when the parameter has none).
+- CommandSpec: One command's parameters grouped into positional slots.
+  Parameters that share a param_number under different conditions are
+  alternatives. Their conditions ("mode == blink") are pre-parsed into
+  (name, frozenset of values) pairs. The first alternative that has no
+  condition, or whose conditions include one that holds for the values
+  parsed so far, is used. This is the same rule the Message Creator panel
+  uses. The slots are then generated into one straight-line validate()
+  function per command: no loop over slots, and the conversion, enum
+  lookup and range check are inlined, so no Python-level call is made per
+  value.
+- CommandSchema: {name: CommandSpec} for a whole dictionary, with parse()
+  for complete "COMMAND,v1,v2,..." strings. update() recompiles individual
+  commands when the registry hot-reloads a dictionary.
+
+This is the only place dictionary parameters are parsed: the binary wire
+codec (core/wire_codec.py) packs values using the same ParamSpecs (enum
+options, BOOLEAN_CONFIG sets, conditions, param_number slots). CommandSpec
+also compiles the command's "returns" fields for reply frames.
+
+Validating a value is then one int()/float() call or set lookup and at
+most two comparisons. Nothing is split, rebuilt or looked up in the
+dictionary per message. benchmarks/schema_bench.py compares this with
+interpreting the dictionary on every call.
+"""
+
+_DEFAULT_TRUE = ('true', 'on', '1')
+_DEFAULT_FALSE = ('false', 'off', '0')
+
+
+class CommandValidationError(ValueError):
+    """A command or one of its values does not match the dictionary."""
+
+
+def _enum_converter(options, index_form):
+    values = frozenset(options)
+    by_index = {str(i): value for i, value in enumerate(options, 1)} if index_form else {}
+
+    def convert(raw):
+        if raw in values:
+            return raw
+        value = by_index.get(raw)
+        if value is None:
+            raise CommandValidationError(f"Invalid enum value: {raw}")
+        return value
+    return convert
+
+
+def _boolean_converter(true_strings, false_strings):
+    def convert(raw):
+        lowered = raw.lower()
+        if lowered in true_strings:
+            return True
+        if lowered in false_strings:
+            return False
+        raise CommandValidationError(f"Invalid boolean value: {raw}")
+    return convert
+
+
+def _parse_conditions(conditions):
+    """["mode == cw", "mode == ccw"] -> (("mode", frozenset({"cw", "ccw"})),); any match selects."""
+    if isinstance(conditions, str):
+        conditions = [conditions]
+    allowed = {}
+    for cond in conditions or ():
+        name, sep, value = cond.partition('==')
+        if not sep:
+            raise CommandValidationError(f"Unsupported condition: {cond!r}")
+        allowed.setdefault(name.strip(), set()).add(value.strip())
+    return tuple((name, frozenset(values)) for name, values in allowed.items())
+
+
+def _range_checker(convert, minimum, maximum):
+    """Wrap convert with the range check (or return it unchanged when unbounded)."""
+    if minimum is None and maximum is None:
+        return convert
+
+    def check(raw):
+        value = convert(raw)
+        if minimum is not None and value < minimum:
+            raise CommandValidationError(f"Value {value} below min {minimum}")
+        if maximum is not None and value > maximum:
+            raise CommandValidationError(f"Value {value} above max {maximum}")
+        return value
+    return check
+
+
+class ParamSpec:
+    """
+    One compiled parameter: bound check(raw) -> value, and its selection conditions.
+
+    Return fields ("returns", numbered by "parameter_number") compile with
+    returns=True: they have no conditions and no enum index form.
+    """
+
+    __slots__ = ('name', 'kind', 'number', 'conditions', 'options', 'index_form',
+                 'true_strings', 'false_strings', 'minimum', 'maximum', 'check')
+
+    def __init__(self, pdef, boolean_config, returns=False):
+        self.name = pdef.get('name', '') if returns else pdef['name']
+        self.kind = pdef.get('type', 'string')
+        self.number = pdef.get('parameter_number' if returns else 'param_number', 1)
+        self.conditions = () if returns else _parse_conditions(pdef.get('condition'))
+        self.options = tuple(o['value'] if isinstance(o, dict) else str(o) for o in pdef.get('options') or [])
+        # Parameter 1 enums are sent as 1-based option indices ("1" = first option)
+        self.index_form = self.kind == 'enum' and not returns and self.number == 1
+        self.true_strings = self.false_strings = frozenset()
+        if self.kind == 'integer':
+            convert = int
+        elif self.kind == 'float':
+            convert = float
+        elif self.kind == 'boolean':
+            self.true_strings = frozenset(s.lower() for s in boolean_config.get('true_strings', _DEFAULT_TRUE))
+            self.false_strings = frozenset(s.lower() for s in boolean_config.get('false_strings', _DEFAULT_FALSE))
+            convert = _boolean_converter(self.true_strings, self.false_strings)
+        elif self.kind == 'enum':
+            convert = _enum_converter(self.options, self.index_form)
+        else:
+            convert = str
+        value_range = pdef.get('range') or {}
+        numeric = self.kind in ('integer', 'float')
+        self.minimum = value_range.get('min') if numeric else None
+        self.maximum = value_range.get('max') if numeric else None
+        self.check = _range_checker(convert, self.minimum, self.maximum)
+
+
+def group_slots(specs):
+    """ParamSpecs grouped by position: slot i holds the alternatives numbered i + 1."""
+    by_number = {}
+    for spec in specs:
+        by_number.setdefault(spec.number, []).append(spec)
+    count = max(by_number) if by_number else 0
+    return tuple(tuple(by_number.get(number, ())) for number in range(1, count + 1))
+
+
+def _value_source(spec, ref):
+    """
+    Source lines setting `value` from `raw` for one ParamSpec (the inlined check()).
+
+    Constants are bound into the generated function's globals via ref(obj).
+    """
+    kind = spec.kind
+    if kind in ('integer', 'float'):
+        lines = [f"value = {'int' if kind == 'integer' else 'float'}(raw)"]
+    elif kind == 'boolean':
+        lines = ["lowered = raw.lower()",
+                 f"if lowered in {ref(spec.true_strings)}:",
+                 "    value = True",
+                 f"elif lowered in {ref(spec.false_strings)}:",
+                 "    value = False",
+                 "else:",
+                 "    raise CommandValidationError(f'Invalid boolean value: {raw}')"]
+    elif kind == 'enum':
+        by_index = {str(i): value for i, value in enumerate(spec.options, 1)} if spec.index_form else {}
+        lines = [f"if raw in {ref(frozenset(spec.options))}:",
+                 "    value = raw",
+                 "else:",
+                 f"    value = {ref(by_index)}.get(raw)",
+                 "    if value is None:",
+                 "        raise CommandValidationError(f'Invalid enum value: {raw}')"]
+    else:
+        lines = ["value = raw"]
+    if spec.minimum is not None:
+        lines += [f"if value < {ref(spec.minimum)}:",
+                  f"    raise CommandValidationError(f'Value {{value}} below min {{{ref(spec.minimum)}}}')"]
+    if spec.maximum is not None:
+        lines += [f"if value > {ref(spec.maximum)}:",
+                  f"    raise CommandValidationError(f'Value {{value}} above max {{{ref(spec.maximum)}}}')"]
+    return lines
+
+
+def _compile_validator(command, slots):
+    """
+    Generate validate(values) for one command's slots as straight-line code.
+
+    Equivalent to walking the slots: slot i reads values[i], its first
+    applicable alternative wins, and validation stops at the first missing
+    value.
+    """
+    namespace = {'CommandValidationError': CommandValidationError}
+
+    def ref(obj):
+        key = f"_k{len(namespace)}"
+        namespace[key] = obj
+        return key
+
+    body = []
+    for index, slot in enumerate(slots):
+        body.append(f"if n <= {index}: return params")
+        body.append(f"raw = values[{index}]")
+        branch = "if"
+        for spec in slot:
+            if spec.conditions:
+                test = " or ".join(f"params.get({key!r}) in {ref(allowed)}" for key, allowed in spec.conditions)
+                body.append(f"{branch} {test}:")
+                branch = "elif"
+            elif branch == "if":
+                body.append("if True:")
+            else:
+                body.append("else:")
+            body.append(f"    name = {spec.name!r}")
+            body += ["    " + line for line in _value_source(spec, ref)]
+            body.append(f"    params[{spec.name!r}] = value")
+            if not spec.conditions:
+                break  # Later alternatives can never be reached
+    source = "\n".join(
+        ["def validate(values):",
+         "    params = {}",
+         "    name = None",
+         "    n = len(values)",
+         "    try:"]
+        + ["        " + line for line in body]
+        + ["        pass",
+           "    except CommandValidationError:",
+           "        raise",
+           "    except (TypeError, ValueError) as e:",
+           "        raise CommandValidationError(f'Param {name} error: {e}') from None",
+           "    return params"])
+    exec(compile(source, f"<CommandSpec {command}>", "exec"), namespace)
+    return namespace['validate']
+
+
+class CommandSpec:
+    """
+    One compiled command: positional slots of conditional ParamSpec alternatives.
+
+    validate(values) -> {name: value} types the raw strings after the command
+    name. Positions with no applicable parameter, and missing trailing
+    values, are skipped. Raises CommandValidationError on the first bad value.
+    """
+
+    __slots__ = ('name', 'info', 'params', 'returns', 'slots', 'validate')
+
+    def __init__(self, name, info, boolean_config):
+        self.name = name
+        self.info = info
+        self.params = tuple(ParamSpec(pdef, boolean_config) for pdef in info.get('parameters', []))
+        self.returns = tuple(ParamSpec(rdef, boolean_config, returns=True) for rdef in info.get('returns') or [])
+        self.slots = group_slots(self.params)
+        self.validate = _compile_validator(name, self.slots)
+
+
+class CommandSchema:
+    """
+    Compiled validators for every command in a dictionary.
+
+    Usage:
+        schema = CommandSchema(command_dict["commands"], config_mod.BOOLEAN_CONFIG)
+        cmd, params = schema.parse("LED,1,blink,3,0.5")
+        # ("LED", {"led_number": "redLED", "mode": "blink", "blink_count": 3, "blink_period": 0.5})
+    """
+
+    def __init__(self, commands, boolean_config=None):
+        self.boolean_config = boolean_config or {}
+        self.commands = {name: CommandSpec(name, info, self.boolean_config)
+                         for name, info in (commands or {}).items()}
+
+    def __contains__(self, name):
+        return name in self.commands
+
+    def __len__(self):
+        return len(self.commands)
+
+    def update(self, commands, names, removed=()):
+        """
+        Recompile only `names` from `commands` and drop `removed` (hot reload).
+
+        Each entry is replaced with a single dict assignment, so threads
+        validating concurrently see either the old or the new CommandSpec.
+        """
+        for name in removed:
+            self.commands.pop(name, None)
+        for name in names:
+            self.commands[name] = CommandSpec(name, commands[name], self.boolean_config)
+
+    def get(self, name):
+        """CommandSpec for `name`, or None."""
+        return self.commands.get(name)
+
+    def validate(self, name, values):
+        """Typed parameters for command `name` from its raw string values."""
+        spec = self.commands.get(name)
+        if spec is None:
+            raise CommandValidationError(f"Unknown command: {name}")
+        return spec.validate(values)
+
+    def parse(self, csv_command):
+        """Split and validate "COMMAND,v1,v2,..." into (command, params)."""
+        parts = csv_command.split(",")
+        if ' ' in csv_command or '' in parts:
+            parts = [p.strip() for p in parts if p.strip()]
+        if not parts:
+            raise CommandValidationError("Empty command")
+        return parts[0], self.validate(parts[0], parts[1:])
@@ -0,0 +1,531 @@
+"""
+Dictionary Registry v2.02
+
+Process-wide, load-once store of device command dictionaries and configs.
+
+Architecture:
+- Lookup: <type>_commandDictionary.json is searched for in
+  config.COMMAND_DICTIONARY_DIRS (relative entries resolve from the project
+  root), then in the device's own folder core/workers/<type>/. The device
+  config is core/workers/<type>/<type>_config.py, executed once.
+- Disk cache: the parsed, validated dictionary is written to
+  config.DICTIONARY_CACHE_DIR with marshal, keyed by the source path, its
+  size and mtime_ns, and the SHA-256 of its bytes. If the stat matches, the
+  source is not read at all. If only the mtime changed (a touch or a
+  checkout), the hash still matches and the JSON is not re-parsed. Any
+  other change re-parses, re-validates and rewrites the cache entry.
+- Shared views: every consumer gets the same frozen dictionary. ReadOnlyDict
+  and ReadOnlyList are dict/list subclasses, so existing isinstance()
+  checks and json.dump keep working, but every mutator raises TypeError.
+  copy.deepcopy() or thaw() returns a private mutable copy.
+- DeviceDictionary: one device type's frozen dictionary, config module and
+  lazily compiled CommandSchema / WireCodec. These are built on first use,
+  so registering dozens of device types costs nothing for the ones a
+  session never talks to.
+- Hot reload: start_watching() polls the loaded dictionaries' stat on a
+  daemon thread (DICTIONARY_RELOAD_POLL_S). A changed file is re-read and
+  diffed per command against the loaded version. Unchanged commands keep
+  their frozen objects, and the compiled CommandSchema recompiles only the
+  added and changed entries. Listeners then receive
+  ('dictionary_reloaded', device_type, entry, diff) from the watcher
+  thread. A file that fails to parse or validate is reported once and the
+  previous version stays in service.
+
+Usage:
+    entry = get_registry().get("capstanDrive")
+    entry.dictionary["commands"]["LED"]     # read-only, shared
+    entry.schema.parse("LED,1,blink,3,0.5")
+
+    registry.add_listener(lambda event, *args: print(event, args))
+    registry.start_watching()
+"""
+
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import sys
+import threading
+
+import config
+from core.command_schema import CommandSchema, CommandSpec, CommandValidationError
+from core.wire_codec import WireCodec, WireCodecError
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKERS_DIR = os.path.join(PROJECT_ROOT, 'core', 'workers')
+CACHE_FORMAT = 1
+PARAMETER_TYPES = ('enum', 'boolean', 'integer', 'float', 'string')
+
+
+class DictionaryError(Exception):
+    """A command dictionary could not be found, read or validated."""
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is a shared read-only view; use thaw() for a mutable copy")
+
+
+class ReadOnlyDict(dict):
+    """dict that refuses modification (shared dictionary view)."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (ReadOnlyDict, (dict(self),))
+
+
+class ReadOnlyList(list):
+    """list that refuses modification (shared dictionary view)."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (ReadOnlyList, (list(self),))
+
+
+def freeze(value):
+    """Recursively convert parsed JSON into ReadOnlyDict / ReadOnlyList views."""
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Plain, mutable deep copy of a (possibly frozen) dictionary value."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+def validate_dictionary(data, previous=None):
+    """
+    Check a parsed command dictionary.
+
+    Commands identical to their entry in `previous` (the loaded version's
+    "commands", on a reload) were already checked and are skipped.
+
+    Returns:
+        List of warning strings (problems the tools tolerate)
+
+    Raises:
+        DictionaryError: if the structure cannot be used at all
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('commands'), dict):
+        raise DictionaryError('expected an object with a "commands" object')
+    warnings = []
+    previous = previous or {}
+    for name, info in data['commands'].items():
+        if previous.get(name) == info:
+            continue
+        if not isinstance(info, dict):
+            raise DictionaryError(f"command {name}: expected an object")
+        params = info.get('parameters', [])
+        if not isinstance(params, list):
+            raise DictionaryError(f"command {name}: \"parameters\" must be a list")
+        for pdef in params:
+            if not isinstance(pdef, dict) or not isinstance(pdef.get('name'), str):
+                raise DictionaryError(f"command {name}: every parameter needs a \"name\"")
+            number = pdef.get('param_number', 1)
+            if not isinstance(number, int) or number < 1:
+                raise DictionaryError(f"{name}.{pdef['name']}: param_number must be a positive integer")
+            kind = pdef.get('type')
+            if kind not in PARAMETER_TYPES:
+                warnings.append(f"{name}.{pdef['name']}: unknown type {kind!r} (treated as string)")
+            elif kind == 'enum' and not pdef.get('options'):
+                warnings.append(f"{name}.{pdef['name']}: enum without options")
+        try:
+            CommandSpec(name, info, {})
+        except CommandValidationError as e:
+            raise DictionaryError(f"command {name}: {e}") from None
+    return warnings
+
+
+class DictionaryDiff:
+    """Per-command difference between two versions of a dictionary."""
+
+    __slots__ = ('added', 'removed', 'changed', 'metadata_changed')
+
+    def __init__(self, added=(), removed=(), changed=(), metadata_changed=False):
+        self.added = tuple(added)
+        self.removed = tuple(removed)
+        self.changed = tuple(changed)
+        self.metadata_changed = metadata_changed  # Anything outside "commands"
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.metadata_changed)
+
+    def __repr__(self):
+        return (f"DictionaryDiff(added={list(self.added)}, removed={list(self.removed)}, "
+                f"changed={list(self.changed)}, metadata_changed={self.metadata_changed})")
+
+
+def diff_dictionaries(old, new):
+    """DictionaryDiff between two parsed (frozen or plain) dictionaries."""
+    old_commands = old.get('commands', {})
+    new_commands = new.get('commands', {})
+    added = [name for name in new_commands if name not in old_commands]
+    removed = [name for name in old_commands if name not in new_commands]
+    changed = [name for name, info in new_commands.items()
+               if name in old_commands and old_commands[name] != info]
+    metadata_changed = ({k: v for k, v in old.items() if k != 'commands'}
+                        != {k: v for k, v in new.items() if k != 'commands'})
+    return DictionaryDiff(added, removed, changed, metadata_changed)
+
+
+def _refreeze(old, new):
+    """freeze(new), reusing old's frozen command entries that did not change."""
+    old_commands = old.get('commands', {})
+    frozen = {}
+    for key, value in new.items():
+        if key == 'commands' and isinstance(value, dict):
+            frozen[key] = ReadOnlyDict(
+                (name, old_commands[name] if old_commands.get(name) == info else freeze(info))
+                for name, info in value.items())
+        else:
+            frozen[key] = freeze(value)
+    return ReadOnlyDict(frozen)
+
+
+class DeviceDictionary:
+    """One device type's shared dictionary, config and compiled forms."""
+
+    def __init__(self, device_type, path, dictionary, config_module, sha256, mtime_ns, size=None):
+        self.device_type = device_type
+        self.path = path
+        self.dictionary = dictionary  # ReadOnlyDict of the whole file
+        self.config = config_module  # <type>_config module, or None
+        self.sha256 = sha256
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.version = 1  # Bumped by every reload that changed the file
+        self._schema = None
+        self._codec = None
+        self._lock = threading.Lock()
+
+    @property
+    def commands(self):
+        """Read-only {command name: definition} mapping."""
+        return self.dictionary.get('commands', ReadOnlyDict())
+
+    @property
+    def boolean_config(self):
+        return getattr(self.config, 'BOOLEAN_CONFIG', None)
+
+    @property
+    def schema(self):
+        """CommandSchema compiled on first use (core/command_schema.py)."""
+        with self._lock:
+            return self._compiled_schema()
+
+    def _compiled_schema(self):
+        if self._schema is None:
+            self._schema = CommandSchema(self.commands, self.boolean_config)
+        return self._schema
+
+    @property
+    def codec(self):
+        """WireCodec compiled on first use (core/wire_codec.py); raises WireCodecError if the layout does not fit."""
+        with self._lock:
+            if self._codec is None:
+                # Built from the same CommandSpecs, so parameters are parsed only once
+                try:
+                    schema = self._compiled_schema()
+                except CommandValidationError as e:
+                    raise WireCodecError(str(e)) from None
+                self._codec = WireCodec(self.dictionary, self.boolean_config, schema=schema)
+            return self._codec
+
+    def _apply(self, dictionary, diff, sha256, mtime_ns, size):
+        """Swap in a reloaded dictionary, recompiling only the commands in diff."""
+        with self._lock:
+            self.dictionary = dictionary
+            self.sha256, self.mtime_ns, self.size = sha256, mtime_ns, size
+            self.version += 1
+            if self._schema is not None:
+                self._schema.update(self.commands, diff.added + diff.changed, diff.removed)
+            # Command ids are positions in "commands", so any command edit can move them
+            if diff.added or diff.removed or diff.changed:
+                self._codec = None
+
+
+class DictionaryRegistry:
+    """
+    Loads each device type's command dictionary and config once per process.
+
+    Most callers use the process-wide instance from get_registry().
+    """
+
+    def __init__(self, search_dirs=None, cache_dir=None):
+        dirs = config.COMMAND_DICTIONARY_DIRS if search_dirs is None else search_dirs
+        self.search_dirs = [d if os.path.isabs(d) else os.path.normpath(os.path.join(PROJECT_ROOT, d))
+                            for d in dirs]
+        if cache_dir is None and config.DICTIONARY_CACHE_ENABLED:
+            cache_dir = config.DICTIONARY_CACHE_DIR
+        if cache_dir and not os.path.isabs(cache_dir):
+            cache_dir = os.path.normpath(os.path.join(PROJECT_ROOT, cache_dir))
+        self.cache_dir = cache_dir
+        self.entries = {}  # {device_type: DeviceDictionary}
+        self.configs = {}  # {device_type: config module or None}
+        self.listeners = []  # Callables taking (event, *args)
+        self._lock = threading.RLock()
+        self._failed = {}  # {device_type: (size, mtime_ns) of a version that did not load}
+        self._watch_stop = None
+        self._watch_thread = None
+
+    def find_dictionary(self, device_type):
+        """Path of <type>_commandDictionary.json, or None."""
+        filename = f"{device_type}_commandDictionary.json"
+        for directory in self.search_dirs + [os.path.join(WORKERS_DIR, device_type)]:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def get(self, device_type):
+        """
+        Shared DeviceDictionary for a device type, loading it on first request.
+
+        Raises:
+            DictionaryError: if no dictionary is found or it cannot be loaded
+        """
+        with self._lock:
+            entry = self.entries.get(device_type)
+            if entry is None:
+                entry = self.entries[device_type] = self._load(device_type)
+            return entry
+
+    def dictionary(self, device_type):
+        """The shared read-only dictionary (whole file) for a device type."""
+        return self.get(device_type).dictionary
+
+    def config(self, device_type):
+        """The device type's <type>_config module (executed once), or None if it has none."""
+        with self._lock:
+            if device_type not in self.configs:
+                self.configs[device_type] = self._load_config(device_type)
+            return self.configs[device_type]
+
+    def loaded(self):
+        with self._lock:
+            return list(self.entries)
+
+    def add_listener(self, listener):
+        """Register a callable receiving (event, *args) for every registry event."""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _emit(self, event, *args):
+        for listener in list(self.listeners):
+            try:
+                listener(event, *args)
+            except Exception as e:
+                print(f"DictionaryRegistry WARNING: {event} listener failed: {e}")
+
+    def reload(self, device_type):
+        """
+        Re-read a loaded device type's dictionary if its file changed.
+
+        Returns:
+            DictionaryDiff (possibly empty) if the contents changed, None if not
+
+        Raises:
+            DictionaryError: if the new version cannot be read or validated;
+                the previous version stays loaded
+        """
+        with self._lock:
+            entry = self.entries.get(device_type)
+            if entry is None:
+                return None
+            data, sha256, stat = self._read(entry.path, entry.commands)
+            if sha256 == entry.sha256:
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                return None
+            diff = diff_dictionaries(entry.dictionary, data)
+            entry._apply(_refreeze(entry.dictionary, data), diff, sha256, stat.st_mtime_ns, stat.st_size)
+        self._emit('dictionary_reloaded', device_type, entry, diff)
+        return diff
+
+    def check_for_changes(self):
+        """
+        Reload every loaded dictionary whose file size or mtime changed.
+
+        Returns:
+            {device_type: DictionaryDiff} for the ones that were reloaded
+        """
+        reloaded = {}
+        with self._lock:
+            entries = list(self.entries.values())
+        for entry in entries:
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                continue  # Mid-save (or removed); keep serving the loaded version
+            key = (stat.st_size, stat.st_mtime_ns)
+            if key == (entry.size, entry.mtime_ns) or key == self._failed.get(entry.device_type):
+                continue
+            try:
+                diff = self.reload(entry.device_type)
+            except DictionaryError as e:
+                self._failed[entry.device_type] = key
+                print(f"DictionaryRegistry WARNING: keeping previous {entry.device_type} dictionary: {e}")
+                continue
+            self._failed.pop(entry.device_type, None)
+            if diff is not None:
+                print(f"DictionaryRegistry: reloaded {entry.device_type} dictionary "
+                      f"(+{len(diff.added)} -{len(diff.removed)} ~{len(diff.changed)})")
+                reloaded[entry.device_type] = diff
+        return reloaded
+
+    def start_watching(self, interval=None):
+        """Poll loaded dictionaries for changes on a daemon thread (idempotent)."""
+        interval = config.DICTIONARY_RELOAD_POLL_S if interval is None else interval
+        with self._lock:
+            if self._watch_thread is not None and self._watch_thread.is_alive():
+                return
+            self._watch_stop = threading.Event()
+            self._watch_thread = threading.Thread(target=self._watch, args=(self._watch_stop, interval),
+                                                  name="DictionaryWatcher", daemon=True)
+            self._watch_thread.start()
+
+    def stop_watching(self):
+        with self._lock:
+            thread, stop = self._watch_thread, self._watch_stop
+            self._watch_thread = self._watch_stop = None
+        if thread is not None:
+            stop.set()
+            thread.join(timeout=2.0)
+
+    def _watch(self, stop, interval):
+        # One stat() per loaded dictionary per interval; nothing is read unless it changed
+        while not stop.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                print(f"DictionaryRegistry WARNING: watcher error: {e}")
+
+    def _load(self, device_type):
+        path = self.find_dictionary(device_type)
+        if path is None:
+            raise DictionaryError(f"No command dictionary for {device_type} "
+                                  f"(searched {', '.join(self.search_dirs)} and core/workers/{device_type})")
+        data, sha256, stat = self._read(path)
+        return DeviceDictionary(device_type, path, freeze(data), self.config(device_type), sha256,
+                                stat.st_mtime_ns, stat.st_size)
+
+    def _read(self, path, previous=None):
+        """Return (parsed dictionary, sha256, os.stat result), through the disk cache when possible."""
+        try:
+            stat = os.stat(path)
+            cache_path = self._cache_path(path)
+            cached = self._read_cache(cache_path)
+            if cached is not None and (cached['size'], cached['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+                return cached['dictionary'], cached['sha256'], stat
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except OSError as e:
+            raise DictionaryError(f"Cannot read {path}: {e}") from None
+        sha256 = hashlib.sha256(raw).hexdigest()
+        if cached is not None and cached['sha256'] == sha256:
+            data = cached['dictionary']  # Touched, not changed
+        else:
+            try:
+                data = json.loads(raw)
+            except ValueError as e:
+                raise DictionaryError(f"{path}: invalid JSON: {e}") from None
+            try:
+                warnings = validate_dictionary(data, previous)
+            except DictionaryError as e:
+                raise DictionaryError(f"{path}: {e}") from None
+            for warning in warnings:
+                print(f"DictionaryRegistry WARNING: {os.path.basename(path)}: {warning}")
+        self._write_cache(cache_path, path, stat, sha256, data)
+        return data, sha256, stat
+
+    def _cache_path(self, path):
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{name}.{key}.cache")
+
+    def _read_cache(self, cache_path):
+        if cache_path is None:
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(cached, dict) or cached.get('format') != (CACHE_FORMAT, sys.version_info[:2]):
+            return None
+        return cached
+
+    def _write_cache(self, cache_path, path, stat, sha256, data):
+        if cache_path is None:
+            return
+        record = {
+            'format': (CACHE_FORMAT, sys.version_info[:2]),
+            'source': os.path.abspath(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'dictionary': data,
+        }
+        tmp_path = f"{cache_path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(marshal.dumps(record))
+            os.replace(tmp_path, cache_path)
+        except (OSError, ValueError) as e:
+            print(f"DictionaryRegistry WARNING: cache not written ({e})")
+
+    def _load_config(self, device_type):
+        path = os.path.join(WORKERS_DIR, device_type, f"{device_type}_config.py")
+        if not os.path.isfile(path):
+            return None
+        try:
+            spec = importlib.util.spec_from_file_location(f"{device_type}_config", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+        except Exception as e:
+            print(f"DictionaryRegistry WARNING: could not load {device_type} config: {e}")
+            return None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """The process-wide DictionaryRegistry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DictionaryRegistry()
+        return _registry
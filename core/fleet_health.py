@@ -0,0 +1,186 @@
+"""
+Fleet Health Store v2.02
+
+Columnar health state for every monitored device, summarised in one
+vectorized pass per round-robin cycle.
+
+Architecture:
+- FleetHealthStore: One row per device in preallocated NumPy arrays: the
+  error level its HealthStatus last reported and a ring of transit times
+  (HEALTH_CHECK_TRANSIT_WINDOW). HealthStatus stays the single place the
+  FATAL / CRITICAL / WARNING rules are applied, once per sample, so the
+  store can never disagree with it. Recording a sample is one level write
+  plus at most one ring write. A CRITICAL or FATAL sample clears the row's
+  transit ring, exactly when HealthStatus clears its own window.
+- evaluate() compares every row's level with the level reported at the
+  previous cycle and returns the devices that changed. Level counts and
+  fleet-wide RTT percentiles come from the same columns. Rows of
+  unregistered devices are reused; arrays double in size when the fleet
+  outgrows them.
+
+NumPy is optional: FleetHealthStore.available() reports whether it can be
+used, and HealthMonitor simply runs without a fleet store when it cannot.
+"""
+
+
+import config
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+# Error level codes stored in the level column (index = code)
+LEVEL_NAMES = ('UNKNOWN', 'HEALTHY', 'WARNING', 'CRITICAL', 'FATAL')
+UNKNOWN, HEALTHY, WARNING, CRITICAL, FATAL = range(len(LEVEL_NAMES))
+_LEVEL_CODES = {name: code for code, name in enumerate(LEVEL_NAMES)}
+
+
+class FleetHealthStore:
+    """
+    Error levels and transit windows for a whole fleet held as NumPy arrays.
+
+    Usage:
+        store = FleetHealthStore()
+        store.register("capstanDrive")
+        store.record("capstanDrive", "HEALTHY", 12.5)   # after each HealthStatus update
+        changed = store.evaluate()          # once per round-robin cycle
+        store.level_of("capstanDrive")      # 'HEALTHY'
+    """
+
+    @staticmethod
+    def available():
+        """True when NumPy is installed."""
+        return np is not None
+
+    def __init__(self, capacity=None):
+        if np is None:
+            raise ImportError("FleetHealthStore requires numpy (pip install numpy)")
+        self.transit_window = config.HEALTH_CHECK_TRANSIT_WINDOW
+
+        self.rows = {}  # {device name: row}
+        self.names = []  # row -> device name (None for a free row)
+        self._free_rows = []
+        self.capacity = 0
+        self._grow(max(1, int(capacity or config.HEALTH_FLEET_INITIAL_CAPACITY)))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def _grow(self, capacity):
+        """Reallocate every column with room for `capacity` rows, keeping existing data."""
+        old = self.capacity
+
+        def column(name, shape, dtype, fill=0):
+            array = np.full(shape, fill, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        column('active', capacity, bool)
+        column('transit', (capacity, self.transit_window), np.float64, np.nan)
+        column('transit_pos', capacity, np.int32)
+        column('level', capacity, np.int8, UNKNOWN)  # Latest HealthStatus level
+        column('reported', capacity, np.int8, UNKNOWN)  # Level at the last evaluate()
+        self.capacity = capacity
+
+    def register(self, name):
+        """Give a device a row (idempotent) and return it."""
+        row = self.rows.get(name)
+        if row is not None:
+            return row
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self.names[row] = name
+        else:
+            row = len(self.names)
+            if row >= self.capacity:
+                self._grow(self.capacity * 2)
+            self.names.append(name)
+        self.rows[name] = row
+        self._reset_row(row)
+        self.active[row] = True
+        return row
+
+    def unregister(self, name):
+        """Release a device's row for reuse."""
+        row = self.rows.pop(name, None)
+        if row is None:
+            return
+        self._reset_row(row)
+        self.names[row] = None
+        self._free_rows.append(row)
+
+    def _reset_row(self, row):
+        self.active[row] = False
+        self.transit[row] = np.nan
+        self.transit_pos[row] = 0
+        self.level[row] = UNKNOWN
+        self.reported[row] = UNKNOWN
+
+    def record(self, name, error_level, response_time_ms=None):
+        """
+        Record one sample's outcome: the level HealthStatus just evaluated and its RTT, if any.
+
+        A CRITICAL or FATAL level starts a fresh transit window, as HealthStatus does.
+        """
+        row = self.rows.get(name)
+        if row is None:
+            return
+        level = _LEVEL_CODES.get(error_level, UNKNOWN)
+        self.level[row] = level
+        if level >= CRITICAL:
+            self.transit[row] = np.nan
+            self.transit_pos[row] = 0
+        elif response_time_ms is not None:
+            pos = self.transit_pos[row]
+            self.transit[row, pos] = response_time_ms
+            self.transit_pos[row] = (pos + 1) % self.transit_window
+
+    def evaluate(self):
+        """
+        Close a cycle in one vectorized pass over the level column.
+
+        Returns:
+            Names of the devices whose level changed since the last evaluation.
+        """
+        n = len(self.names)
+        if n == 0:
+            return []
+        level = self.level[:n]
+        changed = np.flatnonzero(self.active[:n] & (level != self.reported[:n]))
+        self.reported[:n] = level
+        return [self.names[row] for row in changed]
+
+    def level_of(self, name):
+        """Latest error level name ('UNKNOWN' if not registered)."""
+        row = self.rows.get(name)
+        return LEVEL_NAMES[self.level[row]] if row is not None else 'UNKNOWN'
+
+    def level_counts(self):
+        """Return {level name: device count} from the latest levels."""
+        n = len(self.names)
+        counts = np.bincount(self.level[:n][self.active[:n]], minlength=len(LEVEL_NAMES))
+        return {name: int(count) for name, count in zip(LEVEL_NAMES, counts)}
+
+    def rtt_percentiles(self, percentiles=(50, 90, 99)):
+        """Fleet-wide RTT percentiles (ms) over every transit window; {} without samples."""
+        n = len(self.names)
+        samples = self.transit[:n][self.active[:n]]
+        samples = samples[~np.isnan(samples)]
+        if samples.size == 0:
+            return {}
+        values = np.percentile(samples, percentiles)
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+
+    def summary(self, changed=None):
+        """Fleet snapshot for fleet_health_updated: device count, level counts, RTT percentiles."""
+        return {
+            'devices': len(self.rows),
+            'levels': self.level_counts(),
+            'rtt_ms': self.rtt_percentiles(),
+            'changed': list(changed or []),
+        }
@@ -0,0 +1,844 @@
+"""
+Health Engine v2.02
+
+Qt-free round-robin health checking with sliding window failure analysis.
+
+Architecture:
+- HealthStatus: Tracks individual worker health with sliding windows
+- HealthEngine: Round-robin ping scheduling, PONG timeouts and status
+  evaluation for every registered worker. It owns no timers or threads:
+  run_due() does whatever is due and returns the next deadline, so any loop
+  can drive it (HealthEngineThread, the headless daemon's selector loop).
+  Results go to plain callables registered with add_listener() as
+  (event, *args), where event names match HealthMonitor's signals.
+- HealthEngineThread: Minimal driver thread that sleeps until the engine's
+  next deadline and is woken early when the schedule changes.
+
+Pings are paced by deadline: every worker has its own next due time in a
+heap, and the driver sleeps exactly until the earliest one, so an idle
+engine wakes once per ping. Workers start evenly staggered across
+HEALTH_CHECK_ROUND_ROBIN_INTERVAL. With HEALTH_ADAPTIVE_INTERVAL_ENABLED,
+each outcome re-plans the worker's probe interval: steadily HEALTHY devices
+back off towards HEALTH_ADAPTIVE_MAX_INTERVAL, devices in WARNING or
+CRITICAL or with a failure in their window are probed every
+HEALTH_ADAPTIVE_MIN_INTERVAL. All scheduled pings share one
+HEALTH_CHECK_MAX_PINGS_PER_SECOND budget, so probe traffic stays flat as
+the fleet grows. The round-robin "cycle" is the reporting period
+(HEALTH_CHECK_ROUND_ROBIN_INTERVAL) at which fleet summaries are emitted.
+
+When NumPy is available, each sample's outcome (the level HealthStatus just
+evaluated and its RTT) is copied into a FleetHealthStore
+(core/fleet_health.py). The store finds level changes across the whole
+fleet in one vectorized pass per cycle and reports level counts and RTT
+percentiles through the fleet_health_updated event. The window rules run
+only in HealthStatus.
+
+Each HealthStatus also keeps a LatencySketch (core/latency_sketch.py) fed
+by PONG RTTs and by command reply RTTs (record_command_rtt()), giving
+p50/p90/p99/p999 per device in the status dict; the fleet quantiles are the
+merge of every device sketch.
+
+Command replies double as liveness evidence: when
+HEALTH_PASSIVE_LIVENESS_ENABLED is set and a HEALTHY or WARNING device has
+been heard from within its probe interval (a command reply via
+record_command_rtt(), or any non-PING/PONG datagram stamped in the
+channel's last_heard), its scheduled ping is skipped and the slot is
+recorded as a passive success carrying the latest command RTT.
+
+Every outcome is also appended to a persistent RttHistory
+(core/rtt_history.py) with 1-minute and 1-hour rollups when
+HEALTH_HISTORY_ENABLED is set.
+
+PONG timeouts live in one TimerWheel (core/timer_wheel.py) keyed by
+(worker_name, ping_time). A PONG cancels exactly the ping it answers, and
+the driver only wakes for the earliest timeout still pending.
+
+Workers need send_ping(ping_time, send_timestamp=False); their PONGs are
+fed back through handle_pong(worker_name, ping_time, additional_info).
+Workers that timestamp on the wire pass the measured RTT as
+additional_info['rtt_ms'] (core/transport.py uses kernel receive stamps);
+otherwise the RTT is taken from ping_time to the handle_pong() call.
+All public methods are thread-safe.
+
+core/health_monitor.py wraps this engine for the Qt GUI; health_daemon.py
+runs it headless.
+"""
+
+import heapq
+import threading
+import time
+import config
+from core.fleet_health import FleetHealthStore
+from core.latency_sketch import LatencySketch
+from core.rtt_history import RttHistory
+from core.sliding_stats import SlidingCounter, SlidingWindowStats
+from core.timer_wheel import TimerWheel
+
+# Timer jitter (seconds) tolerated before a cycle counts as overrunning its interval
+CYCLE_TIMING_SLACK = 0.05
+
+
+def ping_message(ping_time, send_timestamp=False):
+    """
+    Build a PING datagram and the key its PONG will be tracked under.
+
+    Returns:
+        (message, tracking_key): "PING" / "PING", or
+        "PING:yyyymmdd.HHMMSS.xxx" / "yyyymmdd.HHMMSS.xxx" when send_timestamp.
+    """
+    if not send_timestamp:
+        return "PING", "PING"
+    from datetime import datetime, timezone
+    # Create human-readable timestamp: yyyymmdd.HHMMSS.xxx
+    dt = datetime.fromtimestamp(ping_time, tz=timezone.utc)
+    human_time = dt.strftime('%Y%m%d.%H%M%S.') + f"{dt.microsecond // 1000:03d}"
+    return f"PING:{human_time}", human_time
+
+
+def pong_tracking_key(message):
+    """Return the tracking key a PONG or PONG:timestamp message answers."""
+    parts = message.split(':', 1)
+    return parts[1] if len(parts) == 2 else "PING"
+
+
+class HealthStatus:
+    """
+    Health status tracker for a single worker with sliding window analysis.
+    
+    Tracks:
+    - Last M checks (success/failure)
+    - Last N response times (for slow detection)
+    - Latency quantiles over every PONG and command reply (LatencySketch)
+    - Error level determination (WARNING, CRITICAL, FATAL)
+    
+    Every window keeps running counters and mean/variance, so recording a
+    sample, evaluating the status and building the status dict never rescan
+    the windows. Latency quantiles are cached in latency_ms and only
+    recomputed by refresh_latency() (once per reporting period, or when a
+    status is queried directly).
+    """
+    
+    def __init__(self, worker_name):
+        self.worker_name = worker_name
+        
+        # Sliding windows
+        self.check_history = SlidingCounter(config.HEALTH_CHECK_WINDOW_SIZE)
+        self.response_times = SlidingWindowStats(config.HEALTH_CHECK_SLOW_WINDOW,
+                                                 threshold=config.HEALTH_CHECK_SLOW_RESPONSE_MS)
+        self.transit_times = SlidingWindowStats(config.HEALTH_CHECK_TRANSIT_WINDOW)  # 3-minute window
+        self.latency = LatencySketch()  # Tail latency over the device's lifetime
+        self.latency_ms = self.latency.percentiles()  # Cached quantiles, see refresh_latency()
+        
+        # State tracking
+        self.last_ping_time = 0.0
+        self.last_pong_time = 0.0
+        self.probe_interval = config.HEALTH_CHECK_ROUND_ROBIN_INTERVAL  # Current seconds between pings
+        self.schedule_base = 0.0  # time.monotonic() the current probe interval counts from
+        self.last_heard = 0.0  # time.monotonic() of the last command reply
+        self.passive_rtt_ms = None  # Latest command reply RTT not yet counted as a check
+        self.passive_checks = 0  # Scheduled pings replaced by passive observations
+        self.last_response_time_ms = None
+        self.consecutive_failures = 0
+        self.status = 'unknown'
+        self.error_level = 'UNKNOWN'
+        self.previous_error_level = 'UNKNOWN'  # For recovery detection
+        self.negotiated_metrics = []
+        self.additional_info = {}
+        self.last_error = None
+        self.transit_anomaly_detected = False
+        
+    def record_success(self, response_time_ms, additional_info=None, sample_latency=True):
+        """
+        Record successful health check.
+
+        response_time_ms may be None for a liveness-only observation; it then
+        counts as a passed check without adding a response time sample.
+        """
+        self.check_history.append(True)
+        if response_time_ms is not None:
+            self.response_times.append(response_time_ms)
+            self.transit_times.append(response_time_ms)  # Also track for statistical analysis
+            if sample_latency:
+                self.latency.add(response_time_ms)
+            self.last_response_time_ms = response_time_ms
+        self.last_pong_time = time.time()
+        self.consecutive_failures = 0
+        
+        if additional_info:
+            self.additional_info = additional_info
+        
+        self._update_status()
+    
+    def record_command_rtt(self, rtt_ms, heard_at):
+        """Record a command reply: a latency sample and liveness for the next check."""
+        self.latency.add(rtt_ms)
+        self.last_heard = heard_at
+        self.passive_rtt_ms = rtt_ms
+
+    def refresh_latency(self):
+        """Recompute the cached latency quantiles (one walk over the sketch buckets)."""
+        self.latency_ms = self.latency.percentiles()
+        return self.latency_ms
+
+    def record_failure(self, error_msg):
+        """Record failed health check (timeout or error)."""
+        self.check_history.append(False)
+        self.consecutive_failures += 1
+        self.last_error = error_msg
+        self._update_status()
+    
+    def _check_transit_anomaly(self):
+        """Check if latest transit time is anomalous (>2 std dev from mean)."""
+        # Need full window before checking
+        if len(self.transit_times) < config.HEALTH_CHECK_TRANSIT_WINDOW:
+            return False
+        
+        # Running mean and standard deviation of the window
+        mean_time = self.transit_times.mean
+        stddev_time = self.transit_times.stdev
+        
+        # Check if latest time is outside threshold
+        latest_time = self.transit_times[-1]
+        threshold = mean_time + (config.HEALTH_CHECK_TRANSIT_STDDEV_THRESHOLD * stddev_time)
+        
+        if latest_time > threshold:
+            print(f"[Transit Anomaly] {self.worker_name}: {latest_time:.1f}ms > {threshold:.1f}ms "
+                  f"(mean={mean_time:.1f}ms, stddev={stddev_time:.1f}ms)")
+            return True
+        
+        return False
+    
+    def _update_status(self):
+        """
+        Analyze sliding windows and determine error level.
+        
+        Priority order:
+        1. FATAL: N failures in last M checks
+        2. CRITICAL: Last check failed
+        3. WARNING: Slow responses OR transit time anomaly
+        4. HEALTHY: All good
+        """
+        # Store previous state for recovery detection
+        self.previous_error_level = self.error_level
+        
+        # Need data to evaluate
+        if len(self.check_history) == 0:
+            self.status = 'unknown'
+            self.error_level = 'UNKNOWN'
+            return
+        
+        # Check for FATAL: N failures in sliding window
+        if self.check_history.failures >= config.HEALTH_CHECK_FATAL_THRESHOLD:
+            self.status = 'fatal'
+            self.error_level = 'FATAL'
+            # Clear transit window on FATAL
+            self.transit_times.clear()
+            self.transit_anomaly_detected = False
+            return
+        
+        # Check for CRITICAL: Last check failed
+        if not self.check_history[-1]:
+            self.status = 'critical'
+            self.error_level = 'CRITICAL'
+            # Clear transit window on CRITICAL
+            self.transit_times.clear()
+            self.transit_anomaly_detected = False
+            return
+        
+        # Check for WARNING: Transit time anomaly (must check before slow responses)
+        self.transit_anomaly_detected = self._check_transit_anomaly()
+        if self.transit_anomaly_detected:
+            self.status = 'warning'
+            self.error_level = 'WARNING'
+            self.last_error = f"Transit time anomaly detected"
+            return
+        
+        # Check for WARNING: Slow responses
+        if self.response_times.above >= config.HEALTH_CHECK_SLOW_THRESHOLD:
+            self.status = 'warning'
+            self.error_level = 'WARNING'
+            return
+        
+        # All checks passed
+        self.status = 'healthy'
+        self.error_level = 'HEALTHY'
+        self.last_error = None
+    
+    def get_status_dict(self):
+        """Return current status as dictionary for display."""
+        return {
+            'worker': self.worker_name,
+            'status': self.status,
+            'error_level': self.error_level,
+            'response_time_ms': self.last_response_time_ms,
+            'consecutive_failures': self.consecutive_failures,
+            'failures_in_window': self.check_history.failures,
+            'slow_responses': self.response_times.above,
+            'transit_window_size': len(self.transit_times),
+            'transit_anomaly': self.transit_anomaly_detected,
+            'latency_ms': self.latency_ms,
+            'latency_samples': len(self.latency),
+            'probe_interval_s': self.probe_interval,
+            'passive_checks': self.passive_checks,
+            'last_check': self.last_ping_time,
+            'last_response': self.last_pong_time,
+            'error': self.last_error,
+            'metrics': self.additional_info
+        }
+    
+    def get_tooltip_text(self):
+        """Generate tooltip text for UI display."""
+        if self.status == 'healthy':
+            p99 = self.latency_ms['p99']
+            tail = f"\np99: {p99:.0f}ms" if p99 is not None else ""
+            return f"Status: HEALTHY\nResponse: {self.last_response_time_ms:.0f}ms{tail}\nLast: {time.strftime('%H:%M:%S', time.localtime(self.last_pong_time))}"
+        elif self.status == 'warning':
+            if self.transit_anomaly_detected:
+                # Show transit anomaly details
+                mean_time = self.transit_times.mean
+                stddev_time = self.transit_times.stdev
+                return f"Status: WARNING\nTransit anomaly: {self.last_response_time_ms:.0f}ms\nMean: {mean_time:.0f}ms (±{stddev_time:.0f}ms)"
+            else:
+                # Show slow response details
+                slow = self.response_times.above
+                return f"Status: WARNING\n{slow}/{len(self.response_times)} slow responses\nAvg: {self.response_times.mean:.0f}ms"
+        elif self.status == 'critical':
+            return f"Status: CRITICAL\nNo response\nLast: {time.strftime('%H:%M:%S', time.localtime(self.last_ping_time))}"
+        elif self.status == 'fatal':
+            failures = self.check_history.failures
+            return f"Status: FATAL\n{failures}/{len(self.check_history)} checks failed\n{self.last_error}"
+        else:
+            return "Status: UNKNOWN\nNo data"
+
+
+class HealthEngine:
+    """
+    Round-robin health checking without Qt.
+
+    Usage:
+        engine = HealthEngine()
+        engine.add_listener(lambda event, *args: print(event, args))
+        engine.register_worker("capstanDrive", channel)
+        engine.start()
+        deadline = engine.run_due()   # from the driving loop, again at `deadline`
+    """
+
+    def __init__(self, enabled=None, history_dir=None):
+        self.enabled = config.HEALTH_CHECK_ENABLED if enabled is None else enabled
+        self.workers = {}  # {worker_name: worker_instance}
+        self.health_status = {}  # {worker_name: HealthStatus}
+        self.listeners = []  # Callables taking (event, *args)
+        self.schedule_changed = None  # Called when an earlier deadline may exist (driver wake-up)
+        self._lock = threading.RLock()
+
+        # Ping schedule (all times are time.monotonic())
+        self.running = False
+        self.next_due = {}  # {worker_name: time its next ping is due}
+        self._due_heap = []  # (due, worker_name); entries not matching next_due are stale
+        self.last_scheduled_ping = 0.0  # When the last scheduled ping went out (budget pacing)
+        self.cycle_start_time = 0.0  # Start of the current reporting period
+        self._cycle_worst_lag = (0.0, 0.0)  # (lag, target interval) of the latest ping this period
+
+        # PONG timeouts keyed by (worker_name, ping_time)
+        self.ping_timeouts = TimerWheel(config.HEALTH_CHECK_TIMEOUT_TICK_MS / 1000.0)
+
+        # Columnar fleet view (optional, needs numpy)
+        self.fleet_store = None
+        if config.HEALTH_FLEET_STORE_ENABLED and FleetHealthStore.available():
+            self.fleet_store = FleetHealthStore()
+
+        # Long-horizon RTT history on disk (optional)
+        self.history = None
+        if config.HEALTH_HISTORY_ENABLED:
+            try:
+                self.history = RttHistory(history_dir or config.HEALTH_HISTORY_DIR)
+            except OSError as e:
+                print(f"HealthMonitor WARNING: RTT history disabled - {e}")
+
+        if not self.enabled:
+            print("HealthMonitor: Disabled (HEALTH_CHECK_ENABLED=False)")
+
+    def add_listener(self, listener):
+        """Register a callable receiving (event, *args) for every engine event."""
+        self.listeners.append(listener)
+
+    def _emit(self, event, *args):
+        for listener in self.listeners:
+            listener(event, *args)
+
+    def _notify_schedule_changed(self):
+        if self.schedule_changed is not None:
+            self.schedule_changed()
+
+    def register_worker(self, worker_name, worker_instance, negotiated_metrics=None):
+        """
+        Register a worker for health monitoring.
+
+        Returns:
+            True if the worker was added, False if disabled or already registered.
+        """
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            # Re-selecting a device on the shared transport hands back the same channel
+            if self.workers.get(worker_name) is worker_instance:
+                return False
+            if worker_name in self.workers:
+                self.unregister_worker(worker_name)
+
+            self.workers[worker_name] = worker_instance
+            status = HealthStatus(worker_name)
+
+            if negotiated_metrics:
+                status.negotiated_metrics = negotiated_metrics
+            else:
+                status.negotiated_metrics = config.STANDARD_HEALTH_METRICS
+
+            self.health_status[worker_name] = status
+            if self.fleet_store is not None:
+                self.fleet_store.register(worker_name)
+
+            print(f"HealthMonitor: Registered '{worker_name}' with metrics: {status.negotiated_metrics}")
+
+            # Joining a running schedule: first contact as soon as the budget allows
+            if self.running:
+                self._set_due(worker_name, time.monotonic())
+        self._notify_schedule_changed()
+        return True
+
+    def unregister_worker(self, worker_name):
+        """Stop monitoring a worker; return its instance (or None)."""
+        with self._lock:
+            worker_instance = self.workers.pop(worker_name, None)
+            self.health_status.pop(worker_name, None)
+            if self.fleet_store is not None:
+                self.fleet_store.unregister(worker_name)
+            self.next_due.pop(worker_name, None)  # Its heap entry is now stale
+            self.ping_timeouts.cancel_matching(lambda key: key[0] == worker_name)
+            return worker_instance
+
+    def unregister_all_workers(self):
+        """Stop monitoring every registered worker."""
+        with self._lock:
+            for worker_name in list(self.workers.keys()):
+                self.unregister_worker(worker_name)
+
+    def start(self):
+        """Start health monitoring."""
+        if not self.enabled:
+            print("HealthMonitor: Not starting (disabled in config)")
+            return
+
+        with self._lock:
+            if not self.workers:
+                print("HealthMonitor: No workers registered")
+                return
+
+            self.running = True
+            now = time.monotonic()
+            self.cycle_start_time = now
+            self._cycle_worst_lag = (0.0, 0.0)
+            # Stagger the first pings evenly across one interval
+            self.next_due.clear()
+            self._due_heap = []
+            spacing = config.HEALTH_CHECK_ROUND_ROBIN_INTERVAL / len(self.workers)
+            for index, worker_name in enumerate(self.workers):
+                self._set_due(worker_name, now + index * spacing)
+        self._notify_schedule_changed()
+
+        print(f"HealthMonitor: Started monitoring {len(self.workers)} workers")
+
+    def stop(self):
+        """Stop health monitoring."""
+        with self._lock:
+            self.running = False
+            self.ping_timeouts.clear()
+            if self.history is not None:
+                self.history.flush()
+        print("HealthMonitor: Stopped")
+
+    def close(self):
+        """Stop monitoring and close the RTT history files."""
+        self.stop()
+        with self._lock:
+            if self.history is not None:
+                self.history.close()
+                self.history = None
+
+    def trigger_manual_check(self, worker_name=None):
+        """
+        Manually trigger health check.
+
+        Args:
+            worker_name: Specific worker to check, or None to check all workers
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if worker_name is None:
+                # Check all workers
+                for name in list(self.workers.keys()):
+                    print(f"HealthMonitor: Manual check for '{name}'")
+                    self._send_ping(name)
+            else:
+                # Check specific worker
+                if worker_name not in self.workers:
+                    print(f"HealthMonitor: Unknown worker '{worker_name}'")
+                    return
+
+                print(f"HealthMonitor: Manual check for '{worker_name}'")
+                self._send_ping(worker_name)
+        self._notify_schedule_changed()
+
+    def get_health_status(self, worker_name):
+        """Get current health status for worker."""
+        with self._lock:
+            if worker_name in self.health_status:
+                status = self.health_status[worker_name]
+                status.refresh_latency()
+                return status.get_status_dict()
+        return None
+
+    def record_command_rtt(self, worker_name, rtt_ms):
+        """Feed a command reply's round-trip time and liveness into the worker's status."""
+        heard_at = time.monotonic()
+        with self._lock:
+            status = self.health_status.get(worker_name)
+            if status:
+                status.record_command_rtt(rtt_ms, heard_at)
+
+    def fleet_latency(self):
+        """Fleet-wide latency percentiles: the merge of every device sketch."""
+        with self._lock:
+            statuses = list(self.health_status.values())
+        # Sketch counters are fixed-size arrays, so merging needs no lock
+        return LatencySketch.merged(status.latency for status in statuses).percentiles()
+
+    def _refresh_latency(self, summary):
+        """
+        Refresh every device's cached quantiles once per reporting period.
+
+        Runs without the engine lock. With the fleet store, `summary` gets the
+        merged fleet latency and fleet_health_updated is emitted.
+        """
+        with self._lock:
+            statuses = list(self.health_status.values())
+        for status in statuses:
+            status.refresh_latency()
+        if summary is not None:
+            summary['latency_ms'] = LatencySketch.merged(status.latency for status in statuses).percentiles()
+            self._emit('fleet_health_updated', summary)
+
+    def _set_due(self, worker_name, due):
+        self.next_due[worker_name] = due
+        heapq.heappush(self._due_heap, (due, worker_name))
+
+    def _peek_due(self):
+        """(due, worker_name) of the earliest live schedule entry, or None."""
+        heap = self._due_heap
+        while heap:
+            due, worker_name = heap[0]
+            if self.next_due.get(worker_name) == due:
+                return heap[0]
+            heapq.heappop(heap)  # Superseded or unregistered
+        return None
+
+    def next_ping_time(self):
+        """When the next scheduled ping may go out (its due time, held back by the budget)."""
+        entry = self._peek_due()
+        if entry is None:
+            return None
+        return max(entry[0], self.last_scheduled_ping + 1.0 / config.HEALTH_CHECK_MAX_PINGS_PER_SECOND)
+
+    def next_deadline(self):
+        """time.monotonic() of the next ping, period end or timeout tick, or None when idle."""
+        with self._lock:
+            deadlines = []
+            if self.running:
+                deadlines.append(self.cycle_start_time + config.HEALTH_CHECK_ROUND_ROBIN_INTERVAL)
+                ping_time = self.next_ping_time()
+                if ping_time is not None:
+                    deadlines.append(ping_time)
+            tick = self.ping_timeouts.next_tick_time()
+            if tick is not None:
+                deadlines.append(tick)
+            return min(deadlines) if deadlines else None
+
+    def run_due(self, now=None):
+        """Send the ping that is due, expire overdue PONGs, and return next_deadline()."""
+        period_closed = False
+        summary = None
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            if self.running:
+                if now >= self.cycle_start_time + config.HEALTH_CHECK_ROUND_ROBIN_INTERVAL:
+                    period_closed = True
+                    summary = self._complete_cycle(now)
+                ping_time = self.next_ping_time()
+                if ping_time is not None and now >= ping_time:
+                    self._perform_next_check(now)
+            for (worker_name, ping_time), _ in self.ping_timeouts.advance(now):
+                self._check_timeout(worker_name, ping_time)
+            deadline = self.next_deadline()
+        if period_closed:
+            self._refresh_latency(summary)
+        return deadline
+
+    def _perform_next_check(self, now):
+        """
+        Ping the worker whose due time is earliest and provisionally schedule its next ping.
+
+        The next ping keeps the worker's cadence unless it went out late (budget
+        exhausted or a stalled driver), in which case it restarts from now
+        instead of bursting to catch up. The outcome (PONG or timeout)
+        re-plans it with the updated probe interval.
+        """
+        due, worker_name = heapq.heappop(self._due_heap)
+        status = self.health_status[worker_name]
+
+        lag = now - due
+        if lag > self._cycle_worst_lag[0]:
+            self._cycle_worst_lag = (lag, status.probe_interval)
+        status.schedule_base = due if lag <= CYCLE_TIMING_SLACK else now
+
+        self._set_due(worker_name, status.schedule_base + status.probe_interval)
+        if self._record_passive_check(worker_name, status, now):
+            return
+        self.last_scheduled_ping = now
+        self._send_ping(worker_name)
+
+    def _record_passive_check(self, worker_name, status, now):
+        """Count recent command traffic as this slot's check instead of pinging; True if it did."""
+        if not config.HEALTH_PASSIVE_LIVENESS_ENABLED:
+            return False
+        # First contact and recovery still need the timestamped ping
+        if status.error_level not in ('HEALTHY', 'WARNING'):
+            return False
+        channel_heard = getattr(self.workers[worker_name], 'last_heard', 0.0)
+        if now - max(status.last_heard, channel_heard) > status.probe_interval:
+            return False
+
+        # A fresh command RTT rides along; plain traffic only proves liveness
+        rtt_ms = status.passive_rtt_ms
+        status.passive_rtt_ms = None
+        status.passive_checks += 1
+        self._record_success(worker_name, status, rtt_ms, None, time.time(), sample_latency=False)
+        return True
+
+    def _plan_next_probe(self, worker_name, status):
+        """Adapt the worker's probe interval to its latest outcome and reschedule it."""
+        base = config.HEALTH_CHECK_ROUND_ROBIN_INTERVAL
+        if not config.HEALTH_ADAPTIVE_INTERVAL_ENABLED:
+            interval = base
+        elif status.error_level == 'HEALTHY' and status.check_history.failures == 0:
+            # Clean streak: back off gradually from the base interval
+            if status.probe_interval < base:
+                interval = base
+            else:
+                interval = min(status.probe_interval * config.HEALTH_ADAPTIVE_BACKOFF_FACTOR,
+                               max(config.HEALTH_ADAPTIVE_MAX_INTERVAL, base))
+        elif status.error_level in ('HEALTHY', 'WARNING', 'CRITICAL'):
+            # Suspicious: slow, anomalous or recent loss
+            interval = min(config.HEALTH_ADAPTIVE_MIN_INTERVAL, base)
+        else:
+            # FATAL or unknown: keep watching for recovery at the base rate
+            interval = base
+        status.probe_interval = interval
+
+        # (manual checks before the first scheduled ping leave the schedule alone)
+        if self.running and worker_name in self.next_due and status.schedule_base:
+            due = status.schedule_base + interval
+            if due != self.next_due[worker_name]:
+                self._set_due(worker_name, due)
+                self._notify_schedule_changed()
+
+    def _complete_cycle(self, now):
+        """Close the reporting period: timing check; returns the fleet summary (or None)."""
+        cycle_time = now - self.cycle_start_time
+
+        self._emit('round_robin_cycle_complete', cycle_time)
+
+        # Pings held back by the budget (or a stalled driver) missed their interval
+        lag, target = self._cycle_worst_lag
+        if lag > CYCLE_TIMING_SLACK:
+            msg = (f"Ping interval stretched to {target + lag:.2f}s, "
+                   f"exceeds target {target:.2f}s")
+            print(f"HealthMonitor WARNING: {msg}")
+            self._emit('round_robin_timing_warning', target + lag, target)
+
+        # Next period; resume from now after a stall
+        period = config.HEALTH_CHECK_ROUND_ROBIN_INTERVAL
+        self.cycle_start_time = max(self.cycle_start_time + period, now - period)
+        self._cycle_worst_lag = (0.0, 0.0)
+
+        if self.fleet_store is None:
+            return None
+        # Latency quantiles are added outside the lock by _refresh_latency()
+        return self.fleet_store.summary(self.fleet_store.evaluate())
+
+    def _send_ping(self, worker_name):
+        """Send ping to worker."""
+        worker = self.workers.get(worker_name)
+        if not worker:
+            return
+
+        status = self.health_status[worker_name]
+        status.last_ping_time = time.time()
+
+        try:
+            # Determine if we should send timestamp
+            # Send timestamp on: first contact OR recovery from FATAL/CRITICAL
+            send_timestamp = False
+            if status.error_level == 'UNKNOWN':
+                # First contact (no checks yet)
+                send_timestamp = True
+                print(f"[HealthMonitor] First contact with {worker_name} - sending timestamp")
+            elif status.previous_error_level in ['FATAL', 'CRITICAL'] and status.error_level in ['HEALTHY', 'WARNING']:
+                # Recovery from FATAL/CRITICAL
+                send_timestamp = True
+                print(f"[HealthMonitor] {worker_name} recovered from {status.previous_error_level} - sending timestamp")
+
+            # Send ping (with or without timestamp)
+            worker.send_ping(status.last_ping_time, send_timestamp)
+
+            # Arm the timeout for this exact ping
+            self.ping_timeouts.schedule(
+                (worker_name, status.last_ping_time),
+                time.monotonic() + config.HEALTH_CHECK_PONG_TIMEOUT
+            )
+
+        except Exception as e:
+            error_msg = f"Ping send error: {e}"
+            print(f"HealthMonitor WARNING: {worker_name} - {error_msg}")
+            status.record_failure(error_msg)
+            self._record_fleet_failure(worker_name, status)
+            self._plan_next_probe(worker_name, status)
+            self._emit_status_events(worker_name, status)
+
+    def _check_timeout(self, worker_name, ping_time):
+        """Record a timeout for the ping sent at ping_time (its PONG never arrived)."""
+        status = self.health_status.get(worker_name)
+        if not status:
+            return
+
+        # Timeout occurred
+        error_msg = f"No PONG within {config.HEALTH_CHECK_PONG_TIMEOUT}s"
+        status.record_failure(error_msg)
+        self._record_fleet_failure(worker_name, status)
+
+        print(f"HealthMonitor WARNING: {worker_name} timeout "
+              f"({status.consecutive_failures} consecutive)")
+
+        self._plan_next_probe(worker_name, status)
+        self._emit_status_events(worker_name, status)
+
+    def handle_pong(self, worker_name, ping_time, additional_info):
+        """
+        Record a PONG for the ping sent at ping_time.
+
+        Call this from the thread that received the PONG so GUI stalls never
+        inflate the measured response time.
+        """
+        received_at = time.time()
+        with self._lock:
+            status = self.health_status.get(worker_name)
+            if not status:
+                return
+
+            self.ping_timeouts.cancel((worker_name, ping_time))
+
+            # Prefer the worker's wire-level RTT over our own clock
+            additional_info = dict(additional_info or {})
+            response_time_ms = additional_info.pop('rtt_ms', None)
+            if response_time_ms is None:
+                response_time_ms = (received_at - ping_time) * 1000
+
+            self._record_success(worker_name, status, response_time_ms, additional_info, received_at)
+
+    def _record_success(self, worker_name, status, response_time_ms, additional_info, received_at,
+                        sample_latency=True):
+        """Record a passed check (PONG or passive) everywhere and emit its events."""
+        status.record_success(response_time_ms, additional_info, sample_latency)
+        if self.fleet_store is not None:
+            self.fleet_store.record(worker_name, status.error_level, response_time_ms)
+        if self.history is not None and response_time_ms is not None:
+            self.history.record(worker_name, received_at, response_time_ms, True)
+
+        self._plan_next_probe(worker_name, status)
+        self._emit_status_events(worker_name, status)
+
+    def _record_fleet_failure(self, worker_name, status):
+        if self.fleet_store is not None:
+            self.fleet_store.record(worker_name, status.error_level)
+        if self.history is not None:
+            self.history.record(worker_name, time.time(), 0.0, False)
+
+    def _emit_status_events(self, worker_name, status):
+        """Emit appropriate events based on status."""
+        status_dict = status.get_status_dict()
+
+        # Always emit status update
+        self._emit('health_status_updated', worker_name, status_dict)
+
+        # Check if status changed (for escalation and popups)
+        status_changed = status.previous_error_level != status.error_level
+
+        # Emit level-specific events (only on state transitions)
+        if status.error_level == 'FATAL':
+            print(f"HealthMonitor FATAL: {worker_name} - {status.last_error}")
+            # Only emit and escalate on state transition
+            if status_changed:
+                self._emit('health_fatal', worker_name, status.last_error or "Fatal error")
+                self._emit('escalate_to_controller', worker_name, status_dict)
+
+        elif status.error_level == 'CRITICAL':
+            print(f"HealthMonitor CRITICAL: {worker_name} - {status.last_error}")
+            # Only emit and escalate on state transition
+            if status_changed:
+                self._emit('health_critical', worker_name, status.last_error or "Critical error")
+                self._emit('escalate_to_controller', worker_name, status_dict)
+
+        elif status.error_level == 'WARNING':
+            # WARNING is logged every time but popup only on transition
+            if status_changed:
+                print(f"HealthMonitor WARNING: {worker_name} - Slow responses")
+                self._emit('health_warning', worker_name, "Slow response times detected")
+
+
+class HealthEngineThread(threading.Thread):
+    """
+    Drive a HealthEngine from a background thread.
+
+    Sleeps until engine.next_deadline(); the engine's schedule_changed hook
+    wakes it early when a new worker, start() or manual check moves the
+    deadline forward.
+    """
+
+    def __init__(self, engine):
+        super().__init__(name="HealthEngine", daemon=True)
+        self.engine = engine
+        self._wakeup = threading.Event()
+        self._stopped = False
+        engine.schedule_changed = self.wake
+
+    def run(self):
+        while not self._stopped:
+            deadline = self.engine.run_due()
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def wake(self):
+        """Re-evaluate the engine's deadline now."""
+        self._wakeup.set()
+
+    def stop(self):
+        """Stop the thread and wait for it to exit."""
+        self._stopped = True
+        if self.engine.schedule_changed == self.wake:
+            self.engine.schedule_changed = None
+        self._wakeup.set()
+        if self.is_alive():
+            self.join()
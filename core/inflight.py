@@ -0,0 +1,149 @@
+"""
+In-Flight Request Table v2.02
+
+Correlates replies with the exact request they answer.
+
+Wire format (optional, per device via "sequence_numbers": true in servers.json):
+    request:  @<seq>:<COMMAND,param1,...>     e.g.  @17:LED,1,toggle
+    reply:    @<seq>:<payload>                e.g.  @17:OK
+
+Devices without sequence support keep the plain CSV format and the old
+"next reply answers the last request" behaviour.
+
+Architecture:
+- InFlightRequest: One outstanding request (device, seq, message, timing).
+- InFlightTable: Dict keyed by (device, seq) for O(1) resolution plus a
+  deadline min-heap for timeouts. Resolved entries are left in the heap and
+  skipped lazily, so resolve() never has to search the heap.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+SEQUENCE_MODULUS = 65536
+
+
+def parse_sequence_tag(payload):
+    """
+    Split a tagged datagram into (seq, body).
+
+    Accepts bytes-like payloads. Returns (None, payload) when the datagram
+    carries no "@<seq>:" tag.
+    """
+    if not payload or payload[0] != 0x40:  # '@'
+        return None, payload
+    head = bytes(payload[1:7])
+    colon = head.find(b':')
+    if colon <= 0 or not head[:colon].isdigit():
+        return None, payload
+    return int(head[:colon]), payload[colon + 2:]
+
+
+def add_sequence_tag(seq, message):
+    """Return the wire form of a request carrying sequence number `seq`."""
+    return f"@{seq}:{message}"
+
+
+class InFlightRequest:
+    """A request that has been sent and not yet answered or expired."""
+
+    __slots__ = ('device', 'seq', 'message', 'sent_at', 'deadline', 'attempt', 'owner')
+
+    def __init__(self, device, seq, message, sent_at, deadline, attempt=1, owner=None):
+        self.device = device
+        self.seq = seq
+        self.message = message
+        self.sent_at = sent_at
+        self.deadline = deadline
+        self.attempt = attempt
+        self.owner = owner  # Sender (e.g. the DeviceChannel) when several share one device address
+
+    def rtt_ms(self, now):
+        """Round-trip time in milliseconds if the reply arrived at `now`."""
+        return (now - self.sent_at) * 1000.0
+
+
+class InFlightTable:
+    """
+    Outstanding requests for every device, keyed by (device, seq).
+
+    Thread-safe: requests are added from the GUI thread and resolved or
+    expired from the transport thread. Times are time.monotonic() seconds.
+    """
+
+    def __init__(self):
+        self._requests = {}  # {(device, seq): InFlightRequest}
+        self._deadlines = []  # heap of (deadline, tiebreak, (device, seq))
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._requests)
+
+    def __contains__(self, key):
+        return key in self._requests
+
+    def add(self, device, seq, message, timeout, now=None, attempt=1, owner=None):
+        """
+        Track a sent request and return it.
+
+        Re-adding an existing (device, seq) replaces it, which is how a
+        retransmission gets a fresh deadline.
+        """
+        now = time.monotonic() if now is None else now
+        request = InFlightRequest(device, seq, message, now, now + timeout, attempt, owner)
+        key = (device, seq)
+        with self._lock:
+            self._requests[key] = request
+            heapq.heappush(self._deadlines, (request.deadline, next(self._counter), key))
+        return request
+
+    def get(self, device, seq):
+        """The outstanding request for (device, seq) without removing it, or None."""
+        return self._requests.get((device, seq))
+
+    def resolve(self, device, seq):
+        """Remove and return the request answered by a reply, or None if unknown/expired."""
+        with self._lock:
+            return self._requests.pop((device, seq), None)
+
+    def cancel_device(self, device):
+        """Forget every outstanding request for a device; return them."""
+        with self._lock:
+            keys = [key for key in self._requests if key[0] == device]
+            return [self._requests.pop(key) for key in keys]
+
+    def in_flight(self, device):
+        """Number of outstanding requests for a device."""
+        with self._lock:
+            return sum(1 for key in self._requests if key[0] == device)
+
+    def next_deadline(self):
+        """Earliest live deadline, or None when nothing is outstanding."""
+        with self._lock:
+            self._discard_stale_heads()
+            return self._deadlines[0][0] if self._deadlines else None
+
+    def pop_expired(self, now=None):
+        """Remove and return every request whose deadline has passed."""
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, _, key = heapq.heappop(self._deadlines)
+                request = self._requests.get(key)
+                if request is not None and request.deadline == deadline:
+                    del self._requests[key]
+                    expired.append(request)
+        return expired
+
+    def _discard_stale_heads(self):
+        """Drop heap entries for requests already resolved or re-added."""
+        while self._deadlines:
+            deadline, _, key = self._deadlines[0]
+            request = self._requests.get(key)
+            if request is not None and request.deadline == deadline:
+                return
+            heapq.heappop(self._deadlines)
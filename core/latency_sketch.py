@@ -0,0 +1,145 @@
+"""
+Latency Sketch v2.02
+
+Fixed-memory, mergeable latency quantiles (p50/p90/p99/p999) for health
+monitoring.
+
+Architecture:
+- LatencySketch: HDR-style histogram over logarithmic buckets. Bucket i
+  covers (min_ms * gamma^(i-1), min_ms * gamma^i] with
+  gamma = (1 + accuracy) / (1 - accuracy), so any quantile is reported
+  within `accuracy` relative error however skewed the distribution is.
+  Values below min_ms / above max_ms are clamped into the end buckets and
+  the exact min and max are kept alongside. Memory is one counter per
+  bucket (about 800 for 0.01 ms .. 60 s at 1 %), fixed at construction.
+- Sketches with the same bucket layout merge by adding counters, so a
+  fleet sketch is just the merge of every device sketch.
+
+Recording is O(1) (one log and one increment); quantiles walk the counters
+once for all requested ranks.
+"""
+
+import math
+from array import array
+
+import config
+
+DEFAULT_QUANTILES = (50, 90, 99, 99.9)
+
+
+def quantile_label(q):
+    """Key for a percentile in result dicts: 50 -> 'p50', 99.9 -> 'p999'."""
+    return 'p' + f"{q:g}".replace('.', '')
+
+
+class LatencySketch:
+    """
+    Log-bucketed latency histogram with bounded relative error.
+
+    Usage:
+        sketch = LatencySketch()
+        sketch.add(12.5)
+        sketch.percentiles()          # {'p50': ..., 'p90': ..., 'p99': ..., 'p999': ...}
+        fleet = LatencySketch.merged(device_sketches)
+    """
+
+    def __init__(self, accuracy=None, min_ms=None, max_ms=None):
+        self.accuracy = float(accuracy or config.LATENCY_SKETCH_RELATIVE_ACCURACY)
+        self.min_ms = float(min_ms or config.LATENCY_SKETCH_MIN_MS)
+        self.max_ms = float(max_ms or config.LATENCY_SKETCH_MAX_MS)
+        if not 0.0 < self.accuracy < 1.0 or not 0.0 < self.min_ms < self.max_ms:
+            raise ValueError("LatencySketch needs 0 < accuracy < 1 and 0 < min_ms < max_ms")
+        self.gamma = (1.0 + self.accuracy) / (1.0 - self.accuracy)
+        self._log_gamma = math.log(self.gamma)
+        size = int(math.ceil(math.log(self.max_ms / self.min_ms) / self._log_gamma)) + 1
+        self.counts = array('Q', bytes(8 * size))
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def _layout(self):
+        return (self.accuracy, self.min_ms, self.max_ms)
+
+    def _index(self, value_ms):
+        if value_ms <= self.min_ms:
+            return 0
+        index = int(math.ceil(math.log(value_ms / self.min_ms) / self._log_gamma))
+        return min(index, len(self.counts) - 1)
+
+    def _value(self, index):
+        """Representative value of a bucket (midpoint in relative terms)."""
+        if index == 0:
+            return self.min_ms
+        return self.min_ms * self.gamma ** index * 2.0 / (1.0 + self.gamma)
+
+    def add(self, value_ms):
+        """Record one latency sample (NaN and negative values are ignored)."""
+        if not value_ms >= 0.0:
+            return
+        self.counts[self._index(value_ms)] += 1
+        self.count += 1
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other):
+        """Add another sketch's samples into this one (same layout required)."""
+        if other._layout() != self._layout():
+            raise ValueError("Cannot merge latency sketches with different bucket layouts")
+        counts = self.counts
+        for index, n in enumerate(other.counts):
+            if n:
+                counts[index] += n
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @classmethod
+    def merged(cls, sketches):
+        """New sketch holding the samples of every sketch in `sketches`."""
+        result = None
+        for sketch in sketches:
+            if result is None:
+                result = cls(*sketch._layout())
+            result.merge(sketch)
+        return result if result is not None else cls()
+
+    def clear(self):
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def quantiles(self, qs=DEFAULT_QUANTILES):
+        """
+        Values at percentiles `qs` (ascending, 0-100) in one pass.
+
+        Returns:
+            List of floats (ms), or None entries when the sketch is empty.
+        """
+        if self.count == 0:
+            return [None] * len(qs)
+        ranks = [max(1, math.ceil(q / 100.0 * self.count)) for q in qs]
+        results = []
+        seen = 0
+        r = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while r < len(ranks) and ranks[r] <= seen:
+                # Exact extremes are known; clamp bucket estimates to them
+                results.append(min(max(self._value(index), self.min), self.max))
+                r += 1
+            if r == len(ranks):
+                break
+        return results
+
+    def percentiles(self, qs=DEFAULT_QUANTILES):
+        """{'p50': ms, ...} for `qs`; values are None while the sketch is empty."""
+        return {quantile_label(q): v for q, v in zip(qs, self.quantiles(qs))}
@@ -0,0 +1,225 @@
+"""
+Priority Mailbox v2.02
+
+Bounded, strict-priority mailbox for device workers.
+
+Architecture:
+- Lanes: emergency, control, telemetry, health, in that order. A message
+  is taken from a lane only when every lane before it is empty, so an
+  emergency stop never waits behind queued GET_ polls.
+- Classification: put(message, lane=...) names the lane explicitly.
+  Otherwise classify_message() picks it from the command name:
+  MAILBOX_EMERGENCY_COMMANDS -> emergency, PING/PONG/health -> health,
+  GET_* -> telemetry, everything else -> control.
+- Backpressure: every lane has its own capacity (MAILBOX_LANE_CAPACITY)
+  and policy (MAILBOX_LANE_POLICY):
+    drop_oldest - a full lane discards its oldest message (counted in
+                  `dropped`), so a stuck device holds a bounded backlog
+                  of the freshest telemetry
+    block       - put() waits for room (queue.Full after `timeout`);
+                  put_nowait() raises queue.Full at once
+  broadcast_emergency() always uses put_nowait(), so a full emergency
+  lane on one device is reported instead of stalling the fleet-wide stop.
+  Never use block on a lane the worker itself, or the UDP receive thread,
+  puts into. Blocking there stalls the thread that would make room.
+- Wakeup: put() calls the waker set by the WorkerPool task
+  (core/worker_pool.py), so a message is handled without any polling.
+  get_batch() returns every queued emergency message. Below the emergency
+  lane it returns one message per call, so a newly arrived emergency
+  message waits for at most the one message already being handled.
+  Locating the next message scans at most the four lanes.
+
+put(), put_nowait(), get_nowait() and empty() follow queue.Queue, so
+existing producers and pollers work unchanged.
+"""
+
+import collections
+import queue
+import threading
+import time
+
+import config
+
+EMERGENCY = 'emergency'
+CONTROL = 'control'
+TELEMETRY = 'telemetry'
+HEALTH = 'health'
+LANES = (EMERGENCY, CONTROL, TELEMETRY, HEALTH)  # Highest priority first
+
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+_HEALTH_COMMANDS = frozenset(('PING', 'PONG', 'HEALTH'))
+
+
+def _command_of(message):
+    """Command name of a mailbox message (dict, (cmd, payload) tuple or CSV string)."""
+    if isinstance(message, dict):
+        return message.get('command') or ''
+    if isinstance(message, tuple) and message:
+        return str(message[0])
+    if isinstance(message, str):
+        return message.split(',', 1)[0].split(':', 1)[0].strip()
+    return ''
+
+
+def classify_message(message, emergency_commands=None):
+    """Lane for a message: an explicit dict "lane" key wins, then the command name decides."""
+    if isinstance(message, dict) and message.get('lane') in LANES:
+        return message['lane']
+    command = _command_of(message)
+    if emergency_commands is None:
+        emergency_commands = config.MAILBOX_EMERGENCY_COMMANDS
+    if command in emergency_commands:
+        return EMERGENCY
+    if command in _HEALTH_COMMANDS:
+        return HEALTH
+    if command.startswith('GET_'):
+        return TELEMETRY
+    return CONTROL
+
+
+class PriorityMailbox:
+    """
+    Strict-priority, per-lane bounded mailbox.
+
+    Usage:
+        mailbox = PriorityMailbox()
+        mailbox.put({"command": "GET_STATUS"})              # telemetry lane
+        mailbox.put({"command": "ESTOP"})                   # emergency lane, taken first
+        mailbox.put(message, lane=CONTROL)                  # explicit lane
+        mailbox.get_nowait()                                 # {"command": "ESTOP"}
+    """
+
+    def __init__(self, capacities=None, policies=None, classify=None):
+        capacities = dict(config.MAILBOX_LANE_CAPACITY, **(capacities or {}))
+        policies = dict(config.MAILBOX_LANE_POLICY, **(policies or {}))
+        for lane in LANES:
+            if policies[lane] not in (DROP_OLDEST, BLOCK):
+                raise ValueError(f"Unknown mailbox policy for {lane}: {policies[lane]!r}")
+        self.capacities = capacities
+        self.policies = policies
+        if classify is None:
+            emergency_commands = frozenset(config.MAILBOX_EMERGENCY_COMMANDS)
+            classify = lambda message: classify_message(message, emergency_commands)  # noqa: E731
+        self.classify = classify
+        self.dropped = dict.fromkeys(LANES, 0)
+        self._lanes = [collections.deque() for _ in LANES]
+        self._index = {lane: i for i, lane in enumerate(LANES)}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._blocked = 0  # Producers waiting in put() on a full block lane
+        self._waker = None
+
+    def __len__(self):
+        return self._count
+
+    def empty(self):
+        return self._count == 0
+
+    def qsize(self):
+        return self._count
+
+    def lane_size(self, lane):
+        return len(self._lanes[self._index[lane]])
+
+    def set_waker(self, waker):
+        """Callable invoked after every accepted put() (None to detach)."""
+        self._waker = waker
+
+    def put(self, item, block=True, timeout=None, lane=None):
+        """
+        Queue a message in its lane (classified when lane is None).
+
+        Raises:
+            queue.Full: a block lane stayed full for `timeout` seconds (or at once if not block)
+        """
+        index = self._index[lane or self.classify(item)]
+        items = self._lanes[index]
+        name = LANES[index]
+        capacity = self.capacities[name]
+        with self._lock:
+            if len(items) >= capacity:
+                if self.policies[name] == DROP_OLDEST:
+                    items.popleft()
+                    self._count -= 1
+                    self.dropped[name] += 1
+                elif not block:
+                    raise queue.Full
+                else:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while len(items) >= capacity:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise queue.Full
+                        self._blocked += 1
+                        try:
+                            self._not_full.wait(remaining)
+                        finally:
+                            self._blocked -= 1
+            items.append(item)
+            self._count += 1
+        waker = self._waker
+        if waker is not None:
+            waker()
+
+    def put_nowait(self, item, lane=None):
+        self.put(item, block=False, lane=lane)
+
+    def get_batch(self, max_items):
+        """
+        Next messages in strict priority order (never blocks).
+
+        All queued emergency messages (up to max_items), otherwise at most one
+        message from the highest non-empty lane.
+        """
+        with self._lock:
+            if not self._count or max_items <= 0:
+                return []
+            emergency, control, telemetry, health = self._lanes
+            if emergency:
+                batch = [emergency.popleft() for _ in range(min(max_items, len(emergency)))]
+            else:
+                batch = [(control or telemetry or health).popleft()]
+            self._count -= len(batch)
+            if self._blocked:
+                self._not_full.notify_all()
+            return batch
+
+    def get_nowait(self):
+        """Highest-priority message; raises queue.Empty if there is none."""
+        batch = self.get_batch(1)
+        if not batch:
+            raise queue.Empty
+        return batch[0]
+
+    def stats(self):
+        """{lane: {"queued": n, "dropped": n}} for status displays."""
+        with self._lock:
+            return {lane: {'queued': len(self._lanes[i]), 'dropped': self.dropped[lane]}
+                    for i, lane in enumerate(LANES)}
+
+
+def broadcast_emergency(mailboxes, message):
+    """
+    Put one message into the emergency lane of every mailbox (the shared emergency mailbox).
+
+    Never blocks: a mailbox whose emergency lane is full (a stuck device)
+    is skipped and reported, so it cannot hold up the stop for the rest
+    of the fleet.
+
+    Returns:
+        The mailboxes that refused the message (empty when all accepted it).
+    """
+    refused = []
+    total = 0
+    for total, mailbox in enumerate(mailboxes, 1):
+        try:
+            mailbox.put_nowait(message, lane=EMERGENCY)
+        except queue.Full:
+            refused.append(mailbox)
+    if refused:
+        print(f"[Mailbox] WARNING: emergency lane full in {len(refused)} of {total} mailbox(es), "
+              f"{_command_of(message)!r} not queued there")
+    return refused
@@ -0,0 +1,165 @@
+"""
+Command Pipeline v2.02
+
+Sliding-window command sender for sequenced devices.
+
+Stop-and-wait caps a device at one command per round trip. CommandPipeline
+keeps up to `window` commands in flight on one DeviceChannel and matches
+each tagged reply to its request through the transport's InFlightTable, so
+throughput scales with the window on high-latency links.
+
+Architecture:
+- PipelineCommand: One submitted command (message, future, seq, attempt).
+- CommandPipeline: FIFO backlog plus an in-flight dict keyed by sequence
+  number. Replies complete the command's future and free a window slot;
+  timeouts retransmit under the same sequence number with exponential
+  backoff (TIMEOUT_SECONDS, x PIPELINE_BACKOFF_FACTOR per attempt) until
+  RETRY_COUNT retransmissions have failed.
+
+Timeout and retry defaults come from the device config module
+(capstanDrive_config.TIMEOUT_SECONDS / RETRY_COUNT); the window size and
+backoff factor from config.py.
+
+Completion is reported both through concurrent.futures.Future objects
+returned by submit() and through the command_completed / command_failed
+signals. The pipeline must be used from the thread it lives in (normally
+the GUI thread); channel signals reach it as queued events.
+"""
+
+from collections import deque
+from concurrent.futures import Future
+from PySide6.QtCore import QObject, Signal
+import config
+
+
+class PipelineCommand:
+    """A command submitted to a CommandPipeline."""
+
+    __slots__ = ('message', 'future', 'seq', 'attempt', 'timeout')
+
+    def __init__(self, message, timeout):
+        self.message = message
+        self.future = Future()
+        self.seq = None
+        self.attempt = 0
+        self.timeout = timeout
+
+
+class CommandPipeline(QObject):
+    """
+    Keep up to `window` commands in flight on one sequenced DeviceChannel.
+
+    Usage:
+        pipeline = CommandPipeline(channel, device_config=capstanDrive_config)
+        future = pipeline.submit("LED,1,toggle")
+        future.add_done_callback(lambda f: print(f.result()))  # reply payload
+    """
+
+    command_completed = Signal(str, str, float)  # message, reply payload, rtt_ms
+    command_failed = Signal(str, str)  # message, reason
+    drained = Signal()  # Backlog and window both empty
+
+    def __init__(self, channel, device_config=None, window=None, timeout=None, retries=None,
+                 backoff=None, parent=None):
+        """
+        Args:
+            channel:       DeviceChannel with sequence numbers enabled.
+            device_config: Device config module providing TIMEOUT_SECONDS and RETRY_COUNT.
+            window:        Max commands in flight (default config.PIPELINE_WINDOW_SIZE).
+            timeout:       First-attempt timeout in seconds (overrides TIMEOUT_SECONDS).
+            retries:       Retransmissions before failing (overrides RETRY_COUNT).
+            backoff:       Timeout multiplier per retransmission (default config.PIPELINE_BACKOFF_FACTOR).
+        """
+        super().__init__(parent)
+        if not channel.sequenced:
+            raise ValueError(
+                f"CommandPipeline needs a sequenced channel; set \"sequence_numbers\": true "
+                f"for {channel.client_name} in servers.json"
+            )
+        self.channel = channel
+        self.window = max(1, int(window or config.PIPELINE_WINDOW_SIZE))
+        self.timeout = timeout or getattr(device_config, 'TIMEOUT_SECONDS', config.UDP_REQUEST_TIMEOUT_S)
+        self.retries = retries if retries is not None else getattr(device_config, 'RETRY_COUNT', 0)
+        self.backoff = backoff or config.PIPELINE_BACKOFF_FACTOR
+
+        self._backlog = deque()  # PipelineCommands not yet sent
+        self._in_flight = {}  # {seq: PipelineCommand}
+
+        channel.reply_received.connect(self._on_reply_received)
+        channel.request_timed_out.connect(self._on_request_timed_out)
+
+    def __len__(self):
+        """Commands submitted and not yet completed or failed."""
+        return len(self._backlog) + len(self._in_flight)
+
+    @property
+    def in_flight(self):
+        """Number of commands currently awaiting a reply."""
+        return len(self._in_flight)
+
+    def submit(self, message):
+        """Queue a command and return a Future resolved with the reply payload."""
+        command = PipelineCommand(message, self.timeout)
+        self._backlog.append(command)
+        self._fill_window()
+        return command.future
+
+    def close(self):
+        """Fail every outstanding command and detach from the channel."""
+        self.channel.reply_received.disconnect(self._on_reply_received)
+        self.channel.request_timed_out.disconnect(self._on_request_timed_out)
+        inflight = self.channel.transport.inflight
+        for seq, command in list(self._in_flight.items()):
+            inflight.resolve(self.channel.address, seq)
+            self._fail(command, "Pipeline closed")
+        self._in_flight.clear()
+        while self._backlog:
+            command = self._backlog.popleft()
+            command.future.cancel()
+
+    def _fill_window(self):
+        """Send backlog commands until the window is full."""
+        while self._backlog and len(self._in_flight) < self.window:
+            command = self._backlog.popleft()
+            if not command.future.set_running_or_notify_cancel():
+                continue  # Cancelled by the caller before it was sent
+            self._transmit(command)
+        if not self._backlog and not self._in_flight:
+            self.drained.emit()
+
+    def _transmit(self, command):
+        """Send (or retransmit) a command under its sequence number."""
+        command.attempt += 1
+        seq = self.channel.send_message(command.message, seq=command.seq, timeout=command.timeout)
+        if seq is None:
+            self._in_flight.pop(command.seq, None)
+            self._fail(command, "Send failed", ConnectionError)
+            return
+        command.seq = seq
+        self._in_flight[seq] = command
+
+    def _on_reply_received(self, seq, payload, rtt_ms):
+        command = self._in_flight.pop(seq, None)
+        if command is None:
+            return  # Reply to a request sent outside the pipeline
+        command.future.set_result(payload)
+        self.command_completed.emit(command.message, payload, rtt_ms)
+        self._fill_window()
+
+    def _on_request_timed_out(self, seq, message):
+        command = self._in_flight.get(seq)
+        if command is None:
+            return
+        if command.attempt <= self.retries:
+            command.timeout *= self.backoff
+            self._transmit(command)
+            if seq in self._in_flight:
+                return  # Retransmitted; the window slot stays taken
+        else:
+            del self._in_flight[seq]
+            self._fail(command, f"No reply after {command.attempt} attempt(s)")
+        self._fill_window()
+
+    def _fail(self, command, reason, error=TimeoutError):
+        command.future.set_exception(error(f"{command.message}: {reason}"))
+        self.command_failed.emit(command.message, reason)
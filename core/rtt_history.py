@@ -0,0 +1,277 @@
+"""
+RTT History v2.02
+
+Persistent per-device round-trip-time history with automatic downsampling.
+
+Architecture:
+- SeriesFile: Append-only file of fixed-size binary records behind a small
+  header, memory-mapped for reads and writes. The file grows in chunks, so
+  appends are a struct.pack_into plus a header update. Records are in time
+  order, so a range query binary-searches the start and unpacks only the
+  matching slice - weeks of data never have to be loaded.
+- DeviceHistory: One device's three tiers:
+    <name>.raw  every sample      (timestamp, rtt_ms, ok)
+    <name>.1m   1-minute rollups  (start, count, failures, min, avg, max, p99)
+    <name>.1h   1-hour rollups    (same layout)
+  Rollups are accumulated in memory and written when a sample crosses the
+  bucket boundary; on reopen the open buckets are rebuilt from the raw tail.
+- RttHistory: Directory of DeviceHistory objects keyed by device name.
+
+Timestamps are time.time() seconds (UTC epoch); failed checks are stored
+with ok=0 and rtt NaN and count towards each bucket's failures. One process
+should write a directory at a time (the GUI and health_daemon.py default to
+config.HEALTH_HISTORY_DIR; point the daemon elsewhere with --history-dir if
+both run).
+"""
+
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+
+HEADER = struct.Struct('<4sHHQ')  # magic, version, record size, record count
+MAGIC = b'RTTS'
+VERSION = 1
+RAW_RECORD = struct.Struct('<dfB3x')  # timestamp, rtt_ms, ok
+ROLLUP_RECORD = struct.Struct('<dIIffff')  # bucket start, count, failures, min, avg, max, p99
+GROW_RECORDS = 4096  # Records added per file growth step
+
+TIERS = {
+    '1m': 60.0,
+    '1h': 3600.0,
+}
+
+
+def _percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return math.nan
+    rank = max(0, math.ceil(q / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+class SeriesFile:
+    """Append-only, memory-mapped file of fixed-size time-ordered records."""
+
+    def __init__(self, path, record):
+        self.path = path
+        self.record = record
+        self.count = 0
+        self._capacity = 0
+        self._mm = None
+
+        new = not os.path.exists(path) or os.path.getsize(path) < HEADER.size
+        self._file = open(path, 'w+b' if new else 'r+b')
+        if new:
+            self._file.write(HEADER.pack(MAGIC, VERSION, record.size, 0))
+            self._file.flush()
+        self._map(max(os.path.getsize(path), HEADER.size + GROW_RECORDS * record.size))
+
+        magic, version, record_size, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != record.size:
+            self.close()
+            raise ValueError(f"{path}: not an RTT series file of this format")
+        self.count = count
+
+    def _map(self, size):
+        """(Re)map the file at `size` bytes, growing it first if needed."""
+        if self._mm is not None:
+            self._mm.close()  # Windows cannot resize a file while it is mapped
+        if os.path.getsize(self.path) < size:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._capacity = (size - HEADER.size) // self.record.size
+
+    def __len__(self):
+        return self.count
+
+    def append(self, *fields):
+        """Append one record."""
+        if self.count >= self._capacity:
+            self._map(HEADER.size + (self._capacity + GROW_RECORDS) * self.record.size)
+        self.record.pack_into(self._mm, HEADER.size + self.count * self.record.size, *fields)
+        self.count += 1
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.record.size, self.count)
+
+    def read(self, index):
+        """Unpack record `index`."""
+        return self.record.unpack_from(self._mm, HEADER.size + index * self.record.size)
+
+    def timestamp(self, index):
+        # Every record layout starts with its double timestamp
+        return struct.unpack_from('<d', self._mm, HEADER.size + index * self.record.size)[0]
+
+    def bisect(self, timestamp):
+        """Index of the first record at or after `timestamp`."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start, end):
+        """Records with start <= timestamp < end, oldest first."""
+        first = self.bisect(start)
+        last = self.bisect(end)
+        if last <= first:
+            return []
+        offset = HEADER.size + first * self.record.size
+        data = self._mm[offset:HEADER.size + last * self.record.size]
+        return list(self.record.iter_unpack(data))
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+class _Bucket:
+    """In-memory accumulator for one open rollup bucket."""
+
+    __slots__ = ('start', 'count', 'failures', 'rtts')
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.failures = 0
+        self.rtts = []
+
+    def add(self, rtt_ms, ok):
+        self.count += 1
+        if ok:
+            self.rtts.append(rtt_ms)
+        else:
+            self.failures += 1
+
+    def fields(self):
+        rtts = sorted(self.rtts)
+        if rtts:
+            summary = (rtts[0], math.fsum(rtts) / len(rtts), rtts[-1], _percentile(rtts, 99))
+        else:
+            summary = (math.nan,) * 4
+        return (self.start, self.count, self.failures) + summary
+
+
+class DeviceHistory:
+    """Raw samples plus 1-minute and 1-hour rollups for one device."""
+
+    def __init__(self, directory, name):
+        self.name = name
+        base = os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]', '_', name))
+        self.raw = SeriesFile(base + '.raw', RAW_RECORD)
+        self.tiers = {tier: SeriesFile(f"{base}.{tier}", ROLLUP_RECORD) for tier in TIERS}
+        self._buckets = {tier: None for tier in TIERS}
+        self._last_timestamp = self.raw.timestamp(self.raw.count - 1) if self.raw.count else 0.0
+        self._recover_open_buckets()
+
+    def _recover_open_buckets(self):
+        """Re-feed raw samples newer than each tier's last written bucket."""
+        for tier, width in TIERS.items():
+            series = self.tiers[tier]
+            resume = series.timestamp(series.count - 1) + width if series.count else 0.0
+            for timestamp, rtt_ms, ok in self.raw.range(resume, math.inf):
+                self._add_to_tier(tier, width, timestamp, rtt_ms, ok)
+
+    def record(self, timestamp, rtt_ms, ok):
+        """Append a sample (rtt_ms is ignored for failures) and roll it up."""
+        if not ok:
+            rtt_ms = math.nan
+        # Keep the file sorted even if the wall clock steps backwards
+        timestamp = max(timestamp, self._last_timestamp)
+        self._last_timestamp = timestamp
+        self.raw.append(timestamp, rtt_ms, 1 if ok else 0)
+        for tier, width in TIERS.items():
+            self._add_to_tier(tier, width, timestamp, rtt_ms, ok)
+
+    def _add_to_tier(self, tier, width, timestamp, rtt_ms, ok):
+        start = math.floor(timestamp / width) * width
+        bucket = self._buckets[tier]
+        if bucket is not None and bucket.start != start:
+            self.tiers[tier].append(*bucket.fields())
+            bucket = None
+        if bucket is None:
+            bucket = self._buckets[tier] = _Bucket(start)
+        bucket.add(rtt_ms, ok)
+
+    def query(self, start, end, tier='raw'):
+        """
+        Records with start <= timestamp < end.
+
+        tier 'raw' returns (timestamp, rtt_ms, ok); '1m' / '1h' return
+        (start, count, failures, min, avg, max, p99), including the bucket
+        still being filled.
+        """
+        if tier == 'raw':
+            return self.raw.range(start, end)
+        rows = self.tiers[tier].range(start, end)
+        bucket = self._buckets[tier]
+        if bucket is not None and start <= bucket.start < end:
+            rows.append(bucket.fields())
+        return rows
+
+    def flush(self):
+        self.raw.flush()
+        for series in self.tiers.values():
+            series.flush()
+
+    def close(self):
+        """Close the files; open buckets are rebuilt from the raw tail on reopen."""
+        self.raw.close()
+        for series in self.tiers.values():
+            series.close()
+
+
+class RttHistory:
+    """
+    Per-device RTT history files in one directory.
+
+    Usage:
+        history = RttHistory("data/health_history")
+        history.record("capstanDrive", time.time(), 12.5, True)
+        history.query("capstanDrive", start, end, tier="1h")
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.devices = {}  # {name: DeviceHistory}
+        self._lock = threading.Lock()
+
+    def device(self, name):
+        """Open (or return the already open) history for a device."""
+        with self._lock:
+            history = self.devices.get(name)
+            if history is None:
+                history = self.devices[name] = DeviceHistory(self.directory, name)
+            return history
+
+    def record(self, name, timestamp, rtt_ms, ok):
+        history = self.device(name)
+        with self._lock:
+            history.record(timestamp, rtt_ms, ok)
+
+    def query(self, name, start, end, tier='raw'):
+        history = self.device(name)
+        with self._lock:
+            return history.query(start, end, tier)
+
+    def flush(self):
+        with self._lock:
+            for history in self.devices.values():
+                history.flush()
+
+    def close(self):
+        with self._lock:
+            for history in self.devices.values():
+                history.close()
+            self.devices.clear()
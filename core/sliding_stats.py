@@ -0,0 +1,112 @@
+"""
+Sliding Window Statistics v2.02
+
+O(1) running statistics over the last N samples, for per-PONG health
+evaluation on the GUI thread.
+
+Architecture:
+- SlidingWindowStats: Fixed-length window of floats with a running mean and
+  sum of squared deviations (Welford's update, extended to evict the oldest
+  sample once the window is full) plus a running count of samples above a
+  threshold. append() and every accessor are O(1); nothing rescans the
+  window.
+- SlidingCounter: Fixed-length window of booleans with a running count of
+  False entries (failures).
+"""
+
+import math
+from collections import deque
+
+
+class SlidingWindowStats:
+    """
+    Mean, sample standard deviation and over-threshold count of the last `maxlen` samples.
+
+    Usage:
+        stats = SlidingWindowStats(18)
+        stats.append(rtt_ms)
+        stats.mean, stats.stdev, stats[-1]
+    """
+
+    def __init__(self, maxlen, threshold=None):
+        self.maxlen = int(maxlen)
+        self.threshold = threshold  # Samples above this are counted in .above
+        self.values = deque(maxlen=self.maxlen)
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self.above = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def append(self, x):
+        """Add a sample, evicting the oldest once the window is full."""
+        values = self.values
+        threshold = self.threshold
+        if len(values) == self.maxlen:
+            old = values[0]
+            values.append(x)
+            # Replace `old` by `x` without changing n
+            old_mean = self.mean
+            self.mean = old_mean + (x - old) / self.maxlen
+            self._m2 += (x - old) * (x - self.mean + old - old_mean)
+            if threshold is not None and old > threshold:
+                self.above -= 1
+        else:
+            values.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(values)
+            self._m2 += delta * (x - self.mean)
+        if self._m2 < 0.0:
+            self._m2 = 0.0  # Rounding can push a near-zero spread negative
+        if threshold is not None and x > threshold:
+            self.above += 1
+
+    def clear(self):
+        """Drop every sample."""
+        self.values.clear()
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.above = 0
+
+    @property
+    def variance(self):
+        """Sample variance (0.0 with fewer than two samples)."""
+        n = len(self.values)
+        return self._m2 / (n - 1) if n > 1 else 0.0
+
+    @property
+    def stdev(self):
+        """Sample standard deviation (0.0 with fewer than two samples)."""
+        return math.sqrt(self.variance)
+
+
+class SlidingCounter:
+    """Last `maxlen` pass/fail results with a running failure count."""
+
+    def __init__(self, maxlen):
+        self.maxlen = int(maxlen)
+        self.values = deque(maxlen=self.maxlen)
+        self.failures = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def append(self, success):
+        """Add a result, evicting the oldest once the window is full."""
+        if len(self.values) == self.maxlen and not self.values[0]:
+            self.failures -= 1
+        self.values.append(success)
+        if not success:
+            self.failures += 1
+
+    def clear(self):
+        """Drop every result."""
+        self.values.clear()
+        self.failures = 0
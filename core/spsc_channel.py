@@ -0,0 +1,110 @@
+"""
+SPSC Channel v2.02
+
+Single-producer / single-consumer ring buffer for the datagram hot path,
+from the transport receive thread to one device worker.
+
+Architecture:
+- Slots: a list preallocated to a power-of-two capacity. The producer
+  owns `_tail`, the consumer owns `_head`. Both are ever-increasing
+  counters, and a slot is `counter & mask`. push() stores the item and
+  then publishes it by advancing `_tail`. pop_batch() reads everything
+  between `_head` and `_tail` as one or two slice copies, clears those
+  slots and advances `_head`. Neither side takes a lock or touches a
+  condition variable per message.
+- Full ring: the receive thread must never block, so push() drops the new
+  item and counts it in `dropped` (the caller is told with False).
+- Wakeup: the waker (a WorkerPool task, core/worker_pool.py) is called
+  only when a push finds the ring empty. A consumer that is still
+  draining finds later items itself, because WorkerTask re-checks
+  len() under its lock before going idle. A burst of N datagrams
+  therefore costs one wakeup, not N.
+
+Correctness relies on exactly one producer thread and one consumer thread
+per channel, and on the GIL making a single list-slot or attribute store
+atomic and visible in program order. It is not safe on free-threaded
+(no-GIL) builds. benchmarks/spsc_bench.py compares it with queue.Queue
+and collections.deque.
+"""
+
+import config
+
+
+class SPSCChannel:
+    """
+    Lock-free single-producer/single-consumer ring of fixed capacity.
+
+    Usage:
+        channel = SPSCChannel(1024)
+        channel.push((payload_bytes, rx_ns))     # receive thread only
+        for payload, rx_ns in channel.pop_batch(64):   # worker only
+            ...
+    """
+
+    __slots__ = ('capacity', '_mask', '_slots', '_head', '_tail', '_waker', 'dropped')
+
+    def __init__(self, capacity=None):
+        capacity = config.SPSC_CHANNEL_CAPACITY if capacity is None else capacity
+        if capacity < 1:
+            raise ValueError("SPSCChannel capacity must be at least 1")
+        size = 1 << (capacity - 1).bit_length()  # Round up to a power of two
+        self.capacity = size
+        self._mask = size - 1
+        self._slots = [None] * size
+        self._head = 0  # Next slot to read (consumer only)
+        self._tail = 0  # Next slot to write (producer only)
+        self._waker = None
+        self.dropped = 0  # Items refused because the ring was full (producer only)
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def empty(self):
+        return self._tail == self._head
+
+    def set_waker(self, waker):
+        """Callable invoked when a push finds the ring empty (None to detach)."""
+        self._waker = waker
+
+    def push(self, item):
+        """Append an item (producer thread only); False if the ring was full and it was dropped."""
+        tail = self._tail
+        if tail - self._head >= self.capacity:
+            self.dropped += 1
+            return False
+        self._slots[tail & self._mask] = item
+        self._tail = tail + 1  # Publish only after the slot is written
+        # Re-read _head after publishing: a consumer that drained in between must be woken
+        if tail == self._head and self._waker is not None:
+            self._waker()
+        return True
+
+    def put(self, item, block=True, timeout=None):
+        """Mailbox-style alias for push(); never blocks (a full ring drops the item)."""
+        self.push(item)
+
+    def pop_batch(self, max_items=None):
+        """Up to max_items items, oldest first (consumer thread only; never blocks)."""
+        head = self._head
+        count = self._tail - head
+        if max_items is not None and count > max_items:
+            count = max_items
+        if count <= 0:
+            return []
+        slots = self._slots
+        start = head & self._mask
+        end = start + count
+        if end <= self.capacity:
+            batch = slots[start:end]
+            slots[start:end] = [None] * count
+        else:
+            end -= self.capacity
+            batch = slots[start:] + slots[:end]
+            slots[start:] = [None] * (self.capacity - start)
+            slots[:end] = [None] * end
+        self._head = head + count  # Hand the slots back to the producer last
+        return batch
+
+    def get_batch(self, max_items):
+        """WorkerPool mailbox protocol: same as pop_batch()."""
+        return self.pop_batch(max_items)
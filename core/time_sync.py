@@ -0,0 +1,243 @@
+"""
+Clock Sync v2.02
+
+NTP-style clock offset and drift estimation for edge devices.
+
+Architecture:
+- Wire format (text datagrams, times in epoch milliseconds with 3 decimals):
+    host   -> device   SYNC:<t1>              t1 = host transmit time
+    device -> host     SYNC:<t1>:<t2>:<t3>    t2 = device receive, t3 = device transmit
+    host   -> device   SYNC:ADJ:<+/-ms>       step the device clock by ms (no reply)
+  The host stamps t4 when the reply arrives. Per exchange:
+    offset = ((t2 - t1) + (t3 - t4)) / 2     device clock minus host clock
+    delay  = (t4 - t1) - (t3 - t2)           network round trip
+- ClockEstimator: Per-device filter over the last CLOCK_SYNC_FILTER_SIZE
+  exchanges. The offset estimate is taken from the minimum-delay sample
+  (the NTP clock filter: queueing only ever adds delay and asymmetry), and
+  drift is the least-squares slope of offset against host time, in ppm.
+- ClockSync: Qt-free manager. run_due() sends SYNC requests (a quick burst
+  until an estimate exists, then every CLOCK_SYNC_INTERVAL_S; a device that
+  leaves a whole burst unanswered is retried at the slow interval) and
+  returns the next deadline; unsynced() lists devices without an estimate,
+  which still need ZULU time sets; handle_reply() feeds an exchange in and sends a
+  correction only when the predicted offset exceeds
+  CLOCK_SYNC_CORRECTION_THRESHOLD_MS. Stored samples are shifted by each
+  applied correction, so the drift estimate survives clock steps.
+  A step the estimator did not choose (a ZULU time set) is reported with
+  clock_stepped(): the device's samples are discarded, replies to SYNCs
+  sent before the step are ignored, and a new burst starts.
+
+Channels need send_time_sync() and send_time_correction(ms)
+(core/transport.py DeviceChannel). All public methods are thread-safe.
+"""
+
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+import config
+
+SyncSample = namedtuple('SyncSample', 't1 t2 t3 t4 offset_ms delay_ms')
+
+
+def sync_request(t1_ms):
+    """SYNC request carrying the host transmit time."""
+    return f"SYNC:{t1_ms:.3f}"
+
+
+def parse_sync_reply(message):
+    """Return (t1, t2, t3) from 'SYNC:<t1>:<t2>:<t3>', or None if malformed."""
+    parts = message.split(':')
+    if len(parts) != 4 or parts[0] != 'SYNC':
+        return None
+    try:
+        return float(parts[1]), float(parts[2]), float(parts[3])
+    except ValueError:
+        return None
+
+
+def correction_message(correction_ms):
+    """Instruction to step the device clock by correction_ms."""
+    return f"SYNC:ADJ:{correction_ms:+.3f}"
+
+
+class ClockEstimator:
+    """Filtered offset, delay and drift for one device."""
+
+    def __init__(self, filter_size=None):
+        self.samples = deque(maxlen=filter_size or config.CLOCK_SYNC_FILTER_SIZE)
+        self.corrections = 0
+        self.not_before_ms = 0.0  # Exchanges with an earlier t1 straddle a clock step
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, t1, t2, t3, t4):
+        """Add one four-timestamp exchange and return its SyncSample."""
+        offset = ((t2 - t1) + (t3 - t4)) / 2.0
+        delay = max(0.0, (t4 - t1) - (t3 - t2))
+        sample = SyncSample(t1, t2, t3, t4, offset, delay)
+        self.samples.append(sample)
+        return sample
+
+    def best(self):
+        """Minimum-delay sample in the filter window, or None."""
+        if not self.samples:
+            return None
+        return min(self.samples, key=lambda sample: sample.delay_ms)
+
+    @property
+    def ready(self):
+        return len(self.samples) >= config.CLOCK_SYNC_MIN_SAMPLES
+
+    @property
+    def drift_ppm(self):
+        """Least-squares slope of offset over host time (ppm), or 0.0 without a time span."""
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        mean_t = math.fsum(s.t4 for s in self.samples) / n
+        mean_o = math.fsum(s.offset_ms for s in self.samples) / n
+        var_t = math.fsum((s.t4 - mean_t) ** 2 for s in self.samples)
+        if var_t == 0.0:
+            return 0.0
+        cov = math.fsum((s.t4 - mean_t) * (s.offset_ms - mean_o) for s in self.samples)
+        return cov / var_t * 1e6
+
+    def predicted_offset(self, now_ms):
+        """Offset (ms) expected at host time now_ms: best sample plus drift since it."""
+        best = self.best()
+        if best is None:
+            return None
+        return best.offset_ms + self.drift_ppm * 1e-6 * (now_ms - best.t4)
+
+    def apply_correction(self, correction_ms):
+        """The device clock was stepped by correction_ms: shift the stored offsets with it."""
+        self.samples = deque(
+            (s._replace(offset_ms=s.offset_ms + correction_ms) for s in self.samples),
+            maxlen=self.samples.maxlen,
+        )
+        self.corrections += 1
+
+    def reset(self, now_ms=None):
+        """The device clock was set by other means: forget every sample taken before now_ms."""
+        self.samples.clear()
+        self.not_before_ms = time.time() * 1000.0 if now_ms is None else now_ms
+
+    def status(self, now_ms=None):
+        best = self.best()
+        now_ms = time.time() * 1000.0 if now_ms is None else now_ms
+        return {
+            'samples': len(self.samples),
+            'offset_ms': self.predicted_offset(now_ms),
+            'delay_ms': best.delay_ms if best else None,
+            'drift_ppm': self.drift_ppm,
+            'corrections': self.corrections,
+        }
+
+
+class ClockSync:
+    """
+    Time-sync exchanges and corrections for a set of device channels.
+
+    Usage:
+        sync = ClockSync()
+        sync.register("capstanDrive", channel)
+        channel.time_sync_received.connect(sync.handle_reply)
+        deadline = sync.run_due()     # again at `deadline` (time.monotonic())
+    """
+
+    def __init__(self):
+        self.channels = {}  # {name: channel}
+        self.estimators = {}  # {name: ClockEstimator}
+        self.next_sync = {}  # {name: time.monotonic() of its next SYNC}
+        self.unanswered = {}  # {name: SYNCs sent since the last reply}
+        self._lock = threading.Lock()
+
+    def register(self, name, channel):
+        """Start syncing a device (its first SYNC goes out on the next run_due())."""
+        with self._lock:
+            self.channels[name] = channel
+            self.estimators.setdefault(name, ClockEstimator())
+            self.next_sync[name] = time.monotonic()
+            self.unanswered[name] = 0
+
+    def unregister(self, name):
+        with self._lock:
+            self.channels.pop(name, None)
+            self.next_sync.pop(name, None)
+            self.unanswered.pop(name, None)
+
+    def unregister_all(self):
+        with self._lock:
+            self.channels.clear()
+            self.next_sync.clear()
+            self.unanswered.clear()
+
+    def unsynced(self):
+        """{name: channel} of registered devices without a usable estimate (they need ZULU)."""
+        with self._lock:
+            return {name: channel for name, channel in self.channels.items()
+                    if not self.estimators[name].ready}
+
+    def run_due(self, now=None):
+        """Send every SYNC that is due and return the next deadline (or None when idle)."""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            for name, when in self.next_sync.items():
+                if when <= now:
+                    # Burst until the filter has enough samples, then settle; a device
+                    # that ignored a whole burst (no SYNC support) is only retried slowly
+                    burst = (not self.estimators[name].ready
+                             and self.unanswered[name] < config.CLOCK_SYNC_MIN_SAMPLES)
+                    interval = config.CLOCK_SYNC_BURST_INTERVAL_S if burst else config.CLOCK_SYNC_INTERVAL_S
+                    self.unanswered[name] += 1
+                    self.next_sync[name] = now + interval
+                    due.append(self.channels[name])
+            deadline = min(self.next_sync.values()) if self.next_sync else None
+        for channel in due:
+            channel.send_time_sync()
+        return deadline
+
+    def handle_reply(self, name, t1, t2, t3, t4):
+        """Record an exchange; send a correction when the offset exceeds the threshold."""
+        with self._lock:
+            channel = self.channels.get(name)
+            estimator = self.estimators.get(name)
+            if channel is None or estimator is None or t1 < estimator.not_before_ms:
+                return
+            self.unanswered[name] = 0
+            estimator.add(t1, t2, t3, t4)
+            if not estimator.ready:
+                return
+            offset = estimator.predicted_offset(time.time() * 1000.0)
+            if abs(offset) <= config.CLOCK_SYNC_CORRECTION_THRESHOLD_MS:
+                return
+            correction = -offset
+            estimator.apply_correction(correction)
+        channel.send_time_correction(correction)
+
+    def clock_stepped(self, name=None):
+        """
+        A device clock (every device when name is None) was set outside ClockSync,
+        e.g. by ZULU: restart its estimate with a new SYNC burst.
+        """
+        now = time.monotonic()
+        with self._lock:
+            names = list(self.estimators) if name is None else [name]
+            for name in names:
+                estimator = self.estimators.get(name)
+                if estimator is None:
+                    continue
+                estimator.reset()
+                if name in self.next_sync:
+                    self.next_sync[name] = now
+                    self.unanswered[name] = 0
+
+    def status(self, name):
+        """{'samples', 'offset_ms', 'delay_ms', 'drift_ppm', 'corrections'} or None."""
+        with self._lock:
+            estimator = self.estimators.get(name)
+            return estimator.status() if estimator is not None else None
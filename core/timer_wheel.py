@@ -0,0 +1,119 @@
+"""
+Timing Wheel v2.02
+
+Hashed timing wheel for large numbers of short, usually-cancelled timeouts
+(one per outstanding health ping).
+
+Architecture:
+- TimerWheel: A ring of slots, one per tick. A timeout lands in the slot for
+  its deadline tick; a key -> slot index gives O(1) schedule and cancel.
+  A min-heap of (deadline tick, key) tracks the earliest pending expiry, so
+  next_tick_time() is the tick that will actually expire something and
+  advance(now) jumps straight to the due ticks instead of stepping through
+  empty ones; one driver (the HealthEngine loop) replaces a timer object
+  per timeout and sleeps until the next real deadline. Cancelled entries
+  are left in the heap and dropped when they reach the top.
+
+Times are time.monotonic() seconds. Deadlines are rounded up to the next
+tick, so a timeout fires at most one tick late and never early.
+"""
+
+import heapq
+import itertools
+import math
+import time
+
+
+class TimerWheel:
+    """
+    Timeouts keyed by any hashable, expired in tick-sized steps.
+
+    Usage:
+        wheel = TimerWheel(tick=0.05)
+        wheel.schedule(("capstanDrive", ping_id), time.monotonic() + 1.0, payload)
+        wheel.cancel(("capstanDrive", ping_id))          # PONG arrived
+        for key, payload in wheel.advance():             # from the driving timer
+            handle_timeout(key, payload)
+    """
+
+    def __init__(self, tick=0.05, wheel_size=256, now=None):
+        self.tick = float(tick)
+        self.wheel_size = int(wheel_size)
+        self._slots = [{} for _ in range(self.wheel_size)]  # {key: (deadline_tick, payload)}
+        self._slot_of = {}  # {key: slot index}
+        self._heap = []  # [(deadline_tick, order, key)], may hold cancelled entries
+        self._order = itertools.count()  # Tie-breaker, keys need not be orderable
+        now = time.monotonic() if now is None else now
+        self._cursor = int(now / self.tick)  # Last tick already expired
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, key):
+        return key in self._slot_of
+
+    def schedule(self, key, deadline, payload=None):
+        """Arm (or re-arm) the timeout for `key` at monotonic time `deadline`."""
+        self.cancel(key)
+        deadline_tick = max(math.ceil(deadline / self.tick), self._cursor + 1)
+        index = deadline_tick % self.wheel_size
+        self._slots[index][key] = (deadline_tick, payload)
+        self._slot_of[key] = index
+        heapq.heappush(self._heap, (deadline_tick, next(self._order), key))
+
+    def cancel(self, key):
+        """Disarm the timeout for `key`; return False if it was not pending."""
+        index = self._slot_of.pop(key, None)
+        if index is None:
+            return False
+        del self._slots[index][key]
+        return True
+
+    def cancel_matching(self, predicate):
+        """Disarm every timeout whose key satisfies predicate(key); return how many."""
+        keys = [key for key in self._slot_of if predicate(key)]
+        for key in keys:
+            self.cancel(key)
+        return len(keys)
+
+    def clear(self):
+        """Disarm every timeout."""
+        for slot in self._slots:
+            slot.clear()
+        self._slot_of.clear()
+        self._heap.clear()
+
+    def _is_live(self, deadline_tick, key):
+        """True if the heap entry still matches the armed timeout for `key`."""
+        index = self._slot_of.get(key)
+        if index is None:
+            return False
+        entry = self._slots[index].get(key)
+        return entry is not None and entry[0] == deadline_tick
+
+    def next_tick_time(self):
+        """Monotonic time of the earliest pending deadline tick, or None when empty."""
+        heap = self._heap
+        while heap and not self._is_live(heap[0][0], heap[0][2]):
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return heap[0][0] * self.tick
+
+    def advance(self, now=None):
+        """Remove and return [(key, payload), ...] for every timeout due by `now`."""
+        now = time.monotonic() if now is None else now
+        target = int(now / self.tick)
+        if target <= self._cursor:
+            return []
+        expired = []
+        heap = self._heap
+        # Only due entries are popped; empty ticks in between are never visited
+        while heap and heap[0][0] <= target:
+            deadline_tick, _, key = heapq.heappop(heap)
+            if not self._is_live(deadline_tick, key):
+                continue
+            index = self._slot_of.pop(key)
+            expired.append((key, self._slots[index].pop(key)[1]))
+        self._cursor = target
+        return expired
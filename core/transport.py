@@ -0,0 +1,633 @@
+"""
+UDP Transport v2.02
+
+Single-socket multiplexed UDP transport for every device in servers.json.
+
+Architecture:
+- UDPTransport: Owns one bound UDP socket and one receive thread for the
+  whole fleet. Replies are routed to per-device channels by source address
+  through a dict index, so selecting a device never creates or tears down a
+  socket.
+- DeviceChannel: Per-device endpoint with the send API of the legacy
+  UDPClientThread (send_message / send_ping / send_zulu_sync and the
+  pong_received signal), so HealthMonitor can use either interchangeably.
+  Log lines are delivered in batches through messages_received(list).
+- Shared addresses: every registered (location, name) gets its own channel,
+  even when several servers.json entries point at one host:port. A reply
+  from a shared address goes to the channel that sent what it answers (the
+  PING for a PONG, the SYNC t1 for a SYNC reply, the in-flight request for
+  a sequenced reply); other traffic is delivered to every channel there.
+  Signals therefore always carry the name the caller registered.
+
+The receive loop blocks in a selector on the data socket plus a wake-up
+socket pair, so an idle transport never wakes up and stop() returns
+immediately instead of waiting out a socket timeout. Errors are caught per
+datagram and per expired request (including those raised by
+DirectConnection slots), logged at most once per second, and never stop
+the loop. Each wake-up drains
+the socket in batches through core.batch_recv.BatchReceiver, and payloads
+are decoded only for PONGs and for the channel the GUI is displaying.
+
+Received lines are buffered in the network thread and flushed once per
+UDP_SIGNAL_BATCH_INTERVAL_MS as one messages_received(list) emit per
+channel, so a 1 kHz reply stream costs the GUI a few dozen queued events
+per second instead of thousands.
+
+Channels flagged "sequence_numbers": true in servers.json tag each request
+with "@<seq>:" and track it in the transport's InFlightTable (see
+core/inflight.py); each tagged reply resolves exactly the request it
+answers through reply_received, and unanswered requests are reported by
+request_timed_out when their deadline passes.
+
+Clock sync exchanges (core/time_sync.py) go out through send_time_sync();
+the reply's t4 is its receive time and is delivered through
+time_sync_received.
+
+Channels flagged "binary_encoding": true in servers.json are offered the
+compact binary framing of core/wire_codec.py (ENC:BIN1 negotiation). Once
+the device accepts, dictionary commands go out as frames, reply frames are
+decoded back to CSV text on receipt, and everything else stays text.
+
+A device worker can take a channel's traffic directly: attach_worker_channel()
+installs an SPSCChannel (core/spsc_channel.py) that receives (bytes, rx_ns)
+for every regular datagram, with no lock or Qt signal per packet.
+
+Every datagram carries a time.monotonic_ns() receive time: the kernel's
+SO_TIMESTAMPNS stamp when UDP_KERNEL_TIMESTAMPS is on (Linux), otherwise
+the time its batch was read. PINGs are stamped with time.monotonic_ns()
+just before sending, so PONGs report their wire RTT as additional_info
+['rtt_ms'] and reply RTTs use the same receive stamp; receive-thread,
+signal and GUI latency no longer count as network time.
+"""
+
+import collections
+import selectors
+import socket
+import threading
+import time
+from PySide6.QtCore import QObject, QThread, Signal
+import config
+from core.batch_recv import BatchReceiver
+from core.health_engine import ping_message, pong_tracking_key
+from core.inflight import InFlightTable, SEQUENCE_MODULUS, add_sequence_tag, parse_sequence_tag
+from core.time_sync import correction_message, parse_sync_reply, sync_request
+from core.wire_codec import BINARY_ENCODING, WireCodecError, is_frame, negotiation_request, parse_negotiation
+
+
+def resolve_address(host, port):
+    """Return the (ip, port) tuple recvfrom() reports for a configured device."""
+    try:
+        ip = socket.gethostbyname(host)
+    except OSError:
+        ip = host
+    return (ip, int(port))
+
+
+def channel_key(client_name, location=None):
+    """Registry key of a device: "<location>/<name>", or just the name without a location."""
+    return f"{location}/{client_name}" if location else client_name
+
+
+class DeviceChannel(QObject):
+    """
+    Per-device endpoint on a shared UDPTransport.
+
+    Devices that share an address (for example several servers.json entries
+    pointing at one test box) each have their own channel, so signals carry
+    the name each one was registered under.
+    """
+
+    messages_received = Signal(list)  # Batch of log lines, oldest first
+    pong_received = Signal(str, float, dict)  # worker_name, ping_time, additional_info
+    reply_received = Signal(int, str, float)  # seq, payload, rtt_ms (sequenced channels only)
+    request_timed_out = Signal(int, str)  # seq, message
+    time_sync_received = Signal(str, float, float, float, float)  # client_name, t1, t2, t3, t4 (epoch ms)
+
+    def __init__(self, transport, host, port, client_name=None, sequenced=False):
+        super().__init__()
+        self.transport = transport
+        self.host = host
+        self.port = int(port)
+        self.client_name = client_name
+        self.address = resolve_address(host, port)
+        self.pending_pings = {}  # {tracking key: (ping_time, monotonic_ns sent)}
+        self.displayed = False  # Set by the GUI while this channel's traffic is on screen
+        self.pending_lines = []  # Received lines awaiting the next batch flush (network thread only)
+        self.sequenced = sequenced  # Device echoes "@<seq>:" tags on its replies
+        self.last_heard = 0.0  # time.monotonic() of the last non-PING/PONG datagram (passive liveness)
+        self.codec = None  # WireCodec offered to the device (core/wire_codec.py)
+        self.binary = False  # Device accepted binary frames for self.codec's schema
+        self.worker_channel = None  # SPSCChannel fed from the receive thread (core/spsc_channel.py)
+        self.sync_sent = collections.deque(maxlen=8)  # t1 of recent SYNC requests, as sent on the wire
+        self._next_seq = 0
+
+    def attach_worker_channel(self, channel):
+        """Send this device's regular datagrams to channel as (bytes, rx_ns); None detaches."""
+        self.worker_channel = channel
+
+    def send_message(self, msg, seq=None, timeout=None):
+        """
+        Send a message to this device through the shared transport socket.
+
+        On sequenced channels the request is tagged and tracked until its
+        reply arrives or `timeout` (default UDP_REQUEST_TIMEOUT_S) passes.
+        Pass an existing `seq` to retransmit under the same sequence number.
+
+        Returns:
+            The sequence number used, or None for unsequenced channels or on error.
+        """
+        wire = msg
+        try:
+            body = self._encode_body(msg)
+            binary = is_frame(body)
+            if self.sequenced:
+                if seq is None:
+                    seq = self._allocate_seq()
+                wire = add_sequence_tag(seq, msg)
+                body = add_sequence_tag(seq, '').encode() + body
+                # Track before sending so an immediate reply always finds its request
+                self.transport.track_request(self.address, seq, msg, timeout or config.UDP_REQUEST_TIMEOUT_S,
+                                             owner=self)
+            self.transport.sendto(body, self.address)
+            if binary:
+                wire = f"{wire} [binary, {len(body)} bytes]"
+            self.messages_received.emit([f"Sent: {wire} (from local port {self.transport.local_port})"])
+            return seq
+        except Exception as e:
+            if seq is not None:
+                self.transport.inflight.resolve(self.address, seq)
+            self.messages_received.emit([f"UDP Send Error: {e}"])
+            return None
+
+    def _encode_body(self, msg):
+        """Binary frame for msg once the device accepted binary encoding, else its text."""
+        if self.binary:
+            try:
+                return self.codec.encode_request(msg)
+            except WireCodecError:
+                pass  # Not a dictionary command (or not encodable): the device still reads text
+        return msg.encode()
+
+    def negotiate_encoding(self, codec):
+        """Offer binary encoding for codec's dictionary; frames are used once the device accepts."""
+        if self.codec is not codec:
+            self.codec = codec
+            self.binary = False
+        try:
+            self.transport.sendto(negotiation_request(codec.schema_id).encode(), self.address)
+        except OSError as e:
+            self.messages_received.emit([f"[ENCODING] Failed to send negotiation: {e}"])
+
+    def _allocate_seq(self):
+        """Return the next sequence number not currently in flight."""
+        inflight = self.transport.inflight
+        for _ in range(SEQUENCE_MODULUS):
+            seq = self._next_seq
+            self._next_seq = (seq + 1) % SEQUENCE_MODULUS
+            if (self.address, seq) not in inflight:
+                return seq
+        raise RuntimeError("All sequence numbers are in flight")
+
+    def send_ping(self, ping_time, send_timestamp=False):
+        """
+        Send ping to device (non-blocking, for health monitoring).
+
+        Args:
+            ping_time: Timestamp of ping request (used internally for tracking)
+            send_timestamp: If True, include timestamp (for first contact/recovery)
+        """
+        try:
+            message, tracking_key = ping_message(ping_time, send_timestamp)
+            data = message.encode()
+            self.pending_pings[tracking_key] = (ping_time, time.monotonic_ns())
+            self.transport.sendto(data, self.address)
+        except Exception as e:
+            print(f"Failed to send ping: {e}")
+
+    def send_zulu_sync(self, broadcast=False):
+        """
+        Send ZULU time synchronization to edge device(s).
+
+        Format: ZULU:yyyymmdd:hhmmss.xxx
+
+        Args:
+            broadcast: If True, send to broadcast address (all devices on network)
+        """
+        try:
+            from datetime import datetime, timezone
+
+            now_utc = datetime.now(timezone.utc)
+            date_str = now_utc.strftime('%Y%m%d')
+            time_str = now_utc.strftime('%H%M%S.%f')[:-3]  # Include milliseconds
+            message = f"ZULU:{date_str}:{time_str}"
+
+            if broadcast:
+                self.transport.sendto(message.encode(), ('<broadcast>', self.port), broadcast=True)
+                print(f"[ZULU SYNC] Broadcast sent: {message}")
+                self.messages_received.emit([f"[ZULU SYNC] Broadcast: {message}"])
+            else:
+                self.transport.sendto(message.encode(), self.address)
+                print(f"[ZULU SYNC] Sent to {self.host}:{self.port}: {message}")
+                self.messages_received.emit([f"[ZULU SYNC] Sent: {message}"])
+        except Exception as e:
+            print(f"[ZULU SYNC] Failed to send: {e}")
+            self.messages_received.emit([f"[ZULU SYNC] Error: {e}"])
+
+    def send_time_sync(self):
+        """Send a SYNC:<t1> clock sync request (see core/time_sync.py)."""
+        try:
+            message = sync_request(time.time() * 1000.0)
+            self.sync_sent.append(message[5:])  # Lets a shared address route the reply back here
+            self.transport.sendto(message.encode(), self.address)
+        except OSError as e:
+            print(f"[CLOCK SYNC] Failed to send: {e}")
+
+    def send_time_correction(self, correction_ms):
+        """Step the device clock by correction_ms."""
+        message = correction_message(correction_ms)
+        try:
+            self.transport.sendto(message.encode(), self.address)
+            self.messages_received.emit([f"[CLOCK SYNC] Sent correction to {self.host}:{self.port}: {message}"])
+        except OSError as e:
+            print(f"[CLOCK SYNC] Failed to send correction: {e}")
+
+    def dispatch_datagram(self, payload, addr, rx_ns=None):
+        """
+        Route one raw datagram (called from the transport thread).
+
+        payload may be a memoryview into the receive ring; it is only decoded
+        for PONGs and for channels the GUI is currently displaying. rx_ns is
+        the datagram's time.monotonic_ns() arrival time (now if not given).
+        """
+        if rx_ns is None:
+            rx_ns = time.monotonic_ns()
+        # Ping/pong messages bypass the normal command flow
+        kind = bytes(payload[:5])
+        if kind == b'PING' or kind == b'PING:':
+            return
+        if kind == b'PONG' or kind == b'PONG:':
+            msg = str(payload, 'utf-8', 'replace')
+            if self.displayed:
+                self.transport.queue_line(self, f"[UDP] Received PONG: {msg}")
+            self._handle_pong_message(msg, rx_ns)
+            return
+        if kind == b'SYNC:':
+            # Wall-clock t4 at arrival, not at dispatch
+            t4 = time.time() * 1000.0 - (time.monotonic_ns() - rx_ns) / 1e6
+            times = parse_sync_reply(str(payload, 'utf-8', 'replace'))
+            if times is not None:
+                self.time_sync_received.emit(self.client_name, *times, t4)
+            return
+        if kind == b'ENC:B' or kind == b'ENC:T':
+            self._handle_encoding_reply(str(payload, 'utf-8', 'replace'))
+            return
+        # Regular traffic proves the device is alive; PONGs must not, or they would replace their own pings
+        self.last_heard = rx_ns / 1e9
+        sink = self.worker_channel
+        if sink is not None:
+            # Copied: the payload is a view into the receiver's reused buffers
+            sink.push((bytes(payload), rx_ns))
+        if self.sequenced:
+            seq, body = parse_sequence_tag(payload)
+            if seq is not None:
+                text = self._payload_text(body)
+                request = self.transport.inflight.resolve(self.address, seq)
+                if request is not None:
+                    self.reply_received.emit(seq, text, request.rtt_ms(rx_ns / 1e9))
+                if self.displayed:
+                    self.transport.queue_line(self, f"Received from {addr}: {text}")
+                return
+        if self.displayed:
+            self.transport.queue_line(self, f"Received from {addr}: {self._payload_text(payload)}")
+
+    def owns_sync_reply(self, times):
+        """True if parsed SYNC reply times answer one of this channel's requests."""
+        return f"{times[0]:.3f}" in self.sync_sent
+
+    def _payload_text(self, payload):
+        """Text of a reply body, decoding binary reply frames back to CSV."""
+        if self.codec is not None and is_frame(payload):
+            try:
+                return self.codec.decode_reply(payload)
+            except WireCodecError as e:
+                return f"[undecodable frame: {e}] {bytes(payload).hex()}"
+        return str(payload, 'utf-8', 'replace')
+
+    def _handle_encoding_reply(self, message):
+        """ENC:BIN1:<schema> accepts binary frames for our dictionary; anything else keeps text."""
+        reply = parse_negotiation(message)
+        accepted = (reply is not None and self.codec is not None
+                    and reply == (BINARY_ENCODING, self.codec.schema_id))
+        self.binary = accepted
+        if self.displayed:
+            mode = "binary frames" if accepted else "text"
+            self.transport.queue_line(self, f"[ENCODING] {self.host}:{self.port} uses {mode} ({message})")
+
+    def _handle_pong_message(self, message, rx_ns):
+        """
+        Handle incoming PONG message.
+
+        Format: PONG or PONG:timestamp
+        """
+        pending = self.pending_pings.pop(pong_tracking_key(message), None)
+        if pending is not None:
+            ping_time, sent_ns = pending
+            # Plain PINGs share one key: a PONG that arrived before this send answers an older ping
+            info = {'rtt_ms': (rx_ns - sent_ns) / 1e6} if rx_ns >= sent_ns else {}
+            self.pong_received.emit(self.client_name, ping_time, info)
+
+
+class UDPTransport(QThread):
+    """
+    One UDP socket and one receive thread serving every registered device.
+
+    Usage:
+        transport = UDPTransport()
+        channel = transport.register_device("capstanDrive", "192.168.1.157", 2222)
+        transport.start()
+        channel.send_message("GET_STATUS")
+    """
+
+    transport_message = Signal(str)  # Transport-level log lines (bind, unknown senders, errors)
+
+    def __init__(self, bind_host="0.0.0.0", bind_port=0, parent=None):
+        super().__init__(parent)
+        self.channels = {}  # {(ip, port): [DeviceChannel, ...]} - routing index
+        self.channels_by_name = {}  # {channel_key(name, location): DeviceChannel}
+        self.running = False
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # Headroom for telemetry bursts between batch flushes (OS may cap it)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, config.UDP_RECV_SOCKET_BUFFER)
+        except OSError:
+            pass
+        self.sock.bind((bind_host, int(bind_port)))
+        self.sock.setblocking(False)
+        self.local_port = self.sock.getsockname()[1]
+        self._broadcast_enabled = False
+        self._send_lock = threading.Lock()
+        self.receiver = BatchReceiver(self.sock, config.UDP_RECV_BATCH_SIZE, config.UDP_RECV_BUFFER_SIZE,
+                                      timestamps=config.UDP_KERNEL_TIMESTAMPS)
+
+        # Coalesced signal delivery (touched only from the receive context)
+        self.batch_interval = config.UDP_SIGNAL_BATCH_INTERVAL_MS / 1000.0
+        self._dirty_channels = []
+        self._flush_deadline = None
+
+        # Outstanding sequenced requests for every channel
+        self.inflight = InFlightTable()
+        self._sleep_until = float('inf')  # Deadline the select loop is currently sleeping towards
+
+        # Errors caught per datagram / request so one bad handler never stops receiving
+        self.error_count = 0
+        self._last_error_report = float('-inf')
+        self._suppressed_errors = 0
+
+        # Wake-up pair lets stop() interrupt the blocking select immediately
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+
+    def register_device(self, client_name, host, port, sequenced=False, location=None):
+        """
+        Register a device and return its channel.
+
+        Registering the same (location, name) again returns the existing
+        channel. Other names on the same address get a channel of their own.
+        """
+        key = channel_key(client_name, location)
+        address = resolve_address(host, port)
+        channel = self.channels_by_name.get(key)
+        if channel is not None and channel.address == address:
+            if sequenced:
+                channel.sequenced = True
+            return channel
+        if channel is not None:
+            self._unroute(channel)  # Re-registered at a new address
+        channel = DeviceChannel(self, host, port, client_name, sequenced)
+        # Copy-on-write so the receive thread never sees a list being changed
+        self.channels[address] = self.channels.get(address, []) + [channel]
+        self.channels_by_name[key] = channel
+        return channel
+
+    def _unroute(self, channel):
+        remaining = [c for c in self.channels.get(channel.address, []) if c is not channel]
+        if remaining:
+            self.channels[channel.address] = remaining
+        else:
+            self.channels.pop(channel.address, None)
+
+    def register_servers(self, servers_by_location):
+        """Register every server from a servers.json mapping of location -> server list."""
+        for location, servers in servers_by_location.items():
+            for server in servers:
+                host = server.get("host") or server.get("ip")
+                port = server.get("port")
+                if host and port:
+                    self.register_device(server.get("name", "Unnamed"), host, port,
+                                         server.get("sequence_numbers", False), location)
+
+    def channel_named(self, client_name, location=None):
+        """Return the channel registered under (location, name), or None."""
+        return self.channels_by_name.get(channel_key(client_name, location))
+
+    def channel_for(self, host, port):
+        """Return the first channel registered for host:port, or None."""
+        channels = self.channels.get(resolve_address(host, port))
+        return channels[0] if channels else None
+
+    def sendto(self, data, address, broadcast=False):
+        """Send raw bytes from the shared socket (safe to call from any thread)."""
+        with self._send_lock:
+            if broadcast and not self._broadcast_enabled:
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                self._broadcast_enabled = True
+            self.sock.sendto(data, address)
+
+    def start(self):
+        """Start the receive thread."""
+        self.running = True
+        super().start()
+
+    def run(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ, self._on_readable)
+        selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self.transport_message.emit(
+            f"[UDP] Listening for responses from {len(self.channels_by_name)} device(s) on local port {self.local_port}."
+        )
+        try:
+            while self.running:
+                # Sleep until traffic arrives, the pending batch is due, or a request expires.
+                # Until the new deadline is published, any track_request() wakes us: it may have
+                # added a deadline after next_deadline() was read.
+                self._sleep_until = float('inf')
+                deadlines = [d for d in (self._flush_deadline, self.inflight.next_deadline()) if d is not None]
+                self._sleep_until = min(deadlines) if deadlines else float('inf')
+                timeout = None
+                if deadlines:
+                    timeout = max(0.0, self._sleep_until - time.monotonic())
+                for key, _ in selector.select(timeout):
+                    if key.data is None:
+                        self._drain_wake()
+                    else:
+                        key.data()
+                self._sleep_until = 0.0  # Awake: deadlines added now are read before the next select
+                now = time.monotonic()
+                self.expire_requests(now)
+                if self._flush_deadline is not None and now >= self._flush_deadline:
+                    self.flush_lines()
+        except Exception as e:
+            # Only the selector itself gets here: datagram and timeout handling catch their own errors
+            self.transport_message.emit(f"UDP Error: receive loop stopped: {e}")
+        finally:
+            self.flush_lines()
+            selector.close()
+
+    def _on_readable(self):
+        """Drain every queued datagram in batches and route each to its device channel."""
+        receiver = self.receiver
+        while True:
+            try:
+                count = receiver.recv_batch()
+            except OSError as e:
+                self.transport_message.emit(f"UDP Receive Error: {e}")
+                return
+            addresses = receiver.addresses
+            rx_times = receiver.rx_times
+            for i in range(count):
+                self.route_datagram(receiver.payload(i), addresses[i], rx_times[i])
+            if count < receiver.batch_size:
+                return
+
+    def route_datagram(self, data, addr, rx_ns=None):
+        """
+        Hand one received datagram (arrived at monotonic rx_ns) to its device channel(s).
+
+        An exception while handling it (decoding, or a DirectConnection slot)
+        is reported and the datagram dropped; receiving carries on.
+        """
+        try:
+            self._route(data, addr, rx_ns)
+        except Exception as e:
+            self._report_error(f"Error handling datagram from {addr}", e)
+
+    def _route(self, data, addr, rx_ns):
+        channels = self.channels.get(addr)
+        if channels is None:
+            msg = str(data, 'utf-8', 'replace')
+            self.transport_message.emit(f"[UDP] Received from unregistered {addr}: {msg}")
+            return
+        if len(channels) == 1:
+            channels[0].dispatch_datagram(data, addr, rx_ns)
+            return
+        owner = self._reply_owner(channels, data, addr)
+        if owner is not None:
+            owner.dispatch_datagram(data, addr, rx_ns)
+            return
+        kind = bytes(data[:5])
+        if kind == b'PONG' or kind == b'PONG:' or kind == b'SYNC:':
+            return  # Answers nothing any registrant has outstanding
+        for channel in channels:
+            channel.dispatch_datagram(data, addr, rx_ns)
+
+    def _reply_owner(self, channels, data, addr):
+        """Channel on a shared address that sent the request data answers, or None."""
+        kind = bytes(data[:5])
+        if kind == b'PONG' or kind == b'PONG:':
+            key = pong_tracking_key(str(data, 'utf-8', 'replace'))
+            return next((c for c in channels if key in c.pending_pings), None)
+        if kind == b'SYNC:':
+            times = parse_sync_reply(str(data, 'utf-8', 'replace'))
+            if times is None:
+                return None
+            return next((c for c in channels if c.owns_sync_reply(times)), None)
+        seq, _ = parse_sequence_tag(data)
+        if seq is not None:
+            request = self.inflight.get(addr, seq)
+            if request is not None:
+                return request.owner
+        return None
+
+    def _report_error(self, context, error):
+        """Log a per-datagram or per-request error, at most once per second while they repeat."""
+        self.error_count += 1
+        now = time.monotonic()
+        if now - self._last_error_report < 1.0:
+            self._suppressed_errors += 1
+            return
+        suppressed = f" ({self._suppressed_errors} similar errors suppressed)" if self._suppressed_errors else ""
+        self._last_error_report = now
+        self._suppressed_errors = 0
+        print(f"[UDP] {context}: {error!r}{suppressed}")
+        self.transport_message.emit(f"UDP Error: {context}: {error}{suppressed}")
+
+    def queue_line(self, channel, line):
+        """Buffer a received log line for the channel's next messages_received batch."""
+        if not channel.pending_lines:
+            self._dirty_channels.append(channel)
+        channel.pending_lines.append(line)
+        if self._flush_deadline is None:
+            self._flush_deadline = deadline = time.monotonic() + self.batch_interval
+            self._schedule_flush(deadline)
+
+    def _schedule_flush(self, deadline):
+        """Arrange for flush_lines() at `deadline`: the select loop wakes for it like any request deadline."""
+        self._deadline_added(deadline)
+
+    def flush_lines(self):
+        """Emit one messages_received batch per channel with buffered lines."""
+        self._flush_deadline = None
+        dirty, self._dirty_channels = self._dirty_channels, []
+        for channel in dirty:
+            lines, channel.pending_lines = channel.pending_lines, []
+            try:
+                channel.messages_received.emit(lines)
+            except Exception as e:
+                self._report_error(f"Error delivering lines to {channel.client_name}", e)
+
+    def track_request(self, device, seq, message, timeout, owner=None):
+        """Record a sent request in the in-flight table (safe to call from any thread)."""
+        request = self.inflight.add(device, seq, message, timeout, owner=owner)
+        self._deadline_added(request.deadline)
+        return request
+
+    def _deadline_added(self, deadline):
+        """Wake the select loop if it is sleeping past a newly added deadline."""
+        if deadline < self._sleep_until:
+            self._wake()
+
+    def expire_requests(self, now=None):
+        """Report every request whose deadline passed through its channel's request_timed_out."""
+        for request in self.inflight.pop_expired(now):
+            channel = request.owner
+            if channel is None:
+                channels = self.channels.get(request.device)
+                channel = channels[0] if channels else None
+            if channel is not None:
+                try:
+                    channel.request_timed_out.emit(request.seq, request.message)
+                except Exception as e:
+                    self._report_error(f"Error reporting timeout of seq {request.seq}", e)
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(64):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def stop(self):
+        """Stop the receive thread and release the socket."""
+        self.running = False
+        self._wake()
+        self.wait()
+        self.sock.close()
+        self._wake_r.close()
+        self._wake_w.close()
@@ -0,0 +1,310 @@
+"""
+Wire Codec v2.02
+
+Optional compact binary encoding of dictionary commands, negotiated per device.
+
+Architecture:
+- Frames (little-endian):
+    request  B1 <command id:u16> <count:u8> <param 1> ... <param count>
+    reply    B2 <command id:u16> <count:u8> <field 1> ... <field count>
+  The command id is the command's position in the dictionary's "commands"
+  object. Each value is packed by its dictionary type:
+    enum     u8   index into "options"
+    boolean  u8   1 / 0
+    integer  i32
+    float    f32
+    string   u8 length + UTF-8 bytes
+  Parameters that share a param_number under different "condition"s are
+  resolved from the values already decoded (the same rule the Message
+  Creator panel uses to decide which one to show), so frames carry no
+  per-parameter tags. Replies use the command's "returns" list.
+- WireCodec: Compiled once from a command dictionary's CommandSchema
+  (core/command_schema.py), which parses the options, conditions, boolean
+  strings and slots; the codec only adds the packing rules. Converts the
+  CSV text form ("LED,1,blink,3,0.5") to frames and back, in both
+  directions. schema_id is a CRC32 of the compiled layout, so both ends can
+  check they were built from the same dictionary.
+- Negotiation (text datagrams):
+    host   -> device   ENC:BIN1:<schema_id>
+    device -> host     ENC:BIN1:<schema_id>     accepted (same dictionary)
+    device -> host     ENC:TEXT                 declined
+  Until a device accepts, and for any message the codec cannot encode
+  (command not in the dictionary, value that does not parse), the CSV text
+  is sent unchanged. Frames start with a byte >= 0x80, which never begins a
+  text message, so both forms can share the socket.
+
+Text conventions follow message_creator_panel.py: an enum in parameter 1 is
+sent as its 1-based option index, other enums as the option value, and
+booleans as BOOLEAN_CONFIG["message_encoding"].
+"""
+
+import json
+import math
+import struct
+import zlib
+from decimal import Decimal
+
+from core.command_schema import CommandSchema, CommandValidationError, group_slots
+
+REQUEST_MAGIC = 0xB1
+REPLY_MAGIC = 0xB2
+HEADER = struct.Struct('<BHB')  # magic, command id, value count
+
+BINARY_ENCODING = 'BIN1'
+TEXT_ENCODING = 'TEXT'
+
+_U8 = struct.Struct('<B')
+_I32 = struct.Struct('<i')
+_F32 = struct.Struct('<f')
+_F32_MAX = 3.4028234663852886e38
+
+
+class WireCodecError(ValueError):
+    """A message or frame does not fit the compiled dictionary layout."""
+
+
+def is_frame(payload):
+    """True if a datagram body is a binary frame rather than text."""
+    return len(payload) > 0 and payload[0] >= 0x80
+
+
+def negotiation_request(schema_id):
+    """Host offer of binary encoding for dictionary layout `schema_id`."""
+    return f"ENC:{BINARY_ENCODING}:{schema_id}"
+
+
+def parse_negotiation(message):
+    """Return (encoding, schema_id or None) from an 'ENC:...' message, or None if malformed."""
+    parts = message.strip().split(':')
+    if len(parts) < 2 or parts[0] != 'ENC':
+        return None
+    if parts[1] == BINARY_ENCODING and len(parts) == 3:
+        return BINARY_ENCODING, parts[2]
+    if parts[1] == TEXT_ENCODING and len(parts) == 2:
+        return TEXT_ENCODING, None
+    return None
+
+
+def _format_float(value):
+    """Shortest float32-faithful text, never in scientific notation."""
+    text = f"{value:.7g}"
+    if 'e' in text:
+        text = format(Decimal(text), 'f')
+    return text
+
+
+class _Field:
+    """Packing rules for one compiled parameter or return field (a ParamSpec)."""
+
+    __slots__ = ('name', 'kind', 'options', 'indices', 'index_text', 'true_strings', 'false_strings', 'encoding')
+
+    def __init__(self, spec, encoding):
+        self.name = spec.name
+        self.kind = spec.kind
+        if self.kind not in ('enum', 'boolean', 'integer', 'float', 'string'):
+            raise WireCodecError(f"Parameter {self.name}: unsupported type {self.kind!r}")
+        self.options = spec.options
+        self.indices = {value: i for i, value in enumerate(self.options)}
+        if self.kind == 'enum' and not 0 < len(self.options) <= 256:
+            raise WireCodecError(f"Parameter {self.name}: enum needs 1 to 256 options")
+        self.index_text = spec.index_form  # Parameter 1 enums travel as 1-based option indices
+        self.true_strings = spec.true_strings
+        self.false_strings = spec.false_strings
+        self.encoding = encoding
+
+    def layout(self):
+        return [self.kind, list(self.options)]
+
+    def pack(self, text, out):
+        """Append `text` packed to `out`; return the value conditions compare against."""
+        kind = self.kind
+        try:
+            if kind == 'enum':
+                index = self.indices.get(text)
+                if index is None:
+                    index = int(text) - 1 if self.index_text and text.isdigit() else -1
+                    if not 0 <= index < len(self.options):
+                        raise ValueError(f"no option {text!r}")
+                out += _U8.pack(index)
+                return self.options[index]
+            if kind == 'boolean':
+                lowered = text.lower()
+                if lowered in self.true_strings:
+                    out += b'\x01'
+                elif lowered in self.false_strings:
+                    out += b'\x00'
+                else:
+                    raise ValueError(f"not a boolean: {text!r}")
+                return text
+            if kind == 'integer':
+                out += _I32.pack(int(text))
+                return text
+            if kind == 'float':
+                value = float(text)
+                if not math.isfinite(value) or abs(value) > _F32_MAX:
+                    raise ValueError(f"{text} does not fit a 32-bit float")
+                out += _F32.pack(value)
+                return text
+            data = text.encode('utf-8')
+            out += _U8.pack(len(data)) + data
+            return text
+        except (ValueError, struct.error) as e:
+            raise WireCodecError(f"Parameter {self.name}: {e}") from None
+
+    def unpack(self, data, offset):
+        """Return (text, value conditions compare against, next offset)."""
+        kind = self.kind
+        try:
+            if kind == 'enum':
+                index = data[offset]
+                if index >= len(self.options):
+                    raise WireCodecError(f"Parameter {self.name}: no option index {index}")
+                text = str(index + 1) if self.index_text else self.options[index]
+                return text, self.options[index], offset + 1
+            if kind == 'boolean':
+                text = self.encoding[0] if data[offset] else self.encoding[1]
+                return text, text, offset + 1
+            if kind == 'integer':
+                text = str(_I32.unpack_from(data, offset)[0])
+                return text, text, offset + _I32.size
+            if kind == 'float':
+                text = _format_float(_F32.unpack_from(data, offset)[0])
+                return text, text, offset + _F32.size
+            end = offset + 1 + data[offset]
+            if end > len(data):
+                raise WireCodecError(f"Parameter {self.name}: truncated string")
+            text = bytes(data[offset + 1:end]).decode('utf-8', 'replace')
+            return text, text, end
+        except (IndexError, struct.error):
+            raise WireCodecError(f"Parameter {self.name}: truncated frame") from None
+
+
+def _compile_slots(specs, encoding):
+    """Positional slots of ParamSpecs, each a tuple of (conditions, _Field) alternatives."""
+    if specs and (min(spec.number for spec in specs) < 1 or max(spec.number for spec in specs) > 255):
+        raise WireCodecError("Parameter numbers must be between 1 and 255")
+    return tuple(tuple((spec.conditions, _Field(spec, encoding)) for spec in slot)
+                 for slot in group_slots(specs))
+
+
+def _select(slot, context):
+    for conditions, field in slot:
+        if not conditions or any(context.get(name) in values for name, values in conditions):
+            return field
+    return None
+
+
+class _CommandLayout:
+    __slots__ = ('name', 'command_id', 'params', 'returns')
+
+    def __init__(self, name, command_id, params, returns):
+        self.name = name
+        self.command_id = command_id
+        self.params = params
+        self.returns = returns
+
+
+class WireCodec:
+    """
+    Text <-> binary frame conversion compiled from one command dictionary.
+
+    Usage:
+        codec = WireCodec(command_dict, config_mod.BOOLEAN_CONFIG)
+        frame = codec.encode_request("LED,1,blink,3,0.5")
+        codec.decode_request(frame)      # "LED,1,blink,3,0.5"
+
+    Pass schema= to reuse a CommandSchema already compiled from the same
+    dictionary (the registry does); otherwise one is compiled here.
+    """
+
+    def __init__(self, command_dict, boolean_config=None, schema=None):
+        boolean_config = boolean_config or {}
+        commands = (command_dict or {}).get('commands', {})
+        if len(commands) > 0xFFFF:
+            raise WireCodecError("Too many commands for a 16-bit command id")
+        if schema is None:
+            try:
+                schema = CommandSchema(commands, boolean_config)
+            except CommandValidationError as e:
+                raise WireCodecError(str(e)) from None
+        encoding = tuple(boolean_config.get('message_encoding', ('1', '0')))
+        self.commands = {}  # {name: _CommandLayout}
+        self.by_id = []  # [_CommandLayout] indexed by command id
+        for command_id, name in enumerate(commands):
+            spec = schema.get(name)
+            if spec is None:
+                raise WireCodecError(f"Command {name} missing from the compiled schema")
+            layout = _CommandLayout(name, command_id, _compile_slots(spec.params, encoding),
+                                    _compile_slots(spec.returns, encoding))
+            self.commands[name] = layout
+            self.by_id.append(layout)
+        canonical = json.dumps([
+            [layout.name,
+             [[[[[name, sorted(values)] for name, values in c], f.layout()] for c, f in slot]
+              for slot in layout.params],
+             [[f.layout() for _, f in slot] for slot in layout.returns]]
+            for layout in self.by_id
+        ], separators=(',', ':'))
+        self.schema_id = f"{zlib.crc32(canonical.encode('utf-8')):08x}"
+
+    def _encode(self, magic, text, returns):
+        parts = [p.strip() for p in text.split(',')]
+        layout = self.commands.get(parts[0])
+        if layout is None:
+            raise WireCodecError(f"Unknown command: {parts[0]}")
+        slots = layout.returns if returns else layout.params
+        values = parts[1:]
+        if len(values) > len(slots) and slots and all(f.kind == 'string' for _, f in slots[-1]):
+            # A trailing string field ("n=3,d=0.5") keeps its own commas
+            values[len(slots) - 1:] = [",".join(values[len(slots) - 1:])]
+        if len(values) > len(slots):
+            raise WireCodecError(f"{layout.name} takes at most {len(slots)} values, got {len(values)}")
+        out = bytearray(HEADER.pack(magic, layout.command_id, len(values)))
+        context = {}
+        for number, (slot, raw) in enumerate(zip(slots, values), 1):
+            field = _select(slot, context)
+            if field is None:
+                raise WireCodecError(f"{layout.name}: no parameter {number} for these values")
+            context[field.name] = field.pack(raw, out)
+        return bytes(out)
+
+    def _decode(self, magic, payload, returns):
+        if len(payload) < HEADER.size:
+            raise WireCodecError("Truncated frame header")
+        frame_magic, command_id, count = HEADER.unpack_from(payload, 0)
+        if frame_magic != magic:
+            raise WireCodecError(f"Unexpected frame type 0x{frame_magic:02x}")
+        if command_id >= len(self.by_id):
+            raise WireCodecError(f"Unknown command id {command_id}")
+        layout = self.by_id[command_id]
+        slots = layout.returns if returns else layout.params
+        if count > len(slots):
+            raise WireCodecError(f"{layout.name} takes at most {len(slots)} values, got {count}")
+        parts = [layout.name]
+        context = {}
+        offset = HEADER.size
+        for number in range(count):
+            field = _select(slots[number], context)
+            if field is None:
+                raise WireCodecError(f"{layout.name}: no parameter {number + 1} for these values")
+            text, context[field.name], offset = field.unpack(payload, offset)
+            parts.append(text)
+        if offset != len(payload):
+            raise WireCodecError(f"{len(payload) - offset} trailing bytes after {layout.name}")
+        return ",".join(parts)
+
+    def encode_request(self, text):
+        """CSV command text -> request frame (raises WireCodecError if it does not fit)."""
+        return self._encode(REQUEST_MAGIC, text, False)
+
+    def decode_request(self, payload):
+        """Request frame (bytes-like) -> CSV command text."""
+        return self._decode(REQUEST_MAGIC, payload, False)
+
+    def encode_reply(self, text):
+        """CSV reply text ("GET_LED,1,1,blink,n=3") -> reply frame using the command's "returns"."""
+        return self._encode(REPLY_MAGIC, text, True)
+
+    def decode_reply(self, payload):
+        """Reply frame (bytes-like) -> CSV reply text."""
+        return self._decode(REPLY_MAGIC, payload, True)
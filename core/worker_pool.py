@@ -0,0 +1,226 @@
+"""
+Worker Pool v2.02
+
+Device workers run as cooperative tasks on a small, shared pool of threads
+instead of one blocking thread per device.
+
+Architecture:
+- Mailbox: FIFO of messages for one worker. It has no timeout and no thread
+  of its own. put() appends (collections.deque, thread-safe) and calls the
+  mailbox's waker, which schedules the owning task only if it is not
+  already scheduled. Any object with put(), get_batch(n), __len__() and
+  set_waker() can serve as a task's mailbox; core/mailbox.py adds the
+  PriorityMailbox used by device workers.
+- WorkerTask: A mailbox bound to a handler callable. While the mailbox has
+  messages, the task is in the pool's run queue exactly once. A pool
+  thread takes it, handles up to WORKER_POOL_BATCH messages, then either
+  re-queues it behind the other ready tasks (fairness) or marks it idle
+  when the mailbox is empty. The idle check and the flag change happen
+  under the task's lock, and producers wake after appending, so a message
+  is never left unscheduled. A task never runs on two threads at once, so
+  handlers need no more locking than they did with a dedicated thread.
+- WorkerPool: WORKER_POOL_THREADS threads (0 = one per CPU) blocked on a
+  single condition variable until a task is ready. An idle device costs
+  one Mailbox and one WorkerTask: no thread, no stack and no timed wakeups,
+  so hundreds of devices can share one supervisor process.
+
+Handlers run on pool threads and must not block for long; a handler that
+waits on the network holds a pool thread for every device behind it.
+benchmarks/worker_pool_bench.py compares this with thread-per-device.
+"""
+
+import collections
+import os
+import threading
+
+import config
+
+
+class Mailbox:
+    """
+    Unbounded FIFO mailbox that wakes its worker task on demand.
+
+    put() keeps the queue.Queue signature, so existing producers can call it
+    unchanged; block and timeout are ignored because put() never blocks.
+    """
+
+    def __init__(self):
+        self._items = collections.deque()
+        self._waker = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def set_waker(self, waker):
+        """Callable invoked after every put() (None to detach)."""
+        self._waker = waker
+
+    def put(self, item, block=True, timeout=None):
+        self._items.append(item)
+        waker = self._waker
+        if waker is not None:
+            waker()
+
+    def put_nowait(self, item):
+        self.put(item)
+
+    def get_batch(self, max_items):
+        """Up to max_items queued messages, oldest first (never blocks)."""
+        items = self._items
+        batch = []
+        try:
+            for _ in range(max_items):
+                batch.append(items.popleft())
+        except IndexError:
+            pass
+        return batch
+
+
+class WorkerTask:
+    """One worker's mailbox and handler, scheduled on a WorkerPool."""
+
+    def __init__(self, pool, mailbox, handler, name=None, on_error=None):
+        self.pool = pool
+        self.mailbox = mailbox
+        self.handler = handler  # Called with each message, on a pool thread
+        self.name = name or getattr(handler, '__qualname__', 'worker')
+        self.on_error = on_error  # Called with (task, exception); default prints
+        self.handled = 0
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._cancelled = False
+        mailbox.set_waker(self.wake)
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def wake(self):
+        """Schedule the task if it is idle; cheap no-op when it is already queued or running."""
+        with self._lock:
+            if self._scheduled or self._cancelled:
+                return
+            self._scheduled = True
+        self.pool._submit(self)
+
+    def cancel(self):
+        """Stop scheduling the task. Queued messages stay in the mailbox for a later task."""
+        with self._lock:
+            self._cancelled = True
+        self.mailbox.set_waker(None)
+
+    def _run(self, batch_size):
+        """Handle up to batch_size messages on the calling pool thread; return True to be re-queued."""
+        get_batch = self.mailbox.get_batch
+        remaining = batch_size
+        # A mailbox may return less than asked (PriorityMailbox hands out one
+        # message at a time below the emergency lane), so keep asking
+        while remaining > 0 and not self._cancelled:
+            batch = get_batch(remaining)
+            if not batch:
+                break
+            remaining -= len(batch)
+            for message in batch:
+                try:
+                    self.handler(message)
+                except Exception as e:
+                    if self.on_error is not None:
+                        self.on_error(self, e)
+                    else:
+                        print(f"[WorkerPool] {self.name} error: {e}")
+                self.handled += 1
+        with self._lock:
+            if self._cancelled or not len(self.mailbox):
+                self._scheduled = False
+                return False
+            return True
+
+
+class WorkerPool:
+    """
+    Small thread pool multiplexing many mailbox-driven device workers.
+
+    Usage:
+        pool = get_worker_pool()
+        mailbox = Mailbox()
+        task = pool.spawn(mailbox, worker.dispatch_command, name="capstanDrive-1")
+        mailbox.put({"command": "GET_STATUS"})   # wakes the task; handled on a pool thread
+        task.cancel()
+    """
+
+    def __init__(self, threads=None, batch_size=None):
+        threads = config.WORKER_POOL_THREADS if threads is None else threads
+        self.thread_count = threads or os.cpu_count() or 1
+        self.batch_size = config.WORKER_POOL_BATCH if batch_size is None else batch_size
+        self._ready = collections.deque()  # WorkerTasks with messages waiting
+        self._cond = threading.Condition(threading.Lock())
+        self._threads = []
+        self._stopping = False
+
+    def spawn(self, mailbox, handler, name=None, on_error=None):
+        """Bind a handler to a mailbox; messages already queued are handled right away."""
+        self._ensure_threads()
+        task = WorkerTask(self, mailbox, handler, name, on_error)
+        if len(mailbox):
+            task.wake()
+        return task
+
+    def pending(self):
+        """Number of tasks waiting for a pool thread."""
+        return len(self._ready)
+
+    def _ensure_threads(self):
+        with self._cond:
+            if self._threads or self._stopping:
+                return
+            for i in range(self.thread_count):
+                thread = threading.Thread(target=self._run, name=f"WorkerPool-{i}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def _submit(self, task):
+        with self._cond:
+            self._ready.append(task)
+            self._cond.notify()
+
+    def _run(self):
+        ready = self._ready
+        cond = self._cond
+        batch_size = self.batch_size
+        while True:
+            with cond:
+                while not ready and not self._stopping:
+                    cond.wait()  # No timeout: an idle pool makes no wakeups at all
+                if self._stopping:
+                    return
+                task = ready.popleft()
+            if task._run(batch_size):
+                self._submit(task)  # More messages: go behind the other ready tasks
+
+    def shutdown(self, wait=True):
+        """Stop the pool threads; tasks still queued are not run."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        if wait:
+            current = threading.current_thread()
+            for thread in threads:
+                if thread is not current:
+                    thread.join(timeout=2.0)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """The process-wide WorkerPool shared by device workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool
@@ -1,39 +1,89 @@
-
-import os
-import json
-import threading
-import queue
 from datetime import datetime
+from core.dictionary_registry import DictionaryError, get_registry
+from core.inflight import parse_sequence_tag
+from core.mailbox import PriorityMailbox
+from core.spsc_channel import SPSCChannel
+from core.wire_codec import WireCodecError, is_frame
+from core.worker_pool import get_worker_pool
 from .capstanDrive_handler import CapstanDriveHandler
 
-class CapstanDriveWorker(threading.Thread):
-    def __init__(self, server_config, mailbox=None):
-        super().__init__()
+class CapstanDriveWorker:
+    """
+    One capstanDrive device's worker, run as a task on the shared WorkerPool.
+
+    There is no thread per device: putting a message in `mailbox` wakes the
+    task, and dispatch_command runs on a pool thread (core/worker_pool.py).
+    The mailbox is a PriorityMailbox (core/mailbox.py), so emergency commands
+    are dispatched before queued control and GET_ traffic.
+
+    attach(device_channel) takes the device's datagrams straight from the
+    transport receive thread through an SPSCChannel (core/spsc_channel.py).
+    They are handled in batches by a second pool task, which only updates
+    `telemetry`, so it never races the command handler.
+    """
+
+    def __init__(self, server_config, mailbox=None, pool=None):
         self.server_config = server_config
-        self.mailbox = mailbox or queue.Queue()
-        self.running = threading.Event()
-        self.running.set()
+        self.mailbox = mailbox if mailbox is not None else PriorityMailbox()
+        self.pool = pool or get_worker_pool()
+        self.task = None
+        self.datagrams = None  # SPSCChannel from the DeviceChannel, once attached
+        self.datagram_task = None
+        self.telemetry = {}  # {reply command: (reply text, rx monotonic_ns)}, latest only
         self.handler = CapstanDriveHandler(self)
-        self.command_dict = self.load_command_dictionary()
+        self.device_dictionary = self.load_device_dictionary()
 
-    def load_command_dictionary(self):
-        dict_path = os.path.join(os.path.dirname(__file__), '../../../../../shared_dictionaries/command_dictionaries/capstanDrive_commandDictionary.json')
+    def load_device_dictionary(self):
+        # Shared registry entry, loaded once per process and updated in place on hot reload
         try:
-            with open(dict_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
+            return get_registry().get('capstanDrive')
+        except DictionaryError as e:
             self.log_error(f"Failed to load command dictionary: {e}")
-            return {}
+            return None
 
-    def run(self):
-        while self.running.is_set():
+    @property
+    def command_dict(self):
+        # Read-only {command: definition}, always the currently loaded version
+        entry = self.device_dictionary
+        return entry.commands if entry is not None else {}
+
+    @property
+    def name(self):
+        return (self.server_config or {}).get('name', 'capstanDrive')
+
+    def start(self):
+        """Attach to the pool; messages already in the mailbox are handled right away."""
+        if self.task is None:
+            self.task = self.pool.spawn(self.mailbox, self.dispatch_command, name=self.name,
+                                        on_error=lambda task, e: self.log_error(f"Worker run error: {e}"))
+        if self.datagrams is not None and self.datagram_task is None:
+            self.datagram_task = self.pool.spawn(self.datagrams, self.handle_datagram, name=f"{self.name}-rx",
+                                                 on_error=lambda task, e: self.log_error(f"Datagram error: {e}"))
+
+    def attach(self, device_channel, capacity=None):
+        """Receive device_channel's datagrams (transport/DeviceChannel) through an SPSC ring."""
+        if self.datagrams is None:
+            self.datagrams = SPSCChannel(capacity)
+        device_channel.attach_worker_channel(self.datagrams)
+        if self.task is not None:
+            self.start()
+
+    def handle_datagram(self, item):
+        """Record one received reply as the latest telemetry for its command."""
+        payload, rx_ns = item
+        _, body = parse_sequence_tag(payload)
+        text = None
+        if is_frame(body) and self.device_dictionary is not None:
             try:
-                msg = self.mailbox.get(timeout=0.2)
-                self.dispatch_command(msg)
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.log_error(f"Worker run error: {e}")
+                text = self.device_dictionary.codec.decode_reply(body)
+            except WireCodecError:
+                pass
+        if text is None:
+            text = str(body, 'utf-8', 'replace')
+        self.telemetry[text.split(',', 1)[0]] = (text, rx_ns)
+
+    def is_alive(self):
+        return self.task is not None
 
     def dispatch_command(self, msg):
         try:
@@ -47,7 +97,13 @@ class CapstanDriveWorker(threading.Thread):
             self.log_error(f"Dispatch error: {e}")
 
     def stop(self):
-        self.running.clear()
+        # Messages still queued stay in the mailbox for a later start()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.datagram_task is not None:
+            self.datagram_task.cancel()
+            self.datagram_task = None
 
     def log_error(self, message):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
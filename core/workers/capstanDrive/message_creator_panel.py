@@ -1,9 +1,19 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QTextEdit, QLabel, QLineEdit, QPushButton, QMenu, QMessageBox
 from PySide6.QtCore import Signal, Qt, QTimer
+from PySide6.QtGui import QAction
 from decimal import Decimal
 import config
 import re
 
+# Command menu submenus, in display order; uncategorized commands follow a separator
+CATEGORY_ORDER = [
+    "Device Control",
+    "Device Status",
+    "Error Handling",
+    "System Administration"
+]
+
+
 class MessageCreatorPanel(QWidget):
     send_message_signal = Signal(str)
     user_input_changed = Signal()  # Emitted when any user input changes
@@ -13,6 +23,10 @@ class MessageCreatorPanel(QWidget):
         self._command_dict = command_dict
         self._command_config = command_config
         self._current_command = None  # Store selected command
+        self._command_menu = None
+        self._category_menus = {}  # {category: QMenu}
+        self._command_actions = {}  # {command: (QAction, menu it is in, category)}
+        self._uncategorized_separator = None
         
         # Replace command dropdown with a menu button
         self.command_button = QPushButton("Select Command...")
@@ -192,6 +206,10 @@ class MessageCreatorPanel(QWidget):
             return
         
         menu = QMenu(self)
+        self._command_menu = menu
+        self._category_menus = {}
+        self._command_actions = {}
+        self._uncategorized_separator = None
         commands = self._command_dict['commands']
         
         # Group commands by category
@@ -202,32 +220,104 @@ class MessageCreatorPanel(QWidget):
                 categories[category] = []
             categories[category].append(cmd_name)
         
-        # Sort categories to ensure consistent order
-        category_order = [
-            "Device Control",
-            "Device Status", 
-            "Error Handling",
-            "System Administration"
-        ]
-        
-        # Create submenu for each category
-        for category in category_order:
-            if category in categories:
-                submenu = menu.addMenu(category)
-                # Sort commands within category alphabetically
-                for cmd_name in sorted(categories[category]):
-                    action = submenu.addAction(cmd_name)
-                    action.triggered.connect(lambda checked=False, cmd=cmd_name: self.on_command_selected(cmd))
-        
-        # Add any uncategorized commands at the bottom
-        if 'Uncategorized' in categories:
-            menu.addSeparator()
-            for cmd_name in sorted(categories['Uncategorized']):
-                action = menu.addAction(cmd_name)
-                action.triggered.connect(lambda checked=False, cmd=cmd_name: self.on_command_selected(cmd))
+        # Create submenu for each category, commands sorted alphabetically,
+        # then any uncategorized commands at the bottom
+        for category in CATEGORY_ORDER + ['Uncategorized']:
+            for cmd_name in sorted(categories.get(category, [])):
+                self._add_command_action(cmd_name, category)
         
         self.command_button.setMenu(menu)
     
+    def _menu_for_category(self, category):
+        """Menu that holds a category's commands, created in CATEGORY_ORDER position if needed."""
+        menu = self._command_menu
+        if category == 'Uncategorized':
+            if self._uncategorized_separator is None:
+                self._uncategorized_separator = menu.addSeparator()
+            return menu
+        if category not in CATEGORY_ORDER:
+            return None  # Unknown categories are not listed
+        submenu = self._category_menus.get(category)
+        if submenu is None:
+            submenu = QMenu(category, menu)
+            # Before the next category that exists, else before the uncategorized section
+            before = self._uncategorized_separator
+            for later in CATEGORY_ORDER[CATEGORY_ORDER.index(category) + 1:]:
+                if later in self._category_menus:
+                    before = self._category_menus[later].menuAction()
+                    break
+            if before is not None:
+                menu.insertMenu(before, submenu)
+            else:
+                menu.addMenu(submenu)
+            self._category_menus[category] = submenu
+        return submenu
+    
+    def _add_command_action(self, cmd_name, category):
+        """Insert a command's action into its category menu, keeping it sorted."""
+        menu = self._menu_for_category(category)
+        if menu is None:
+            return
+        action = QAction(cmd_name, menu)
+        action.triggered.connect(lambda checked=False, cmd=cmd_name: self.on_command_selected(cmd))
+        siblings = {entry[0] for entry in self._command_actions.values() if entry[1] is menu}
+        before = next((a for a in menu.actions() if a in siblings and a.text() > cmd_name), None)
+        if before is not None:
+            menu.insertAction(before, action)
+        else:
+            menu.addAction(action)
+        self._command_actions[cmd_name] = (action, menu, category)
+    
+    def _remove_command_action(self, cmd_name):
+        """Remove a command's action, and its submenu or separator once empty."""
+        entry = self._command_actions.pop(cmd_name, None)
+        if entry is None:
+            return
+        action, menu, category = entry
+        menu.removeAction(action)
+        action.deleteLater()
+        if any(other[2] == category for other in self._command_actions.values()):
+            return
+        if category == 'Uncategorized':
+            self._command_menu.removeAction(self._uncategorized_separator)
+            self._uncategorized_separator = None
+        else:
+            self._command_menu.removeAction(menu.menuAction())
+            del self._category_menus[category]
+            menu.deleteLater()
+    
+    def apply_dictionary_diff(self, command_dict, diff):
+        """
+        Switch to a hot-reloaded dictionary, touching only the menu entries in diff.
+        
+        Args:
+            command_dict: The new (shared, read-only) command dictionary
+            diff: DictionaryDiff from the registry (added/removed/changed command names)
+        """
+        self._command_dict = command_dict
+        if self._command_menu is None:
+            self.build_command_menu()
+        else:
+            commands = command_dict.get('commands', {})
+            for cmd_name in diff.removed:
+                self._remove_command_action(cmd_name)
+            for cmd_name in diff.added:
+                self._add_command_action(cmd_name, commands[cmd_name].get('category', 'Uncategorized'))
+            for cmd_name in diff.changed:
+                # Only a category change moves the entry; its label is just the name
+                category = commands[cmd_name].get('category', 'Uncategorized')
+                entry = self._command_actions.get(cmd_name)
+                if entry is None or entry[2] != category:
+                    self._remove_command_action(cmd_name)
+                    self._add_command_action(cmd_name, category)
+        
+        # Refresh the fields if the command being edited was touched
+        if self._current_command in diff.removed:
+            self.clear_fields()
+        elif self._current_command in diff.changed:
+            self.update_command_related_dropdowns(self._current_command)
+            self.on_user_input_changed()
+    
     def on_command_selected(self, command):
         """Called when a command is selected from the menu."""
         self._current_command = command
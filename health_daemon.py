@@ -0,0 +1,191 @@
+"""
+Headless Health Monitor Daemon - runs the health engine without Qt or a desktop session.
+
+This standalone service:
+1. Loads devices from data/servers.json
+2. Pings them round-robin through one UDP socket (same PING/PONG protocol as the GUI)
+3. Logs every status transition and round-robin timing warning
+4. Optionally writes a JSON status snapshot after every cycle (--status-file)
+5. Appends every RTT sample to the persistent history (--history-dir)
+
+The engine is core/health_engine.py, the same one the GUI wraps in
+core/health_monitor.py, so thresholds and timings come from config.py.
+
+Usage:
+    python health_daemon.py [--servers data/servers.json] [--location NAME] [--status-file PATH]
+                            [--history-dir DIR]
+
+Example:
+    python health_daemon.py --location Local --status-file /tmp/fleet_health.json
+"""
+
+import argparse
+import json
+import os
+import selectors
+import socket
+import time
+from datetime import datetime
+
+import config
+from core.batch_recv import TIMESTAMP_ANCBUF_SIZE, enable_kernel_timestamps, kernel_rx_time_ns, realtime_offset_ns
+from core.health_engine import HealthEngine, ping_message, pong_tracking_key
+
+
+class PingEndpoint:
+    """Qt-free device endpoint: sends PINGs and matches PONGs to them."""
+
+    def __init__(self, sock, worker_name, host, port):
+        self.sock = sock
+        self.worker_name = worker_name
+        self.address = (socket.gethostbyname(host), int(port))
+        self.pending_pings = {}  # {tracking_key: (ping_time, monotonic_ns sent)}
+
+    def send_ping(self, ping_time, send_timestamp=False):
+        message, tracking_key = ping_message(ping_time, send_timestamp)
+        data = message.encode()
+        self.pending_pings[tracking_key] = (ping_time, time.monotonic_ns())
+        self.sock.sendto(data, self.address)
+
+    def take_pong(self, message):
+        """Return (ping_time, sent_ns) for the ping a PONG answers, or None if it is not ours."""
+        return self.pending_pings.pop(pong_tracking_key(message), None)
+
+
+class HealthDaemon:
+    """Selector loop that drives a HealthEngine and receives PONGs on one socket."""
+
+    def __init__(self, servers_by_location, location=None, status_file=None, bind_port=0, history_dir=None):
+        self.status_file = status_file
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("0.0.0.0", bind_port))
+        self.sock.setblocking(False)
+        self.kernel_timestamps = config.UDP_KERNEL_TIMESTAMPS and enable_kernel_timestamps(self.sock)
+        self.endpoints = {}  # {(ip, port): [PingEndpoint]} - several entries may share an address
+        self.levels = {}  # {worker_name: last logged error level}
+
+        self.engine = HealthEngine(enabled=True, history_dir=history_dir)
+        self.engine.add_listener(self._on_event)
+
+        for loc, servers in servers_by_location.items():
+            if location and loc != location:
+                continue
+            for server in servers:
+                host = server.get("host") or server.get("ip")
+                port = server.get("port")
+                if not (host and port):
+                    continue
+                # Names repeat across locations, so qualify them
+                worker_name = f"{loc}/{server.get('name', 'Unnamed')}"
+                try:
+                    endpoint = PingEndpoint(self.sock, worker_name, host, port)
+                except OSError as e:
+                    self.log(f"Skipping {worker_name}: {e}")
+                    continue
+                self.endpoints.setdefault(endpoint.address, []).append(endpoint)
+                self.engine.register_worker(worker_name, endpoint, server.get("health_metrics"))
+
+    def log(self, message):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        print(f"[{timestamp}] {message}", flush=True)
+
+    def _on_event(self, event, *args):
+        if event == 'health_status_updated':
+            worker_name, status = args
+            level = status['error_level']
+            # Log transitions only, not every PONG
+            if level != self.levels.get(worker_name):
+                self.levels[worker_name] = level
+                detail = status['error'] or f"{status['response_time_ms']:.1f}ms"
+                self.log(f"{level} {worker_name}: {detail}")
+        elif event == 'round_robin_timing_warning':
+            actual, target = args
+            self.log(f"Round-robin took {actual:.2f}s (target {target:.2f}s)")
+        elif event == 'round_robin_cycle_complete':
+            self._write_status_file()
+
+    def _write_status_file(self):
+        if not self.status_file:
+            return
+        snapshot = {
+            'timestamp': time.time(),
+            'devices': {name: self.engine.get_health_status(name) for name in list(self.engine.workers)},
+        }
+        if self.engine.fleet_store is not None:
+            snapshot['fleet'] = self.engine.fleet_store.summary()
+        tmp_path = f"{self.status_file}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, indent=2, default=str)
+            os.replace(tmp_path, self.status_file)
+        except OSError as e:
+            self.log(f"Failed to write status file: {e}")
+
+    def _on_readable(self):
+        while True:
+            try:
+                if self.kernel_timestamps:
+                    data, ancdata, _, addr = self.sock.recvmsg(4096, TIMESTAMP_ANCBUF_SIZE)
+                    stamp = kernel_rx_time_ns(ancdata)
+                    rx_ns = stamp - realtime_offset_ns() if stamp is not None else time.monotonic_ns()
+                else:
+                    data, addr = self.sock.recvfrom(4096)
+                    rx_ns = time.monotonic_ns()
+            except (BlockingIOError, InterruptedError):
+                return
+            except ConnectionResetError:
+                continue  # Windows reports ICMP port-unreachable from an earlier send here
+            if not data.startswith(b'PONG'):
+                continue
+            message = data.decode('utf-8', errors='replace')
+            for endpoint in self.endpoints.get(addr, ()):
+                pending = endpoint.take_pong(message)
+                if pending is not None:
+                    ping_time, sent_ns = pending
+                    info = {'rtt_ms': (rx_ns - sent_ns) / 1e6} if rx_ns >= sent_ns else {}
+                    self.engine.handle_pong(endpoint.worker_name, ping_time, info)
+                    break
+
+    def run(self):
+        """Monitor until interrupted."""
+        self.log(f"Monitoring {len(self.engine.workers)} device(s) from local port {self.sock.getsockname()[1]}")
+        self.engine.start()
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        try:
+            while True:
+                deadline = self.engine.run_due()
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if selector.select(timeout):
+                    self._on_readable()
+        finally:
+            self.engine.close()
+            selector.close()
+            self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless device health monitor')
+    parser.add_argument('--servers', default='data/servers.json', help='servers.json path (default: data/servers.json)')
+    parser.add_argument('--location', default=None, help='Only monitor devices under this location')
+    parser.add_argument('--status-file', default=None, help='Write a JSON status snapshot here after every cycle')
+    parser.add_argument('--port', type=int, default=0, help='Local UDP port to bind (default: any)')
+    parser.add_argument('--history-dir', default=None,
+                        help='RTT history directory (default: config.HEALTH_HISTORY_DIR)')
+    args = parser.parse_args()
+
+    with open(args.servers, 'r') as f:
+        servers_by_location = json.load(f)
+
+    daemon = HealthDaemon(servers_by_location, args.location, args.status_file, args.port, args.history_dir)
+    if not daemon.engine.workers:
+        print("No devices to monitor")
+        return
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("\n[HealthDaemon] Stopped")
+
+
+if __name__ == '__main__':
+    main()
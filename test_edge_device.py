@@ -4,11 +4,15 @@ Test Edge Device Server - Simulates an edge device for testing health monitoring
 This standalone server:
 1. Listens on a UDP port
 2. Responds to PING messages with PONG (for health monitoring)
-3. Responds to regular commands (for normal operation testing)
-4. Collects and reports metrics (uptime, temperature, cpu, etc.)
+3. Answers SYNC clock sync exchanges and applies SYNC:ADJ corrections
+4. Responds to regular commands (for normal operation testing)
+5. Collects and reports metrics (uptime, temperature, cpu, etc.)
+6. With --dictionary, accepts ENC:BIN1 negotiation and decodes binary command
+   frames (core/wire_codec.py), acknowledging each as OK:<csv>
 
 Usage:
-    python test_edge_device.py [--port PORT] [--host HOST]
+    python test_edge_device.py [--port PORT] [--host HOST] [--clock-offset-ms MS] [--drift-ppm PPM]
+                               [--dictionary PATH]
 
 Example:
     python test_edge_device.py --port 5000 --host 0.0.0.0
@@ -17,15 +21,19 @@ Example:
 import socket
 import time
 import argparse
+import json
 import random
 import platform
 import psutil  # pip install psutil if not available
 
+from core.wire_codec import (BINARY_ENCODING, TEXT_ENCODING, WireCodec, WireCodecError, is_frame,
+                             negotiation_request, parse_negotiation)
+
 
 class TestEdgeDevice:
     """Simulated edge device with health monitoring support."""
     
-    def __init__(self, host='0.0.0.0', port=5000):
+    def __init__(self, host='0.0.0.0', port=5000, clock_offset_ms=0.0, drift_ppm=0.0, codec=None):
         self.host = host
         self.port = port
         self.sock = None
@@ -36,6 +44,13 @@ class TestEdgeDevice:
         self.zulu_offset_ms = 0  # Offset in ms: ZULU_ms - uptime_ms
         self.time_synced = False
         
+        # Simulated clock error before the first sync, and crystal drift
+        self.clock_offset_ms = clock_offset_ms
+        self.drift_ppm = drift_ppm
+        
+        # Binary command frames (only with a command dictionary)
+        self.codec = codec
+        
         # Simulated device state
         self.led_status = "OFF"
         self.motor_position = 0
@@ -59,12 +74,9 @@ class TestEdgeDevice:
             while self.running:
                 try:
                     data, addr = self.sock.recvfrom(4096)
-                    message = data.decode('utf-8', errors='ignore')
                     
-                    print(f"[RECV] {message} from {addr}")
-                    
-                    # Handle message and generate response
-                    response = self.handle_message(message)
+                    # Handle message (text or binary frame) and generate response
+                    response = self.handle_datagram(data, addr)
                     
                     if response:
                         # Send response back to sender
@@ -96,6 +108,33 @@ class TestEdgeDevice:
             self.sock = None
         print("\n[TestEdgeDevice] Stopped")
     
+    def handle_datagram(self, data, addr=None):
+        """
+        Handle one received datagram and return the response string (or None).
+        
+        Binary command frames (optionally behind an "@<seq>:" tag) are decoded
+        to their CSV text and acknowledged; everything else is handled as text.
+        """
+        tag, body = b'', data
+        if data.startswith(b'@'):
+            head, sep, rest = data[1:].partition(b':')
+            if sep and head.isdigit():
+                tag, body = data[:len(head) + 2], rest
+        
+        if self.codec is not None and is_frame(body):
+            prefix = tag.decode('ascii')
+            try:
+                message = self.codec.decode_request(body)
+            except WireCodecError as e:
+                print(f"[RECV] Bad frame {body.hex()} from {addr}: {e}")
+                return f"{prefix}ERROR:Bad frame: {e}"
+            print(f"[RECV] {prefix}{message} [binary, {len(data)} bytes] from {addr}")
+            return f"{prefix}OK:{message}"
+        
+        message = data.decode('utf-8', errors='ignore')
+        print(f"[RECV] {message} from {addr}")
+        return self.handle_message(message)
+    
     def handle_message(self, message):
         """
         Handle incoming message and return response.
@@ -106,11 +145,26 @@ class TestEdgeDevice:
         Returns:
             Response string or None
         """
+        # Sequenced request "@<seq>:<message>" — answer with the same tag
+        if message.startswith('@'):
+            tag, sep, body = message[1:].partition(':')
+            if sep and tag.isdigit():
+                response = self.handle_message(body)
+                return f"@{tag}:{response}" if response else None
+
         # PRIORITY 1: ZULU time sync (intercept at UDP level, no response)
         if message.startswith('ZULU:'):
             self.handle_zulu_sync(message)
             return None  # No response needed
         
+        # PRIORITY 1b: Clock sync exchange / correction
+        if message.startswith('SYNC:'):
+            return self.handle_clock_sync(message)
+        
+        # PRIORITY 1c: Wire encoding negotiation
+        if message.startswith('ENC:'):
+            return self.handle_encoding(message)
+        
         # PRIORITY 2: Health Check PING (high priority)
         if message == 'PING' or message.startswith('PING:'):
             return self.handle_ping(message)
@@ -186,6 +240,49 @@ class TestEdgeDevice:
             import traceback
             traceback.print_exc()
     
+    def handle_clock_sync(self, message):
+        """
+        Handle NTP-style clock sync.
+        
+        SYNC:<t1>        -> SYNC:<t1>:<t2>:<t3>  (t2 receive, t3 transmit, device epoch ms)
+        SYNC:ADJ:<+/-ms> -> step the device clock, no response
+        """
+        t2 = self.device_time_ms()
+        parts = message.split(':')
+        try:
+            if len(parts) == 3 and parts[1] == 'ADJ':
+                correction_ms = float(parts[2])
+                if not self.time_synced:
+                    # Adopt the free-running clock before stepping it
+                    self.zulu_offset_ms = t2 - self.get_uptime() * 1000
+                    self.time_synced = True
+                self.zulu_offset_ms += correction_ms
+                print(f"[CLOCK SYNC] Stepped clock by {correction_ms:+.3f} ms")
+                return None
+            if len(parts) == 2:
+                t1 = parts[1]
+                float(t1)  # Validate; echoed back verbatim
+                return f"SYNC:{t1}:{t2:.3f}:{self.device_time_ms():.3f}"
+        except ValueError:
+            pass
+        print(f"[CLOCK SYNC] Invalid format: {message}")
+        return None
+    
+    def handle_encoding(self, message):
+        """
+        Handle ENC:BIN1:<schema_id>: accept binary frames if our dictionary matches.
+        
+        Returns:
+            ENC:BIN1:<schema_id> to accept, ENC:TEXT to decline
+        """
+        offer = parse_negotiation(message)
+        if (self.codec is not None and offer is not None
+                and offer == (BINARY_ENCODING, self.codec.schema_id)):
+            print(f"[ENCODING] Binary frames accepted (schema {self.codec.schema_id})")
+            return negotiation_request(self.codec.schema_id)
+        print(f"[ENCODING] Declined {message} - staying on text")
+        return f"ENC:{TEXT_ENCODING}"
+    
     def handle_ping(self, message):
         """
         Handle PING message for health monitoring.
@@ -266,18 +363,19 @@ class TestEdgeDevice:
     
     def get_zulu_time(self):
         """Return current time in ZULU (UTC) based on synchronized offset."""
+        return self.device_time_ms() / 1000.0
+    
+    def device_time_ms(self):
+        """Device clock in epoch milliseconds."""
         if self.time_synced:
             # Calculate: zulu_offset_ms + current_uptime_ms
-            current_uptime_ms = int(self.get_uptime() * 1000)
-            current_zulu_ms = self.zulu_offset_ms + current_uptime_ms
-            return current_zulu_ms / 1000.0
-        else:
-            # If not synced yet, return local time
-            return time.time()
+            return self.zulu_offset_ms + self.get_uptime() * 1000
+        # If not synced yet, free-running local clock (plus simulated error)
+        return self.start_time * 1000 + self.clock_offset_ms + self.get_uptime() * 1000
     
     def get_uptime(self):
-        """Return uptime in seconds."""
-        return time.time() - self.start_time
+        """Return uptime in seconds (as counted by the simulated crystal)."""
+        return (time.time() - self.start_time) * (1 + self.drift_ppm * 1e-6)
     
     def get_temperature(self):
         """
@@ -337,11 +435,35 @@ def main():
         default=5000,
         help='UDP port to listen on (default: 5000)'
     )
+    parser.add_argument(
+        '--clock-offset-ms',
+        type=float,
+        default=0.0,
+        help='Simulated clock error before the first sync (default: 0)'
+    )
+    parser.add_argument(
+        '--drift-ppm',
+        type=float,
+        default=0.0,
+        help='Simulated clock drift in parts per million (default: 0)'
+    )
+    parser.add_argument(
+        '--dictionary',
+        default=None,
+        help='Command dictionary JSON; enables binary frame negotiation (ENC:BIN1)'
+    )
     
     args = parser.parse_args()
     
+    codec = None
+    if args.dictionary:
+        with open(args.dictionary, 'r') as f:
+            codec = WireCodec(json.load(f))
+    
     # Create and start test device
-    device = TestEdgeDevice(host=args.host, port=args.port)
+    device = TestEdgeDevice(host=args.host, port=args.port,
+                            clock_offset_ms=args.clock_offset_ms, drift_ppm=args.drift_ppm,
+                            codec=codec)
     
     try:
         device.start()